@@ -0,0 +1,167 @@
+"""
+整局游戏基准测试：无窗口运行完整游戏循环 (Game.step：事件 -> 固定步长逻辑 -> 延后任务 -> 插值绘制)，
+统计每帧逻辑与绘制耗时的分位数
+用法：python benchmarks/bench_game.py [--seconds 30] [--fps 60] [--level 1] [--enemies 80]
+                                      [--weapons 3001 3006] [--seed 1] [--mortal] [--profile CSV]
+玩家按固定脚本走位、鼠标绕屏幕中心旋转；每帧传给 Game.step 的 dt 固定为 1 / fps，随机数种子固定
+逻辑始终按 1 / SIM_HZ 推进 (fps 与 SIM_HZ 不同时每帧走 0~SIM_MAX_CATCH_UP 步，绘制按余下的时间插值)；
+武器冷却等计时基于模拟时钟 SIM_CLOCK，与真实耗时无关
+"""
+import os
+import sys
+import math
+import time
+import random
+import argparse
+import contextlib
+import io
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+from src.settings import *
+from src.logger import log
+from src.game import Game
+from src.input_source import ScriptedInput
+from src.asset_cache import TRANSFORMS
+from src.swarm import LOD_TIER_NAMES
+from src.sim_clock import SIM_CLOCK
+
+
+def _mouse_orbit(t):
+    """鼠标绕屏幕中心旋转 (每 4 秒一圈)"""
+    angle = t * math.pi / 2
+    return (WINDOW_WIDTH // 2 + math.cos(angle) * 200, WINDOW_HEIGHT // 2 + math.sin(angle) * 200)
+
+
+# 走一个方框并在每条边之间停顿一下
+PLAY_SCRIPT = [
+    (1.5, (pygame.K_d,), _mouse_orbit),
+    (0.5, (), _mouse_orbit),
+    (1.5, (pygame.K_s,), _mouse_orbit),
+    (0.5, (), _mouse_orbit),
+    (1.5, (pygame.K_a,), _mouse_orbit),
+    (0.5, (), _mouse_orbit),
+    (1.5, (pygame.K_w,), _mouse_orbit),
+    (0.5, (), _mouse_orbit),
+]
+
+
+def _top_up_enemies(game, target, rng):
+    """按正常的生成规则把敌人补充到 target 个"""
+    enemy_ids = list(game.loader.data['enemies'].keys())
+    missing = target - len(game.swarm)
+    for pos in game.map_manager.spawn_index.sample(game.player.rect.center, missing,
+                                                   SPAWN_MIN_DISTANCE, SPAWN_MAX_DISTANCE):
+        game.enemy_pool.spawn(pos, rng.choice(enemy_ids))
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    n = len(samples)
+    pick = lambda q: samples[min(n - 1, int(n * q))] * 1000
+    return sum(samples) / n * 1000, pick(0.5), pick(0.9), pick(0.99), samples[-1] * 1000
+
+
+def main():
+    # DEBUG 日志会刷屏，写日志线程也会干扰计时，基准测试只保留警告和错误
+    log.set_level(None, 'WARNING')
+    parser = argparse.ArgumentParser(description='无窗口整局游戏循环基准测试')
+    parser.add_argument('--seconds', type=float, default=30, help='模拟的游戏时长（秒）')
+    parser.add_argument('--fps', type=int, default=FPS, help='渲染帧率 (每帧传给 Game.step 的 dt)，逻辑步长固定为 1 / SIM_HZ')
+    parser.add_argument('--level', type=int, default=1, help='玩家等级 (影响可生成的敌人种类)')
+    parser.add_argument('--enemies', type=int, default=80, help='场上保持的敌人数量')
+    parser.add_argument('--weapons', type=int, nargs='*', default=[], help='额外装备的武器ID')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mortal', action='store_true', help='允许玩家死亡 (默认锁血)')
+    parser.add_argument('--profile', metavar='CSV', help='开启帧性能分析器并把分阶段耗时写入该 CSV')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game(headless=True, input_source=ScriptedInput(PLAY_SCRIPT))
+        game.reset_game()
+    if args.profile:
+        game.profiler.enabled = True
+        game.profiler.csv_path = args.profile
+
+    player = game.player
+    player.level = args.level
+    player.xp_required = player.calculate_xp_required(args.level)
+    game._prefetch_enemy_assets()
+    for w_id in args.weapons:
+        if w_id not in game.loader.data['weapons']:
+            print(f"[WARNING] Unknown weapon id {w_id}, skipped")
+            continue
+        player.weapon_controller.add_weapon(w_id)
+
+    # 包一层 Game.draw 记录每帧的绘制耗时，Game.step 其余部分 (事件、逻辑步、延后任务) 计入 update
+    last_draw = [0.0]
+    draw = game.draw
+
+    def timed_draw(alpha=1.0):
+        start = time.perf_counter()
+        draw(alpha)
+        last_draw[0] = time.perf_counter() - start
+    game.draw = timed_draw
+
+    dt = 1 / args.fps
+    frames = int(args.seconds * args.fps)
+    update_times, draw_times = [], []
+    tier_totals = [0] * len(LOD_TIER_NAMES)
+    first_step = SIM_CLOCK.steps
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(frames):
+            _top_up_enemies(game, args.enemies, rng)
+            if not args.mortal:
+                player.current_hp = player.stats['max_hp']
+
+            start = time.perf_counter()
+            game.step(dt)
+            elapsed = time.perf_counter() - start
+            update_times.append(elapsed - last_draw[0])
+            draw_times.append(last_draw[0])
+            tier_totals = [a + b for a, b in zip(tier_totals, game.swarm.tier_counts)]
+
+            # 升级界面直接跳过，保持在战斗状态
+            if game.state == 'LEVEL_UP':
+                game.state = 'PLAYING'
+            elif game.state != 'PLAYING':
+                break
+
+    total_times = [u + d for u, d in zip(update_times, draw_times)]
+    print(f"frames {len(total_times)}  dt {dt * 1000:.2f}ms  level {player.level}  "
+          f"enemies {len(game.swarm)}  sprites {len(game.all_sprites)}  "
+          f"weapons {player.weapon_controller.equipped_weapons}")
+    print(f"sim steps {SIM_CLOCK.steps - first_step} ({SIM_HZ}Hz)  dropped {game.dropped_time:.2f}s")
+    print(f"{'phase':>7} | {'avg':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name, samples in (('update', update_times), ('draw', draw_times), ('total', total_times)):
+        values = ' '.join(f"{v:>6.2f}ms" for v in _percentiles(samples))
+        print(f"{name:>7} | {values}")
+    print(f"transforms {len(TRANSFORMS)} cached  {TRANSFORMS.bytes / 1048576:.1f}MB  "
+          f"hits {TRANSFORMS.hits}  misses {TRANSFORMS.misses}")
+    print(f"enemy pool {len(game.enemy_pool)} free  {len(game.enemy_pool.prefabs)} prefabs  "
+          f"spawn backlog {len(game.wave_director)}  dropped {game.wave_director.dropped}")
+    jobs = game.scheduler.metrics()
+    print(f"jobs {jobs['executed']} run  max depth {jobs['max_depth']}  "
+          f"latency avg {jobs['avg_latency_ms']:.2f}ms max {jobs['max_latency_ms']:.2f}ms  "
+          f"{jobs['slow_jobs']} over budget")
+    print('lod avg  ' + '  '.join(f"{name} {count / max(len(total_times), 1):.1f}"
+                                  for name, count in zip(LOD_TIER_NAMES, tier_totals)))
+    print(f"vfx {len(game.vfx)} active  "
+          f"{sum(len(free) for free in game.vfx.free.values())} pooled  {game.vfx.dropped} dropped")
+    if args.profile:
+        game.profiler.flush()
+        averages = game.profiler.get_averages()
+        print('scopes  | ' + '  '.join(f"{name} {ms:.2f}ms" for name, ms in
+                                      sorted(averages.items(), key=lambda item: item[1], reverse=True)))
+    if game.state == 'GAME_OVER':
+        print("[WARNING] Player died before the run finished")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
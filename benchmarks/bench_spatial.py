@@ -0,0 +1,112 @@
+"""
+空间网格基准测试：比较武器命中检测 "全组扫描" 与 "空间网格查询" 的帧耗时
+用法：python benchmarks/bench_spatial.py [--frames 300] [--enemies 80 200 500] [--projectiles 20 60 150]
+无需窗口，使用 SDL dummy 驱动运行
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+import io
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+from src.settings import *
+from src.logger import log
+from src.game import Game
+from src.enemy import Enemy
+from src.weapon import Projectile
+from src.spatial import SpatialGrid
+
+
+def _spawn_world(game, enemy_count, use_grid, rng):
+    """在玩家周围撒敌人，返回 (敌人组, 空间网格)"""
+    grid = SpatialGrid(cell_size=SPATIAL_CELL_SIZE, query_margin=SPATIAL_QUERY_MARGIN) if use_grid else None
+    enemies = pygame.sprite.Group()
+    cx, cy = game.player.rect.center
+    enemy_ids = list(game.loader.data['enemies'].keys())
+    for _ in range(enemy_count):
+        x = cx + rng.randint(-600, 600)
+        y = cy + rng.randint(-400, 400)
+        enemy = Enemy((x, y), rng.choice(enemy_ids), [game.all_sprites, enemies],
+                      None, game.player, game.loader, spatial_grid=grid)
+        enemy.current_hp = 10 ** 9  # 不让敌人死亡，保持数量恒定
+        if grid is not None:
+            # 不经过敌人池，查询余量按实际的碰撞箱调整
+            grid.fit_margin(max(enemy.hitbox.size) // 2 + 1)
+    return enemies, grid
+
+
+def _fire(game, projectiles, enemies, grid, w_data, rng):
+    direction = pygame.math.Vector2(1, 0).rotate(rng.uniform(0, 360))
+    Projectile(game.player.rect.center, direction, w_data, [game.all_sprites, projectiles],
+               enemies, None, spatial_grid=grid)
+
+
+def run_case(game, enemy_count, projectile_count, use_grid, frames, seed=1):
+    rng = random.Random(seed)
+    game.all_sprites.empty()
+    game.all_sprites.add(game.player)
+    enemies, grid = _spawn_world(game, enemy_count, use_grid, rng)
+
+    w_data = game.loader.data['weapons'][3001].copy()
+    w_data['image_surf'] = game.loader.get_image(w_data.get('effect', w_data['image']))
+    w_data['range'] = 10 ** 9  # 子弹只在命中时消失，由下方补充
+    projectiles = pygame.sprite.Group()
+
+    dt = 1 / FPS
+    samples = []
+    for _ in range(frames):
+        while len(projectiles) < projectile_count:
+            _fire(game, projectiles, enemies, grid, w_data, rng)
+        start = time.perf_counter()
+        enemies.update(dt)
+        projectiles.update(dt)
+        samples.append(time.perf_counter() - start)
+        # 清理受击闪光等特效，避免影响下一帧
+        for sprite in game.all_sprites.sprites():
+            if sprite not in enemies and sprite not in projectiles and sprite is not game.player:
+                sprite.kill()
+
+    for sprite in enemies.sprites() + projectiles.sprites():
+        sprite.kill()
+    samples.sort()
+    return sum(samples) / len(samples) * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+def main():
+    # DEBUG 日志会刷屏，写日志线程也会干扰计时，基准测试只保留警告和错误
+    log.set_level(None, 'WARNING')
+    parser = argparse.ArgumentParser(description='空间网格 vs 全组扫描 帧耗时对比')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--enemies', type=int, nargs='+', default=[80, 200, 500])
+    parser.add_argument('--projectiles', type=int, nargs='+', default=[20, 60, 150])
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game()
+        game.start_new_game()
+        # 场景只关心敌人与子弹，移走地图精灵
+        game.obstacle_sprites.empty()
+
+    print(f"{'enemies':>8} {'bullets':>8} | {'scan avg':>9} {'scan p95':>9} | {'grid avg':>9} {'grid p95':>9} | speedup")
+    for enemy_count in args.enemies:
+        for projectile_count in args.projectiles:
+            with contextlib.redirect_stdout(io.StringIO()):
+                scan_avg, scan_p95 = run_case(game, enemy_count, projectile_count, False, args.frames)
+                grid_avg, grid_p95 = run_case(game, enemy_count, projectile_count, True, args.frames)
+            print(f"{enemy_count:>8} {projectile_count:>8} | {scan_avg:>7.2f}ms {scan_p95:>7.2f}ms | "
+                  f"{grid_avg:>7.2f}ms {grid_p95:>7.2f}ms | x{scan_avg / grid_avg:.2f}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
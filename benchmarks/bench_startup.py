@@ -0,0 +1,114 @@
+"""
+启动加载基准测试：对比 ResourceManager.load_all 和第一帧主菜单在不同配置下的耗时
+用法：python benchmarks/bench_startup.py [--runs 5] [--workers 4]
+每次测量都在新的子进程中进行 (避免前一次加载的 pygame/SDL 状态影响结果)：
+    serial  单线程、无缓存 (等同旧的串行加载)
+    parallel 多线程、无缓存
+    cold    多线程、空缓存目录 (首次启动，需要解码并写缓存)
+    warm    多线程、已写好的缓存目录 (再次启动)
+menu 列为从开始加载到第一帧主菜单绘制完成的耗时，resident 为此时资源仓库中常驻图片的内存
+最后依次取一遍所有图片和序列帧 (并缩放) 触发淘汰，检查常驻内存是否守住 ASSET_IMAGE_BUDGET_MB：
+stale 为序列帧缓存仍引用着、但已被仓库淘汰的图片 (应为 0)
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import contextlib
+import io
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+
+def _child(workers, cache_dir):
+    """子进程：初始化无窗口显示并加载一次全部资源，输出耗时 (毫秒)"""
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    import pygame
+    from src.settings import WINDOW_WIDTH, WINDOW_HEIGHT
+    from src.loader import ResourceManager
+    from src.atlas import collect_sheets
+    from src.asset_cache import TRANSFORMS
+    from src.ui import UI
+
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    with contextlib.redirect_stdout(io.StringIO()):
+        loader = ResourceManager(cache_dir=cache_dir, workers=workers)
+        start = time.perf_counter()
+        loader.load_all()
+        loaded = time.perf_counter()
+        ui = UI(screen, loader)
+        ui.draw_main_menu()
+        pygame.display.flip()
+        menu = time.perf_counter()
+        resident = loader.images.bytes
+        # 不计时：先取一遍所有序列帧 (图集页是固定的，这里关掉图集，帧从各自的大图切出)，
+        # 再取一遍所有图片，超出预算时被淘汰的大图连同切出的帧和缩放结果都应真正释放
+        loader.atlas = None
+        for key, _, spec in collect_sheets(loader):
+            TRANSFORMS.warm_up(loader.get_frames(key, spec).frames, 1.5)
+        for key in loader.image_index:
+            loader.get_image(key)
+    print(f"{(loaded - start) * 1000:.3f} {(menu - start) * 1000:.3f} {resident} "
+          f"{len(loader.image_index)} {len(loader.sounds)} "
+          f"{loader.images.bytes} {loader.strip_bytes()} {loader.images.evictions}")
+    pygame.quit()
+
+
+def _measure(workers, cache_dir):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', '--workers', str(workers)]
+    if cache_dir:
+        cmd += ['--cache-dir', cache_dir]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.splitlines()[-1].split()
+    return (float(out[0]), float(out[1]), int(out[2]), int(out[3]), int(out[4]),
+            int(out[5]), int(out[6]), int(out[7]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='资源加载耗时基准测试')
+    parser.add_argument('--runs', type=int, default=5, help='每种配置的重复次数')
+    parser.add_argument('--workers', type=int, default=4, help='并行配置使用的线程数')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--cache-dir', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.workers, args.cache_dir)
+        return
+
+    results = {'serial': [], 'parallel': [], 'cold': [], 'warm': []}
+    sample = None
+    for _ in range(args.runs):
+        results['serial'].append(_measure(1, None))
+        results['parallel'].append(_measure(args.workers, None))
+        cache_dir = tempfile.mkdtemp(prefix='asset_cache_')
+        try:
+            results['cold'].append(_measure(args.workers, cache_dir))
+            sample = _measure(args.workers, cache_dir)
+            results['warm'].append(sample)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"images {sample[3]}  sounds {sample[4]}  runs {args.runs}  workers {args.workers}")
+    print(f"{'case':>8} | {'load min':>9} {'median':>9} | {'menu min':>9} {'median':>9} | {'resident':>9}")
+    baseline = statistics.median(r[0] for r in results['serial'])
+    for name, samples in results.items():
+        load = [r[0] for r in samples]
+        menu = [r[1] for r in samples]
+        print(f"{name:>8} | {min(load):>7.1f}ms {statistics.median(load):>7.1f}ms | "
+              f"{min(menu):>7.1f}ms {statistics.median(menu):>7.1f}ms | {samples[-1][2] / 1048576:>7.1f}MB"
+              f"  x{baseline / statistics.median(load):.2f}")
+    from src.settings import ASSET_IMAGE_BUDGET_MB
+    print(f"after sweep: resident {sample[5] / 1048576:.1f}MB / budget {ASSET_IMAGE_BUDGET_MB}MB  "
+          f"stale {sample[6] / 1048576:.1f}MB  evictions {sample[7]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+敌人群体基准测试：比较逐个 Enemy.update 与 SwarmSystem 批量模拟的帧耗时
+用法：python benchmarks/bench_swarm.py [--frames 180] [--enemies 80 500 1000 2000] [--no-legacy]
+无需窗口，使用 SDL dummy 驱动运行
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+import io
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+from src.settings import *
+from src.logger import log
+from src.game import Game
+from src.enemy import Enemy
+
+
+def _populate(game, enemy_count, use_swarm, rng):
+    """按正常的生成规则撒敌人"""
+    enemy_ids = list(game.loader.data['enemies'].keys())
+    # 出生点索引按整张地图取点 (离玩家 150 像素以外)
+    map_span = max(game.map_manager.width, game.map_manager.height) * TILE_SIZE * 2
+    positions = game.map_manager.spawn_index.sample(game.player.rect.center, enemy_count, 150, map_span)
+    for pos in positions:
+        Enemy(pos, rng.choice(enemy_ids), [game.all_sprites, game.enemy_sprites],
+              game.obstacle_sprites, game.player, game.loader, None, game.map_manager,
+              spatial_grid=game.enemy_grid, swarm=game.swarm if use_swarm else None)
+
+
+def run_case(game, enemy_count, use_swarm, frames, seed=1):
+    rng = random.Random(seed)
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.reset_game()
+    game.player.current_hp = 10 ** 9  # 玩家不死，保持场景稳定
+    _populate(game, enemy_count, use_swarm, rng)
+
+    dt = 1 / FPS
+    sim, draw = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(frames):
+            start = time.perf_counter()
+            game.swarm.step(dt, game.player)
+            game.all_sprites.update(dt)
+            mid = time.perf_counter()
+            game.all_sprites.custom_draw(game.player)
+            end = time.perf_counter()
+            sim.append(mid - start)
+            draw.append(end - mid)
+
+    alive = sum(1 for s in game.enemy_sprites if isinstance(s, Enemy))
+    sim.sort()
+    draw.sort()
+    return (sum(sim) / frames * 1000, sim[int(frames * 0.95)] * 1000,
+            sum(draw) / frames * 1000, alive)
+
+
+def main():
+    # DEBUG 日志会刷屏，写日志线程也会干扰计时，基准测试只保留警告和错误
+    log.set_level(None, 'WARNING')
+    parser = argparse.ArgumentParser(description='SwarmSystem vs 逐个 Enemy.update 帧耗时对比')
+    parser.add_argument('--frames', type=int, default=180)
+    parser.add_argument('--enemies', type=int, nargs='+', default=[80, 500, 1000, 2000])
+    parser.add_argument('--no-legacy', action='store_true', help='只测试 SwarmSystem')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game()
+    game.state = 'PLAYING'
+
+    modes = [('swarm', True)] if args.no_legacy else [('legacy', False), ('swarm', True)]
+    print(f"{'mode':>7} {'enemies':>8} {'alive':>6} | {'sim avg':>9} {'sim p95':>9} | {'draw avg':>9}")
+    for enemy_count in args.enemies:
+        for name, use_swarm in modes:
+            sim_avg, sim_p95, draw_avg, alive = run_case(game, enemy_count, use_swarm, args.frames)
+            print(f"{name:>7} {enemy_count:>8} {alive:>6} | {sim_avg:>7.2f}ms {sim_p95:>7.2f}ms | {draw_avg:>7.2f}ms")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
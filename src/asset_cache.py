@@ -0,0 +1,344 @@
+"""
+资源缓存
+1. AssetCache：磁盘缓存，保存解码后的原始 RGBA 像素和 PCM 音频
+   每个源文件对应一个缓存文件，文件头记录源文件的 mtime 和大小，源文件变化后自动失效
+   热启动时直接读取原始数据，跳过 PNG / MP3 解码
+2. ImageStore：内存中的图片仓库，按字节预算做 LRU 淘汰，常用图片可以固定 (pin)
+3. TransformCache：进程内共享的缩放/旋转/翻转结果缓存 (全局实例 TRANSFORMS)，同样按字节预算 LRU 淘汰
+"""
+import os
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+import pygame
+from src.settings import *
+from src.logger import log
+
+_IMAGE_MAGIC = b'MEI1'
+_SOUND_MAGIC = b'MES1'
+# magic, 源文件 mtime_ns, 源文件大小, 宽, 高
+_IMAGE_HEADER = struct.Struct('<4sqqII')
+# magic, 源文件 mtime_ns, 源文件大小, 采样率, 采样格式, 声道数
+_SOUND_HEADER = struct.Struct('<4sqqiii')
+
+
+class AssetCache:
+    """
+    解码结果的磁盘缓存（可在多个线程中同时使用）
+    """
+    def __init__(self, cache_dir):
+        """
+        :param cache_dir: 缓存目录，不存在时自动创建
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _cache_path(self, source_path, ext):
+        name = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:24]
+        return os.path.join(self.cache_dir, name + ext)
+
+    @staticmethod
+    def _stamp(source_path):
+        stat = os.stat(source_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _read(self, path, header):
+        """读取缓存文件，返回 (文件头字段, 数据) 或 None"""
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+        except OSError:
+            return None
+        if len(blob) < header.size:
+            return None
+        return header.unpack_from(blob), memoryview(blob)[header.size:]
+
+    def _write(self, path, header_bytes, data):
+        """先写临时文件再替换，避免写到一半的缓存被读到"""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(header_bytes)
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning('assets', "Failed to write asset cache %s: %s", path, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # 图片
+    # ------------------------------------------------------------------
+    def load_image(self, source_path):
+        """
+        读取缓存的 RGBA 像素
+        :return: 未 convert 的 Surface；缓存不存在或已过期时返回 None
+        """
+        entry = self._read(self._cache_path(source_path, '.rgba'), _IMAGE_HEADER)
+        if entry is not None:
+            (magic, mtime, size, w, h), data = entry
+            if magic == _IMAGE_MAGIC and (mtime, size) == self._stamp(source_path) and len(data) == w * h * 4:
+                self._count(True)
+                return pygame.image.frombytes(bytes(data), (w, h), 'RGBA')
+        self._count(False)
+        return None
+
+    def save_image(self, source_path, surface):
+        """保存解码后的像素 (带 colorkey 的图片转换成 RGBA 会丢失透明信息，不缓存)"""
+        if surface.get_colorkey() is not None:
+            return
+        mtime, size = self._stamp(source_path)
+        w, h = surface.get_size()
+        header = _IMAGE_HEADER.pack(_IMAGE_MAGIC, mtime, size, w, h)
+        self._write(self._cache_path(source_path, '.rgba'), header, pygame.image.tobytes(surface, 'RGBA'))
+
+    # ------------------------------------------------------------------
+    # 音频
+    # ------------------------------------------------------------------
+    def load_sound(self, source_path, mixer_format):
+        """
+        读取缓存的 PCM 数据
+        :param mixer_format: pygame.mixer.get_init() 的返回值，与缓存时不同则视为过期
+        :return: pygame.mixer.Sound 或 None
+        """
+        entry = self._read(self._cache_path(source_path, '.pcm'), _SOUND_HEADER)
+        if entry is not None:
+            (magic, mtime, size, freq, fmt, channels), data = entry
+            if (magic == _SOUND_MAGIC and (mtime, size) == self._stamp(source_path)
+                    and (freq, fmt, channels) == tuple(mixer_format)):
+                self._count(True)
+                return pygame.mixer.Sound(buffer=bytes(data))
+        self._count(False)
+        return None
+
+    def save_sound(self, source_path, sound, mixer_format):
+        """保存解码后的 PCM 数据 (格式与当前 mixer 一致)"""
+        mtime, size = self._stamp(source_path)
+        freq, fmt, channels = mixer_format
+        header = _SOUND_HEADER.pack(_SOUND_MAGIC, mtime, size, freq, fmt, channels)
+        self._write(self._cache_path(source_path, '.pcm'), header, sound.get_raw())
+
+
+class ImageStore:
+    """
+    按字节预算淘汰的图片仓库 (只在主线程使用)
+    超出预算时从最久未使用的图片开始淘汰，固定的图片和刚放入的图片不会被淘汰
+    """
+    def __init__(self, budget_bytes, on_evict=None):
+        """
+        :param budget_bytes: 常驻图片的总字节预算
+        :param on_evict: 淘汰图片后的回调 on_evict(key, surface)，用于释放其他地方对这张图片的引用
+        """
+        self.budget_bytes = budget_bytes
+        self.on_evict = on_evict
+        self.bytes = 0
+        self.pinned = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (Surface, 字节数)
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self):
+        return list(self._entries)
+
+    def surfaces(self):
+        return [surface for surface, _ in self._entries.values()]
+
+    def get(self, key):
+        """取出图片并标记为最近使用，不存在返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, surface):
+        """放入图片 (同名覆盖)，必要时淘汰旧图片"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        size = self.surface_bytes(surface)
+        self._entries[key] = (surface, size)
+        self.bytes += size
+        self._evict()
+
+    def remove(self, key):
+        """移除图片 (不算淘汰，不触发回调)，返回被移除的 Surface，不存在返回 None"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[1]
+        return entry[0]
+
+    def pin(self, key):
+        """固定图片，使其不会被淘汰 (图片可以稍后才放入)"""
+        self.pinned.add(key)
+
+    def unpin(self, key):
+        self.pinned.discard(key)
+        self._evict()
+
+    def _evict(self):
+        if self.bytes <= self.budget_bytes:
+            return
+        newest = next(reversed(self._entries))
+        for key in list(self._entries):
+            if self.bytes <= self.budget_bytes:
+                break
+            if key in self.pinned or key == newest:
+                continue
+            surface, size = self._entries.pop(key)
+            self.bytes -= size
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(key, surface)
+
+
+class TransformCache:
+    """
+    进程内共享的变换结果缓存 (只在主线程使用)
+    Key = (源 Surface, 尺寸, 角度, 水平翻转, 垂直翻转, 平滑缩放, 透明度)，源 Surface 按对象身份比较
+    [优化] 同一张图 (如同类敌人的同一帧) 的同一种变换全进程只计算一次
+    注意：返回的 Surface 是共享的，调用方不能再修改它 (需要透明度时通过 alpha 参数一起缓存)
+    """
+    def __init__(self, budget_bytes):
+        """
+        :param budget_bytes: 缓存结果的总字节预算，超出后淘汰最久未使用的结果
+        """
+        self.store = ImageStore(budget_bytes)
+
+    @property
+    def hits(self):
+        return self.store.hits
+
+    @property
+    def misses(self):
+        return self.store.misses
+
+    @property
+    def bytes(self):
+        return self.store.bytes
+
+    def __len__(self):
+        return len(self.store)
+
+    def get(self, surface, size=None, angle=0, flip_x=False, flip_y=False, smooth=False, alpha=None):
+        """
+        获取变换结果 (缓存未命中时现场计算)，顺序为 缩放 -> 翻转 -> 旋转 -> 设置透明度
+        :param size: 目标尺寸，None 表示不缩放
+        :param angle: 逆时针旋转角度（度）
+        :param smooth: 使用 smoothscale
+        :param alpha: 整体透明度，None 表示不设置
+        """
+        if size == surface.get_size():
+            size = None
+        angle %= 360
+        if size is None and not angle and not flip_x and not flip_y and alpha is None:
+            return surface
+        key = (surface, size, angle, flip_x, flip_y, smooth, alpha)
+        result = self.store.get(key)
+        if result is not None:
+            return result
+
+        result = surface
+        if size is not None:
+            result = pygame.transform.smoothscale(result, size) if smooth else pygame.transform.scale(result, size)
+        if flip_x or flip_y:
+            result = pygame.transform.flip(result, flip_x, flip_y)
+        if angle:
+            result = pygame.transform.rotate(result, angle)
+        if alpha is not None:
+            if result is surface:
+                result = surface.copy()
+            result.set_alpha(alpha)
+        self.store.put(key, result)
+        return result
+
+    def scale(self, surface, size, smooth=False, alpha=None):
+        return self.get(surface, tuple(size), smooth=smooth, alpha=alpha)
+
+    def scale_by(self, surface, factor, smooth=False):
+        """按倍率缩放 (尺寸向下取整，与 int(w * factor) 一致)"""
+        if factor == 1.0:
+            return surface
+        w, h = surface.get_size()
+        return self.get(surface, (int(w * factor), int(h * factor)), smooth=smooth)
+
+    def rotate(self, surface, angle):
+        return self.get(surface, angle=angle)
+
+    def flip(self, surface, flip_x, flip_y=False):
+        return self.get(surface, flip_x=flip_x, flip_y=flip_y)
+
+    def silhouette(self, surface, color):
+        """
+        纯色剪影 (不透明像素填成 color，其余透明)，用于受击闪光
+        [优化] 每个 (帧, 颜色) 只生成一次 mask，不再每次受击都重新计算
+        """
+        key = ('silhouette', surface, color)
+        result = self.store.get(key)
+        if result is None:
+            result = pygame.mask.from_surface(surface).to_surface(setcolor=color, unsetcolor=(0, 0, 0, 0))
+            self.store.put(key, result)
+        return result
+
+    def discard(self, surfaces):
+        """
+        丢弃以这些图片为源的变换结果 (连同以这些结果为源的剪影等)
+        来源图片被仓库淘汰后调用，否则缓存的 Key 会一直引用旧图片，淘汰释放不了内存
+        :return: 丢弃的数量
+        """
+        doomed = set(surfaces)
+        removed = 0
+        changed = bool(doomed)
+        while changed:
+            changed = False
+            for key in self.store.keys():
+                source = key[1] if key[0] == 'silhouette' else key[0]
+                if source in doomed:
+                    doomed.add(self.store.remove(key))
+                    removed += 1
+                    changed = True
+        return removed
+
+    def warm_up(self, surfaces, factor):
+        """
+        预先按倍率缩放一组图片 (如一张序列帧的所有帧)
+        :return: 新计算的数量
+        """
+        misses = self.store.misses
+        for surface in surfaces:
+            self.scale_by(surface, factor)
+        return self.store.misses - misses
+
+    def clear(self):
+        self.store = ImageStore(self.store.budget_bytes)
+
+
+# 全局共享的变换缓存
+TRANSFORMS = TransformCache(TRANSFORM_CACHE_BUDGET_MB * 1024 * 1024)
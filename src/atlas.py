@@ -0,0 +1,289 @@
+"""
+纹理图集
+1. build_atlas：离线构建步骤。按切帧参数把序列帧大图切开，裁掉每帧的透明边后装箱到少量图集页，
+   输出图集页 PNG 和元数据 (每帧所在的矩形和锚点偏移)
+   用法：python -m src.atlas [--out assets/atlas] [--page-size 1024]
+   素材或切帧参数改动后需要重新构建，过期的条目在运行时会被忽略 (回退到从大图切帧)
+2. TextureAtlas：运行时读取元数据，ResourceManager 据此从图集页中直接取出裁剪后的帧
+"""
+import os
+import json
+import hashlib
+import argparse
+import pygame
+from src.settings import *
+from src.vfx import slice_frames, FrameStrip
+from src.logger import log
+
+ATLAS_VERSION = 2
+ATLAS_META_FILE = 'atlas.json'
+
+
+def sheet_spec(data):
+    """切帧参数 (与 AnimationPlayer 读取的字段一致)，用于判断图集条目是否可用"""
+    return {
+        'frames': data.get('frames', 1),
+        'frame_width': data.get('frame_width', 0),
+        'spacing': data.get('spacing', 0),
+        'margin': data.get('margin', 0),
+    }
+
+
+def file_digest(path):
+    """源文件内容的 SHA-1 (同样大小的修改也能发现)"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def source_fresh(path, entry):
+    """
+    图集条目对应的源文件是否没有变化
+    大小不同一定过期；修改时间相同视为没变；修改时间不同 (重新导出、git 检出等) 时比较内容摘要
+    """
+    try:
+        stat = os.stat(path)
+        if stat.st_size != entry['source_bytes']:
+            return False
+        if stat.st_mtime_ns == entry['source_mtime']:
+            return True
+        return file_digest(path) == entry['source_sha1']
+    except (OSError, KeyError):
+        return False
+
+
+def trim_rect(frame):
+    """帧中不透明像素的包围盒；全透明的帧保留左上角 1x1，保证每帧都有图像"""
+    rect = frame.get_bounding_rect(min_alpha=1)
+    if rect.width == 0 or rect.height == 0:
+        return pygame.Rect(0, 0, 1, 1)
+    return rect
+
+
+class ShelfPacker:
+    """
+    货架式装箱：从左到右摆放，放不下时另起一行，行高取该行最高的矩形
+    """
+    def __init__(self, size, padding=ATLAS_PADDING):
+        self.size = size
+        self.padding = padding
+        self.x = 0
+        self.y = 0
+        self.shelf_h = 0
+        self.used_w = 0
+        self.used_h = 0
+
+    def _state(self):
+        return self.x, self.y, self.shelf_h, self.used_w, self.used_h
+
+    def place(self, w, h):
+        """放入一个 w x h 的矩形，返回左上角坐标；页面放不下返回 None"""
+        if self.x + w > self.size:
+            self.x = 0
+            self.y += self.shelf_h + self.padding
+            self.shelf_h = 0
+        if w > self.size or self.y + h > self.size:
+            return None
+        pos = (self.x, self.y)
+        self.x += w + self.padding
+        self.shelf_h = max(self.shelf_h, h)
+        self.used_w = max(self.used_w, pos[0] + w)
+        self.used_h = max(self.used_h, pos[1] + h)
+        return pos
+
+    def place_all(self, sizes):
+        """
+        整组放入 (同一张序列帧的所有帧放在同一页)，放不下时恢复原状
+        :return: 坐标列表或 None
+        """
+        saved = self._state()
+        positions = []
+        for w, h in sizes:
+            pos = self.place(w, h)
+            if pos is None:
+                self.x, self.y, self.shelf_h, self.used_w, self.used_h = saved
+                return None
+            positions.append(pos)
+        return positions
+
+
+def build_atlas(sheets, out_dir, assets_path, page_size=ATLAS_PAGE_SIZE, padding=ATLAS_PADDING):
+    """
+    切帧、裁剪并装箱，写出图集页和元数据
+    :param sheets: [(key, 源文件路径, 切帧参数), ...]，按顺序装箱 (常驻的放前面，尽量集中在同一页)
+    :param out_dir: 输出目录，旧的图集页会被覆盖
+    :param assets_path: assets 目录，元数据中的源文件路径相对于它记录
+    :return: 元数据 dict
+    """
+    # 1. 切帧并计算每帧的裁剪矩形
+    entries = []
+    for key, path, spec in sheets:
+        sheet = pygame.image.load(path)
+        frames = slice_frames(sheet, spec['frames'], spec['frame_width'], spec['spacing'], spec['margin'])
+        rects = [trim_rect(frame) for frame in frames]
+        entries.append((key, path, spec, frames, rects))
+
+    # 2. 装箱：每张序列帧整组放进同一页，帧按高度从高到低摆放以减少行内空隙
+    packers = []
+    placements = []
+    for key, path, spec, frames, rects in entries:
+        order = sorted(range(len(rects)), key=lambda i: -rects[i].height)
+        sizes = [rects[i].size for i in order]
+        for page_index, packer in enumerate(packers):
+            positions = packer.place_all(sizes)
+            if positions is not None:
+                break
+        else:
+            packers.append(ShelfPacker(page_size, padding))
+            page_index = len(packers) - 1
+            positions = packers[-1].place_all(sizes)
+            if positions is None:
+                raise ValueError(f"Sheet '{key}' does not fit on a {page_size}x{page_size} atlas page")
+        slots = [None] * len(rects)
+        for i, pos in zip(order, positions):
+            slots[i] = pos
+        placements.append((page_index, slots))
+
+    # 3. 合成图集页 (只保留用到的区域)，帧像素原样拷贝
+    pages = [pygame.Surface((max(p.used_w, 1), max(p.used_h, 1)), pygame.SRCALPHA, 32) for p in packers]
+    meta = {'version': ATLAS_VERSION, 'page_size': page_size, 'pages': [], 'sheets': {}}
+    for (key, path, spec, frames, rects), (page_index, slots) in zip(entries, placements):
+        frame_meta = []
+        for frame, rect, (x, y) in zip(frames, rects, slots):
+            pages[page_index].blit(frame, (x, y), rect, special_flags=pygame.BLEND_RGBA_MAX)
+            frame_meta.append([x, y, rect.width, rect.height, rect.x, rect.y])
+        meta['sheets'][key] = {
+            'source': os.path.relpath(path, assets_path).replace(os.sep, '/'),
+            'source_bytes': os.path.getsize(path),
+            'source_mtime': os.stat(path).st_mtime_ns,
+            'source_sha1': file_digest(path),
+            'spec': spec,
+            'frame_size': list(frames[0].get_size()),
+            'page': page_index,
+            'frames': frame_meta,  # [页内 x, 页内 y, 宽, 高, 锚点偏移 x, 锚点偏移 y]
+        }
+
+    os.makedirs(out_dir, exist_ok=True)
+    for index, page in enumerate(pages):
+        name = f'atlas_{index}.png'
+        pygame.image.save(page, os.path.join(out_dir, name))
+        meta['pages'].append(name)
+    with open(os.path.join(out_dir, ATLAS_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    return meta
+
+
+def collect_sheets(res):
+    """
+    需要打包的序列帧：ATLAS_SHEETS 中的固定条目，加上 enemies.json 中的敌人 (按 tier 排序)
+    :param res: 已建立图片索引并加载 JSON 的 ResourceManager
+    :return: [(key, 源文件路径, 切帧参数), ...]
+    """
+    wanted = {key: sheet_spec(data) for key, data in ATLAS_SHEETS.items()}
+    enemies = sorted(res.data['enemies'].values(), key=lambda d: (d.get('tier', 1), d['id']))
+    for data in enemies:
+        key = data.get('image', '').lower()
+        spec = sheet_spec(data.get('data', {}))
+        if key in wanted:
+            if wanted[key] != spec:
+                log.warning('atlas', "Conflicting frame data for '%s', keeping the first one.", key)
+            continue
+        wanted[key] = spec
+
+    sheets = []
+    for key, spec in wanted.items():
+        if key not in res.image_index:
+            log.warning('atlas', "Atlas sheet '%s' not found in graphics, skipped.", key)
+            continue
+        sheets.append((key, res.image_index[key], spec))
+    return sheets
+
+
+class TextureAtlas:
+    """
+    运行时图集元数据
+    """
+    PAGE_KEY = 'atlas_page_{}'
+
+    def __init__(self, atlas_dir, meta):
+        self.atlas_dir = atlas_dir
+        self.pages = meta['pages']
+        self.sheets = meta['sheets']
+
+    @classmethod
+    def load(cls, atlas_dir, assets_path):
+        """
+        读取元数据，丢弃源文件已变化的条目
+        :return: TextureAtlas，没有构建过图集或版本不符时返回 None
+        """
+        path = os.path.join(atlas_dir, ATLAS_META_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            log.error('atlas', "Failed to read atlas %s: %s", path, e)
+            return None
+        if meta.get('version') != ATLAS_VERSION:
+            log.warning('atlas', "Atlas %s is out of date, run: python -m src.atlas", path)
+            return None
+
+        for key, entry in list(meta['sheets'].items()):
+            if not source_fresh(os.path.join(assets_path, entry['source']), entry):
+                log.warning('atlas', "Atlas entry '%s' is stale, run: python -m src.atlas", key)
+                del meta['sheets'][key]
+        return cls(atlas_dir, meta)
+
+    def __contains__(self, key):
+        return key in self.sheets
+
+    def matches(self, key, spec):
+        """图集中有该图，且切帧参数与使用处一致"""
+        entry = self.sheets.get(key)
+        return entry is not None and entry['spec'] == spec
+
+    def page_keys(self):
+        """[(图片 Key, 图集页路径), ...]，图集页像普通图片一样由 ResourceManager 加载"""
+        return [(self.PAGE_KEY.format(i), os.path.join(self.atlas_dir, name)) for i, name in enumerate(self.pages)]
+
+    def page_key(self, key):
+        """序列帧所在图集页的图片 Key"""
+        return self.PAGE_KEY.format(self.sheets[key]['page'])
+
+    def strip(self, key, page):
+        """
+        从图集页上取出一张序列帧的全部帧 (subsurface，共享像素)
+        :param page: 该序列帧所在的图集页 Surface
+        """
+        entry = self.sheets[key]
+        frames = []
+        offsets = []
+        for x, y, w, h, ox, oy in entry['frames']:
+            frames.append(page.subsurface((x, y, w, h)))
+            offsets.append((ox, oy))
+        return FrameStrip(frames, offsets, tuple(entry['frame_size']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='构建纹理图集 (裁掉透明边并装箱)')
+    parser.add_argument('--out', default=ATLAS_DIR, help='输出目录 (相对项目根目录)')
+    parser.add_argument('--page-size', type=int, default=ATLAS_PAGE_SIZE, help='图集页边长（像素）')
+    parser.add_argument('--padding', type=int, default=ATLAS_PADDING, help='帧之间的间隔（像素）')
+    args = parser.parse_args()
+
+    from src.loader import ResourceManager  # 局部导入防循环
+    res = ResourceManager(cache_dir=None, atlas_dir=None)
+    res.load_index()
+    sheets = collect_sheets(res)
+    out_dir = os.path.join(res.base_path, args.out)
+    meta = build_atlas(sheets, out_dir, res.assets_path, args.page_size, args.padding)
+
+    # 裁剪前后每帧需要绘制的像素总数
+    padded_px = sum(e['frame_size'][0] * e['frame_size'][1] * len(e['frames']) for e in meta['sheets'].values())
+    frame_px = sum(f[2] * f[3] for e in meta['sheets'].values() for f in e['frames'])
+    print(f"Packed {len(meta['sheets'])} sheets into {len(meta['pages'])} page(s) at {out_dir}")
+    print(f"Frame pixels: {padded_px} -> {frame_px} ({frame_px / max(padded_px, 1):.0%})")
+
+
+if __name__ == '__main__':
+    main()
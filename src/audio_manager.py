@@ -1,4 +1,5 @@
 import pygame
+from src.logger import log
 
 class AudioManager:
     """管理背景音乐和音效播放"""
@@ -29,9 +30,9 @@ class AudioManager:
                 pygame.mixer.music.set_volume(volume)
                 pygame.mixer.music.play(loops)
                 self.current_bgm = bgm_path
-                print(f"[AUDIO] Playing BGM: {bgm_key} at volume {volume}")
+                log.info('audio', "Playing BGM: %s at volume %s", bgm_key, volume)
             except Exception as e:
-                print(f"[ERROR] Failed to play BGM {bgm_key}: {e}")
+                log.error('audio', "Failed to play BGM %s: %s", bgm_key, e)
     
     def stop_bgm(self):
         """停止背景音乐"""
@@ -52,9 +53,9 @@ class AudioManager:
             try:
                 sound.set_volume(volume)
                 sound.play()
-                print(f"[AUDIO] Playing SFX: {sfx_key} at volume {volume}")
+                log.debug('audio', "Playing SFX: %s at volume %s", sfx_key, volume)
             except Exception as e:
-                print(f"[ERROR] Failed to play SFX {sfx_key}: {e}")
+                log.error('audio', "Failed to play SFX %s: %s", sfx_key, e)
     
     def update_music_for_state(self, state):
         """
@@ -91,12 +92,12 @@ class AudioManager:
             # 静音：停止所有音频
             pygame.mixer.music.stop()
             pygame.mixer.stop()  # 停止所有音效
-            print("[AUDIO] Muted")
+            log.info('audio', "Muted")
         else:
             # 取消静音：清除 current_bgm 标记，让 update_music_for_state 重新播放
             # 这样可以在下次状态更新时自动恢复正确的音乐
             self.current_bgm = None
-            print("[AUDIO] Unmuted")
+            log.info('audio', "Unmuted")
         return self.is_muted
     
     def reset(self):
@@ -1,12 +1,22 @@
 import pygame
+import time
+import heapq
 from src.settings import *
 from src.vfx import AnimationPlayer
+from src.spatial import SpatialGrid
+from src.asset_cache import TRANSFORMS
+from src.sim_clock import SIM_CLOCK
 
 class GameSprite(pygame.sprite.Sprite):
     """
     基础精灵类。
     所有能画在屏幕上的东西都继承它。
     """
+    static = False  # 静态精灵 (位置不再变化) 由渲染组按网格索引剔除
+    image_offset = (0, 0)  # 图像相对 rect 左上角的绘制偏移 (图集帧裁掉了透明边时非 0)
+    flash_until = 0  # 受击闪光结束的模拟时间 (毫秒)，之前由渲染组在图像上叠加白色剪影
+    lod = 0  # 细节档位 (敌人由 SwarmSystem 每步设置)，非 0 表示在镜头外，跳过动画和阴影跟随
+
     def __init__(self, groups, pos, z_layer):
         super().__init__(groups)
         # 默认创建一个方块作为占位图 (如果有子类加载了图片，会覆盖这个)
@@ -18,6 +28,13 @@ class GameSprite(pygame.sprite.Sprite):
         # 物理碰撞箱 (通常比渲染图稍小，手感更好)
         self.hitbox = self.rect.inflate(0, -10) 
 
+    def flash(self, duration):
+        """
+        受击闪光 (秒)
+        [优化] 只记录结束时间，不再为每次受击创建特效精灵和 mask
+        """
+        self.flash_until = SIM_CLOCK.ticks + duration * 1000
+
 class Entity(GameSprite):
     """
     实体类。
@@ -28,9 +45,24 @@ class Entity(GameSprite):
         self.direction = pygame.math.Vector2() # 移动方向 (x, y)
         self.speed = 0                         # 移动速度
         self.obstacle_sprites = None           # 障碍物组 (用于碰撞检测)
+        self.obstacle_grid = None              # 障碍物占用网格 (有则优先使用)
+        self.spatial_grid = None               # 所属空间网格 (用于武器广相位查询)
 
-    def set_obstacles(self, obstacle_sprites):
+    def set_obstacles(self, obstacle_sprites, obstacle_grid=None):
         self.obstacle_sprites = obstacle_sprites
+        self.obstacle_grid = obstacle_grid
+
+    def set_spatial_grid(self, spatial_grid):
+        """注册到空间网格，之后每次 move 都会增量更新所在网格"""
+        self.spatial_grid = spatial_grid
+        if spatial_grid is not None:
+            spatial_grid.add_sprite(self)
+
+    def kill(self):
+        # 死亡时同步移出空间网格，避免武器查到已移除的精灵
+        if self.spatial_grid is not None:
+            self.spatial_grid.remove_sprite(self)
+        super().kill()
 
     def move(self, dt):
         """
@@ -52,38 +84,47 @@ class Entity(GameSprite):
         # 同步渲染矩形 (rect 跟随 hitbox)
         self.rect.center = self.hitbox.center
 
+        # [优化] 增量更新空间网格 (只有跨格时才会改动网格数据)
+        if self.spatial_grid is not None:
+            self.spatial_grid.update_sprite(self)
+
     def collision(self, direction):
         """
         处理与障碍物的碰撞
         """
-        if not self.obstacle_sprites:
+        if self.obstacle_grid is not None:
+            # [优化] 占用网格：只检查 hitbox 覆盖的几个格子
+            hits = self.obstacle_grid.get_hits(self.hitbox)
+        elif self.obstacle_sprites:
+            # 检测 hitbox 与 obstacle_sprites 的碰撞
+            hits = [obstacle.hitbox for obstacle in self.obstacle_sprites 
+                    if self.hitbox.colliderect(obstacle.hitbox)]
+        else:
             return
-
-        # 检测 hitbox 与 obstacle_sprites 的碰撞
-        hits = pygame.sprite.spritecollide(self, self.obstacle_sprites, False, 
-                                           lambda sprite, obstacle: sprite.hitbox.colliderect(obstacle.hitbox))
         
         if hits:
             if direction == 'horizontal':
-                for sprite in hits:
+                for box in hits:
                     # 向右撞
                     if self.direction.x > 0:
-                        self.hitbox.right = sprite.hitbox.left
+                        self.hitbox.right = box.left
                     # 向左撞
                     if self.direction.x < 0:
-                        self.hitbox.left = sprite.hitbox.right
+                        self.hitbox.left = box.right
             
             if direction == 'vertical':
-                for sprite in hits:
+                for box in hits:
                     # 向下撞
                     if self.direction.y > 0:
-                        self.hitbox.bottom = sprite.hitbox.top
+                        self.hitbox.bottom = box.top
                     # 向上撞
                     if self.direction.y < 0:
-                        self.hitbox.top = sprite.hitbox.bottom
+                        self.hitbox.top = box.bottom
 
 class Shadow(pygame.sprite.Sprite):
     """通用阴影类"""
+    image_offset = (0, 0)
+
     def __init__(self, target_sprite, groups, shadow_surf):
         # 阴影放在 vfx_bottom 层 (地板之上，物体之下)
         super().__init__(groups)
@@ -91,6 +132,8 @@ class Shadow(pygame.sprite.Sprite):
         self.image = shadow_surf
         self.rect = self.image.get_rect()
         self.z_layer = LAYERS['vfx_bottom']
+        # 跟随静态物体 (树) 的阴影也是静态的
+        self.static = getattr(target_sprite, 'static', False)
         # [修复] 添加 hitbox 防止 collision 检测报错
         self.hitbox = self.rect 
         
@@ -106,7 +149,8 @@ class Shadow(pygame.sprite.Sprite):
     def update(self, dt):
         if not self.target.alive():
             self.kill()
-        else:
+        elif not self.target.lod:
+            # [优化] 目标在镜头外时阴影不跟随，回到镜头附近的那一步再对齐
             self._update_pos()
 
 class Tile(GameSprite):
@@ -114,6 +158,8 @@ class Tile(GameSprite):
     地图图块类 (墙壁、地板、装饰物)
     支持：高墙逻辑 (Hitbox只在底部)、自动生成阴影
     """
+    static = True
+
     def __init__(self, pos, groups, sprite_type, surface, 
                  shadow_surf=None, scale_to_width=None):
         super().__init__(groups, pos, z_layer=LAYERS['ground'])
@@ -126,7 +172,8 @@ class Tile(GameSprite):
                 orig_w, orig_h = surface.get_size()
                 scale_factor = scale_to_width / orig_w
                 new_h = int(orig_h * scale_factor)
-                self.image = pygame.transform.smoothscale(surface, (scale_to_width, new_h))
+                # [优化] 同一素材的墙共用一张缩放结果
+                self.image = TRANSFORMS.scale(surface, (scale_to_width, new_h), smooth=True)
             else:
                 self.image = surface
         else:
@@ -180,7 +227,7 @@ class AnimatedTile(Tile):
         # 初始化父类，先不传 image
         super().__init__(pos, groups, sprite_type, surface=None)
         
-        # 使用通用动画播放器
+        # 使用通用动画播放器 (surface 可以是序列帧大图，也可以是图集中裁剪过的 FrameStrip)
         # frame_data 格式: {'frames': 16, 'frame_width': 192, 'speed': 10}
         self.anim_player = AnimationPlayer(surface, frame_data, default_speed=frame_data.get('speed', 8))
         self.visual_scale = visual_scale
@@ -188,12 +235,14 @@ class AnimatedTile(Tile):
         
         # 初始化第一帧 (dt=0)
         self.image = self.anim_player.get_frame_image(0, loop=True, scale=self.visual_scale)
+        self.image_offset = self.anim_player.get_frame_offset(self.visual_scale)
         # 3. 设置 Hitbox (物理真理)
         # 判定箱严格位于网格坐标 pos，大小为 TILE_SIZE
         self.hitbox = pygame.Rect(pos[0], pos[1], TILE_SIZE, TILE_SIZE).inflate(-10,-10)
 
         # 4. 设置 Image Rect (视觉对齐)
-        self.rect = self.image.get_rect()
+        # 按原始帧尺寸定位，图集帧裁掉的透明边由 image_offset 补偿
+        self.rect = self.anim_player.get_frame_rect(self.visual_scale)
         
         if sprite_type == 'tree':
             self.z_layer = LAYERS['vfx_top']  # 树放在顶层，实现完全遮挡
@@ -205,7 +254,8 @@ class AnimatedTile(Tile):
 
         else:
             # 默认逻辑 (居中)
-            self.rect = self.image.get_rect(center=(pos[0] + TILE_SIZE//2, pos[1] + TILE_SIZE//2))
+            self.rect = self.anim_player.get_frame_rect(self.visual_scale,
+                                                        center=(pos[0] + TILE_SIZE//2, pos[1] + TILE_SIZE//2))
             self.z_layer = LAYERS['ground']
             self.hitbox = self.rect
 
@@ -216,7 +266,8 @@ class AnimatedTile(Tile):
         
         # 更新图像
         self.image = self.anim_player.get_frame_image(dt, loop=True, scale=self.visual_scale)
-        self.rect = self.image.get_rect()
+        self.image_offset = self.anim_player.get_frame_offset(self.visual_scale)
+        self.rect = self.anim_player.get_frame_rect(self.visual_scale)
         
         # 恢复位置
         if self.sprite_type == 'tree':
@@ -224,15 +275,95 @@ class AnimatedTile(Tile):
         else:
             self.rect.center = old_center
 
+class GroundLayer:
+    """
+    预烘焙的地面层 (地板 + 装饰物)
+    地面是静态的，所以在生成地图时一次性合成到若干张大块 Surface 上，
+    渲染时只绘制与摄像机相交的块，代替数千个 Tile 精灵
+    """
+    def __init__(self, width, height, chunk_size=GROUND_CHUNK_SIZE, fill_color=COLORS['bg_void']):
+        """
+        :param width, height: 地面层覆盖的世界像素范围 (从 (0, 0) 开始)
+        :param chunk_size: 单个块的边长 (像素)
+        """
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.cols = (width + chunk_size - 1) // chunk_size
+        self.rows = (height + chunk_size - 1) // chunk_size
+        
+        # {(col, row): Surface}，边缘的块按剩余尺寸裁小
+        # 地板铺满整个区域，所以块使用不带 alpha 的 Surface，blit 更快
+        self.chunks = {}
+        for col in range(self.cols):
+            for row in range(self.rows):
+                w = min(chunk_size, width - col * chunk_size)
+                h = min(chunk_size, height - row * chunk_size)
+                chunk = pygame.Surface((w, h)).convert()
+                chunk.fill(fill_color)
+                self.chunks[(col, row)] = chunk
+
+    def blit(self, surface, pos):
+        """烘焙阶段：把一张图绘制到它覆盖的所有块上 (pos 为世界坐标左上角)"""
+        x, y = pos
+        w, h = surface.get_size()
+        size = self.chunk_size
+        first_col = max(0, x // size)
+        last_col = min(self.cols - 1, (x + w - 1) // size)
+        first_row = max(0, y // size)
+        last_row = min(self.rows - 1, (y + h - 1) // size)
+        for col in range(first_col, last_col + 1):
+            for row in range(first_row, last_row + 1):
+                self.chunks[(col, row)].blit(surface, (x - col * size, y - row * size))
+
+    def draw(self, display_surface, offset):
+        """只绘制与屏幕相交的块，返回绘制的块数"""
+        size = self.chunk_size
+        screen_w, screen_h = display_surface.get_size()
+        first_col = max(0, int(offset.x // size))
+        last_col = min(self.cols - 1, int((offset.x + screen_w) // size))
+        first_row = max(0, int(offset.y // size))
+        last_row = min(self.rows - 1, int((offset.y + screen_h) // size))
+        
+        drawn = 0
+        for col in range(first_col, last_col + 1):
+            for row in range(first_row, last_row + 1):
+                display_surface.blit(self.chunks[(col, row)], 
+                                     (col * size - offset.x, row * size - offset.y))
+                drawn += 1
+        return drawn
+
 class YSortCameraGroup(pygame.sprite.Group):
     """
     自定义渲染组：
     1. 摄像机跟随 (Camera Follow)
     2. Y轴排序 (Y-Sort)
-    [优化] 单次遍历分组 + 全层级视锥剔除
+    [优化] 增量渲染队列：精灵加入/移除时维护分层成员，绘制时不再逐帧分组；
+           静态精灵 (墙、树、树影) 按网格索引剔除，动态精灵与预先算好的视口矩形比较；
+           main 层列表跨帧保留，Y 顺序每帧变化很小，Timsort 对近乎有序的列表接近线性
+    [优化] 渲染插值：逻辑按固定步长推进，每步开始前 (begin_step) 记下动态精灵的位置，
+           绘制时按 alpha (累积器中剩余的时间 / 步长) 在上一步和当前步之间插值，渲染帧率与逻辑步长解耦
     """
     def __init__(self):
+        # 渲染队列 (需在 super().__init__ 之前就绪)
+        self._pending = {}  # 新加入、尚未归层的精灵 (z_layer 可能在加入组之后才设置)
+        self._layer_of = {}  # {sprite: (层级, 是否静态)}
+        self._static = {}  # {层级: SpatialGrid}，静态精灵按中心点登记
+        self._static_extent = {}  # {层级: (最大宽, 最大高)}，查询时据此扩大视口
+        self._order = {}  # {sprite: 加入顺序}，与 pygame 组内的遍历顺序一致，用于同层排序与 Y 相同时的先后
+        self._order_count = 0
+        self._dynamic = {}  # {层级: {sprite: None}}，非 main 层的动态精灵 (dict 保持加入顺序)
+        self._main = []  # main 层动态精灵，跨帧保留并保持大致按 Y 排序
+        self._in_main = set()
+        self._main_removed = False
+        self._prev_pos = {}  # {sprite: 上一步结束时 rect 左上角}，只记录动态精灵
+        self.alpha = 1.0  # 渲染插值系数，由 Game.draw 设置；1 表示直接画当前位置
+        for layer in (LAYERS['ground'], LAYERS['vfx_bottom'], LAYERS['main'], LAYERS['vfx_top']):
+            self._static[layer] = SpatialGrid(cell_size=RENDER_CELL_SIZE)
+            self._static_extent[layer] = (0, 0)
+            self._dynamic[layer] = {}
         super().__init__()
+
         self.display_surface = pygame.display.get_surface()
         self.half_width = self.display_surface.get_size()[0] // 2
         self.half_height = self.display_surface.get_size()[1] // 2
@@ -240,82 +371,193 @@ class YSortCameraGroup(pygame.sprite.Group):
         
         # [优化] 视锥剔除边界（考虑精灵可能比 TILE_SIZE 大）
         self.cull_margin = TILE_SIZE * 4  # 扩大边界以包含大型精灵
-
-    def _is_visible(self, offset_pos, sprite):
-        """检查精灵是否在可见区域内"""
-        # 修复：检查精灵矩形是否与屏幕矩形相交
-        # 使用精灵实际大小来判断，考虑精灵可能部分在屏幕外但仍可见
-        sprite_w = sprite.rect.width
-        sprite_h = sprite.rect.height
-        
-        # 精灵的屏幕矩形
-        sprite_rect = pygame.Rect(offset_pos[0], offset_pos[1], sprite_w, sprite_h)
-        # 屏幕矩形（加上边距）
-        screen_rect = pygame.Rect(-self.cull_margin, -self.cull_margin, 
-                                  WINDOW_WIDTH + 2 * self.cull_margin, 
-                                  WINDOW_HEIGHT + 2 * self.cull_margin)
+        # [优化] 视口矩形 (世界坐标) 只创建一次，每帧移动位置
+        self.view_rect = pygame.Rect(0, 0, self.display_surface.get_width() + 2 * self.cull_margin,
+                                     self.display_surface.get_height() + 2 * self.cull_margin)
         
-        return sprite_rect.colliderect(screen_rect)
+        # [优化] 预烘焙的地面层 (由 MapManager 生成地图时设置)
+        self.ground_layer = None
+        # 帧性能分析器 (可为 None)，开启时按精灵类统计 update 耗时
+        self.profiler = None
+
+    def begin_step(self):
+        """模拟步开始前调用：记录动态精灵的当前位置，作为插值的起点"""
+        prev = self._prev_pos
+        prev.clear()
+        for sprite in self._main:
+            prev[sprite] = sprite.rect.topleft
+        for sprites in self._dynamic.values():
+            for sprite in sprites:
+                prev[sprite] = sprite.rect.topleft
+
+    def _interpolated(self, sprite):
+        """
+        本帧的绘制位置 (rect 左上角)
+        在上一步和当前步之间按 alpha 插值；没有记录 (静态精灵、新加入的精灵) 或跳变 (传送、对象池复用) 时取当前位置
+        """
+        rect = sprite.rect
+        prev = self._prev_pos.get(sprite)
+        if prev is None:
+            return rect.x, rect.y
+        dx = rect.x - prev[0]
+        dy = rect.y - prev[1]
+        if (not dx and not dy) or abs(dx) + abs(dy) > INTERP_SNAP_DISTANCE:
+            return rect.x, rect.y
+        alpha = self.alpha
+        return round(prev[0] + dx * alpha), round(prev[1] + dy * alpha)
+
+    def set_ground_layer(self, ground_layer):
+        """设置 (或清除) 预烘焙的地面层"""
+        self.ground_layer = ground_layer
+
+    def update(self, *args, **kwargs):
+        """更新所有精灵；分析器开启时逐个计时并按类名累加"""
+        profiler = self.profiler
+        if profiler is None or not profiler.enabled:
+            super().update(*args, **kwargs)
+            return
+        clock = time.perf_counter
+        for sprite in self.sprites():
+            start = clock()
+            sprite.update(*args, **kwargs)
+            profiler.add_class_cost(type(sprite).__name__, clock() - start)
+
+    # ------------------------------------------------------------------
+    # 渲染队列维护 (pygame 在精灵加入/移除组时调用)
+    # ------------------------------------------------------------------
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self._pending[sprite] = None
+        self._order[sprite] = self._order_count
+        self._order_count += 1
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self._pending.pop(sprite, None)
+        del self._order[sprite]
+        # 对象池复用的精灵重新加入时不能从上一次死亡的位置插值过来
+        self._prev_pos.pop(sprite, None)
+        if sprite in self._in_main:
+            # main 层列表在下次绘制时统一清理
+            self._main_removed = True
+        entry = self._layer_of.pop(sprite, None)
+        if entry is None:
+            return
+        layer, static = entry
+        if static:
+            self._static[layer].remove_sprite(sprite)
+        elif layer in self._dynamic:
+            self._dynamic[layer].pop(sprite, None)
+
+    def _flush_pending(self):
+        """把新加入的精灵归入对应层级 (此时 z_layer 已经确定)"""
+        for sprite in self._pending:
+            layer = getattr(sprite, 'z_layer', None)
+            if layer not in self._dynamic:
+                # 不参与绘制的层级 (与原逻辑一致)
+                self._layer_of[sprite] = (layer, False)
+                continue
+            static = getattr(sprite, 'static', False)
+            self._layer_of[sprite] = (layer, static)
+            if static:
+                self._static[layer].add_sprite(sprite)
+                max_w, max_h = self._static_extent[layer]
+                self._static_extent[layer] = (max(max_w, sprite.rect.width), max(max_h, sprite.rect.height))
+            elif layer == LAYERS['main']:
+                # 对象池回收后又加入的精灵可能还留在列表里
+                if sprite not in self._in_main:
+                    self._main.append(sprite)
+                    self._in_main.add(sprite)
+            else:
+                self._dynamic[layer][sprite] = None
+        self._pending.clear()
+
+    def _visible_static(self, layer):
+        """该层与视口相交的静态精灵 (按加入顺序)"""
+        max_w, max_h = self._static_extent[layer]
+        if not max_w:
+            return []
+        view = self.view_rect
+        query = view.inflate(max_w + 2, max_h + 2)
+        visible = [s for s in self._static[layer].query_rect(query) if s.rect.colliderect(view)]
+        visible.sort(key=self._order.__getitem__)
+        return visible
+
+    def _draw_layer(self, layer, ox, oy):
+        """绘制非 main 层：先静态精灵，再动态精灵"""
+        blit = self.display_surface.blit
+        view = self.view_rect
+        for sprite in self._visible_static(layer):
+            dx, dy = sprite.image_offset
+            blit(sprite.image, (sprite.rect.x + dx - ox, sprite.rect.y + dy - oy))
+        interpolated = self._interpolated
+        for sprite in self._dynamic[layer]:
+            if sprite.rect.colliderect(view):
+                dx, dy = sprite.image_offset
+                x, y = interpolated(sprite)
+                blit(sprite.image, (x + dx - ox, y + dy - oy))
 
     def custom_draw(self, player):
         """
         替代原本的 draw() 方法
-        [优化] 单次遍历所有精灵，按层级分组，统一视锥剔除
+        [优化] 分层成员增量维护，统一用视口矩形剔除
         """
-        # 1. 计算偏移量 (目标是让 player 永远在屏幕中心)
-        self.offset.x = player.rect.centerx - self.half_width
-        self.offset.y = player.rect.centery - self.half_height
-
-        # 2. [优化] 单次遍历，按层级分组
-        ground_sprites = []
-        vfx_bottom_sprites = []
-        main_sprites = []
-        vfx_top_sprites = []
-        
-        for sprite in self.sprites():
-            z = sprite.z_layer
-            if z == LAYERS['ground']:
-                ground_sprites.append(sprite)
-            elif z == LAYERS['vfx_bottom']:
-                vfx_bottom_sprites.append(sprite)
-            elif z == LAYERS['main']:
-                main_sprites.append(sprite)
-            elif z == LAYERS['vfx_top']:
-                vfx_top_sprites.append(sprite)
+        # 1. 计算偏移量 (目标是让 player 永远在屏幕中心，使用插值后的位置)
+        px, py = self._interpolated(player)
+        self.offset.x = px + player.rect.width // 2 - self.half_width
+        self.offset.y = py + player.rect.height // 2 - self.half_height
+        ox, oy = int(self.offset.x), int(self.offset.y)
+        self.view_rect.topleft = (ox - self.cull_margin, oy - self.cull_margin)
+
+        # 2. 新加入的精灵归层
+        if self._pending:
+            self._flush_pending()
 
         # 3. 分层绘制，所有层都应用视锥剔除
         
-        # 3.1 地板层 (Ground) - 修复：确保地板能覆盖整个屏幕
-        # 对于地板层，暂时禁用视锥剔除，确保所有地板都能被绘制
-        # 这样可以避免因为视锥剔除导致背景显示为黑色
-        for sprite in ground_sprites:
-            offset_pos = sprite.rect.topleft - self.offset
-            # 暂时不进行视锥剔除，直接绘制所有地板
-            # 这样可以确保屏幕范围内都有地板显示
-            self.display_surface.blit(sprite.image, offset_pos)
+        # 3.1 地板层 (Ground)
+        # [优化] 地板和装饰物已烘焙到分块 Surface，只绘制与屏幕相交的几块
+        if self.ground_layer is not None:
+            self.ground_layer.draw(self.display_surface, self.offset)
+        # 其余仍是精灵的地面物体照常剔除后绘制
+        self._draw_layer(LAYERS['ground'], ox, oy)
 
         # 3.2 底层特效 (vfx_bottom) - 光环、脚印、阴影
-        for sprite in vfx_bottom_sprites:
-            offset_pos = sprite.rect.topleft - self.offset
-            if self._is_visible(offset_pos, sprite):
-                self.display_surface.blit(sprite.image, offset_pos)
+        self._draw_layer(LAYERS['vfx_bottom'], ox, oy)
 
         # 3.3 主层 (main) - 需要 Y 排序
-        # 只对可见的精灵排序，减少排序开销
-        visible_main = []
-        for sprite in main_sprites:
-            offset_pos = sprite.rect.topleft - self.offset
-            if self._is_visible(offset_pos, sprite):
-                visible_main.append((sprite, offset_pos))
-        
-        # Y 排序
-        visible_main.sort(key=lambda x: x[0].rect.centery)
-        
-        for sprite, offset_pos in visible_main:
-            self.display_surface.blit(sprite.image, offset_pos)
+        main = self._main
+        if self._main_removed:
+            member = (LAYERS['main'], False)
+            layer_of = self._layer_of
+            kept = [s for s in main if layer_of.get(s) == member]
+            if len(kept) != len(main):
+                self._in_main.intersection_update(kept)
+                main[:] = kept
+            self._main_removed = False
+        # 列表跨帧保留，上一帧已基本有序；Y 相同时按加入顺序 (与逐帧稳定排序的结果一致)
+        order = self._order
+        y_key = lambda s: (s.rect.centery, order[s])
+        main.sort(key=y_key)
+        view = self.view_rect
+        visible_main = [s for s in main if s.rect.colliderect(view)]
+        # 静态精灵 (墙) 与动态精灵两路归并
+        static_main = self._visible_static(LAYERS['main'])
+        if static_main:
+            static_main.sort(key=y_key)
+            visible_main = heapq.merge(static_main, visible_main, key=y_key)
+
+        blit = self.display_surface.blit
+        now = SIM_CLOCK.ticks
+        interpolated = self._interpolated
+        for sprite in visible_main:
+            dx, dy = sprite.image_offset
+            x, y = interpolated(sprite)
+            pos = (x + dx - ox, y + dy - oy)
+            blit(sprite.image, pos)
+            # 受击闪光：叠加当前帧的白色剪影 (按帧缓存)
+            if sprite.flash_until > now:
+                blit(TRANSFORMS.silhouette(sprite.image, HIT_FLASH_COLOR), pos)
 
         # 3.4 顶层特效 (vfx_top) - 爆炸、悬浮武器、树木
-        for sprite in vfx_top_sprites:
-            offset_pos = sprite.rect.topleft - self.offset
-            if self._is_visible(offset_pos, sprite):
-                self.display_surface.blit(sprite.image, offset_pos)
\ No newline at end of file
+        self._draw_layer(LAYERS['vfx_top'], ox, oy)
@@ -1,50 +1,237 @@
 import pygame
 from src.components import Entity
 from src.settings import *
-from src.vfx import AnimationPlayer, FlashEffect, Explosion
+from src.vfx import AnimationPlayer, Explosion
+from src.logger import log
+from src.asset_cache import TRANSFORMS
+
+HITBOX_SHRINK = 10  # 碰撞箱比 rect 宽高各小多少像素
+
+class EnemyPrefab:
+    """
+    [优化] 敌人预制体：同一种敌人共用的数据、动画帧和阴影，生成敌人时不必再查表、切帧、缩放
+    精英是同一种敌人的另一个预制体，血量/伤害/经验/体型按 ELITE_* 放大
+    """
+    def __init__(self, enemy_id, resource_manager, elite=False):
+        data = resource_manager.data['enemies'][enemy_id]
+        self.enemy_id = enemy_id
+        self.elite = elite
+        self.stats = data
+        self.image_key = data['image']
+        self.anim_data = data.get('data', {})
+        self.scale = self.anim_data.get('scale', 1.0)
+        if elite:
+            self.stats = dict(data, hp=data['hp'] * ELITE_HP_MULTIPLIER,
+                              damage=data['damage'] * ELITE_DAMAGE_MULTIPLIER,
+                              xp=int(data.get('xp', 10) * ELITE_XP_MULTIPLIER))
+            self.scale *= ELITE_SCALE
+        self.res = resource_manager
+        # 缩放后的阴影由共享变换缓存提供，所有敌人共用一张
+        self.shadow_image = TRANSFORMS.scale(resource_manager.get_image('shadows'), (24, 10), alpha=100)
+
+    @property
+    def frames(self):
+        """动画帧 (有图集时是裁掉透明边的帧)，贴图被换出后重新取回时会自动换成新的"""
+        return self.res.get_frames(self.image_key, self.anim_data)
+
+    def hitbox_reach(self):
+        """rect 中心到碰撞箱边缘的最大距离 (与 Enemy.reset 的 rect/hitbox 计算一致，多留 1 像素取整误差)"""
+        w, h = self.frames.size
+        if self.scale != 1.0:
+            w, h = int(w * self.scale), int(h * self.scale)
+        return (max(w, h) - HITBOX_SHRINK) // 2 + 1
+
+
+class EnemyPool:
+    """
+    敌人对象池
+    [优化] 按 (enemy_id, 是否精英) 缓存预制体；死亡的敌人 (连同阴影) 回收到空闲列表，生成时优先复用并重置状态，
+    刷怪高峰不再集中新建 Sprite / AnimationPlayer
+    """
+    def __init__(self, groups, obstacle_sprites, resource_manager, audio_manager=None, map_manager=None,
+                 spatial_grid=None, swarm=None, vfx=None, max_size=ENEMY_POOL_SIZE):
+        """
+        :param groups: 敌人 (和阴影) 加入的精灵组
+        :param max_size: 最多保留的空闲敌人数量
+        """
+        self.groups = groups
+        self.obstacle_sprites = obstacle_sprites
+        self.res = resource_manager
+        self.audio_manager = audio_manager
+        self.map_manager = map_manager
+        self.spatial_grid = spatial_grid
+        self.swarm = swarm
+        self.vfx = vfx
+        self.player = None
+        self.max_size = max_size
+        self.prefabs = {}
+        self.free = []
+        self._free_ids = set()  # 防止同一个敌人被重复回收 (kill 可能被调用多次)
+
+    def __len__(self):
+        return len(self.free)
+
+    def bind(self, player):
+        """绑定当前对局的玩家 (每局开始时调用)"""
+        self.player = player
+
+    def prefab(self, enemy_id, elite=False):
+        prefab = self.prefabs.get((enemy_id, elite))
+        if prefab is None:
+            prefab = EnemyPrefab(enemy_id, self.res, elite)
+            self.prefabs[(enemy_id, elite)] = prefab
+            # 敌人按中心登记到空间网格：武器查询的余量要覆盖最大的碰撞箱 (精英体型更大)
+            if self.spatial_grid is not None:
+                self.spatial_grid.fit_margin(prefab.hitbox_reach())
+        return prefab
+
+    def spawn(self, pos, enemy_id, elite=False):
+        """
+        取出 (或新建) 一个敌人并初始化
+        :param elite: 是否生成精英
+        """
+        prefab = self.prefab(enemy_id, elite)
+        if self.free:
+            enemy = self.free.pop()
+            self._free_ids.discard(id(enemy))
+            enemy.player = self.player
+            enemy.reset(pos, prefab)
+            return enemy
+        return Enemy(pos, enemy_id, self.groups, self.obstacle_sprites, self.player, self.res,
+                     self.audio_manager, self.map_manager, spatial_grid=self.spatial_grid,
+                     swarm=self.swarm, vfx=self.vfx, pool=self, prefab=prefab)
+
+    def release(self, enemy):
+        """回收敌人（由 Enemy.kill 调用）"""
+        if id(enemy) in self._free_ids or len(self.free) >= self.max_size:
+            return
+        self.free.append(enemy)
+        self._free_ids.add(id(enemy))
+
+    def clear(self):
+        self.free.clear()
+        self._free_ids.clear()
+
 
 class Enemy(Entity):
-    def __init__(self, pos, enemy_id, groups, obstacle_sprites, player, resource_manager, audio_manager=None, map_manager=None):
+    def __init__(self, pos, enemy_id, groups, obstacle_sprites, player, resource_manager, audio_manager=None, map_manager=None,
+                 spatial_grid=None, swarm=None, vfx=None, pool=None, prefab=None):
         super().__init__(groups, pos, z_layer=LAYERS['main'])
         
+        # [优化] 群体系统槽位：有 swarm 时移动/出界/接触伤害由 SwarmSystem 批量计算
+        self.swarm = None
+        self.swarm_index = None
         self.player = player
-        self.set_obstacles(obstacle_sprites)
+        self.obstacle_sprites = obstacle_sprites
         self.res = resource_manager
         self.audio_manager = audio_manager
         self.map_manager = map_manager  # 保存地图管理器引用，用于边界检查
+        self.vfx = vfx  # 特效管理器 (VFXManager)，为 None 时直接创建特效
+        self.pool = pool
+        self.render_groups = groups  # 复用时重新加入的精灵组 (阴影也加入同样的组)
+        self._spatial_grid = spatial_grid
+        self._swarm = swarm
+        self.anim_player = None
+        self.shadow = None
+        self.reset(pos, prefab if prefab is not None else EnemyPrefab(enemy_id, resource_manager))
+
+    def reset(self, pos, prefab):
+        """
+        (重新)初始化敌人状态，对象池复用敌人时调用
+        :param prefab: EnemyPrefab
+        """
+        if not self.alive():
+            self.add(self.render_groups)
+        # 有地图管理器时使用其占用网格做障碍物碰撞 (地图重新生成后占用网格会换新)
+        self.set_obstacles(self.obstacle_sprites, self.map_manager.obstacle_grid if self.map_manager else None)
         # 数据读取
-        data = resource_manager.data['enemies'][enemy_id]
-        self.stats = data
-        self.speed = data['speed']
-        self.current_hp = data['hp'] 
+        self.stats = prefab.stats
+        self.speed = prefab.stats['speed']
+        self._current_hp = prefab.stats['hp']
+        self.direction.update(0, 0)
+        self.flash_until = 0
         
         # 动画与图像
-        img_key = data['image']
-        full_image = resource_manager.get_image(img_key)
-
-        anim_data = data.get('data', {})
-        self.scale = anim_data.get('scale', 1.0)
-        self.anim_player = AnimationPlayer(full_image, anim_data, default_speed=8)
+        # [优化] 有图集时直接取裁掉透明边的帧，否则从大图切帧
+        self.scale = prefab.scale
+        if self.anim_player is None:
+            self.anim_player = AnimationPlayer(prefab.frames, prefab.anim_data, default_speed=8)
+        else:
+            self.anim_player.set_strip(prefab.frames)
         
         # 初始化图像
         self.image = self.anim_player.get_frame_image(0, loop=True, scale=self.scale)
+        self.image_offset = self.anim_player.get_frame_offset(self.scale)
 
-        # 生成阴影
-        shadow_img = self.res.get_image('shadows')
-        shadow_img = pygame.transform.scale(shadow_img, (24, 10))
-        shadow_img.set_alpha(100)
-        
-        from src.components import Shadow # 局部导入防循环，或放顶部
-        Shadow(self, groups, shadow_img)
-        
-        self.rect = self.image.get_rect(topleft=pos)
-        self.hitbox = self.rect.inflate(-10, -10)
+        # rect / hitbox 按原始帧尺寸计算，不受裁剪影响
+        self.rect = self.anim_player.get_frame_rect(self.scale, topleft=pos)
+        self.hitbox = self.rect.inflate(-HITBOX_SHRINK, -HITBOX_SHRINK)
         self.resistance = 3
+
+        # 生成阴影 (复用时阴影随敌人一起重新加入精灵组)
+        from src.components import Shadow # 局部导入防循环，或放顶部
+        if self.shadow is None:
+            self.shadow = Shadow(self, self.render_groups, prefab.shadow_image)
+        else:
+            self.shadow.image = prefab.shadow_image
+            self.shadow.rect.size = prefab.shadow_image.get_size()
+            self.shadow._update_pos()
+            if not self.shadow.alive():
+                self.shadow.add(self.render_groups)
+
+        # 注册到敌人空间网格，供武器按半径查询
+        self.set_spatial_grid(self._spatial_grid)
+        # 注册到群体系统 (血量从此保存在 swarm 的数组里)
+        if self._swarm is not None:
+            self.swarm = self._swarm
+            self.swarm_index = self._swarm.add(self, self._current_hp, self.speed)
         
         # [优化] 更新频率控制（根据距离玩家远近）
         self.update_frame_skip = 1  # 每帧更新
         self.frame_count = 0  # 帧计数器
+
+    def relocate(self, pos):
+        """
+        [优化] 把敌人挪到新的出生点并恢复满血，相当于重新生成但不销毁/新建对象
+        (离玩家太远的敌人由 Game 回收到玩家附近)
+        """
+        self.rect.topleft = pos
+        self.hitbox.center = self.rect.center
+        self.current_hp = self.stats['hp']
+        if self.swarm_index is not None:
+            self.swarm.move_to(self.swarm_index, self.hitbox.topleft)
+        if self.spatial_grid is not None:
+            self.spatial_grid.update_sprite(self)
+        # 镜头外的敌人阴影不跟随，瞬移后立即对齐，旧位置不会留下阴影
+        if self.shadow is not None:
+            self.shadow._update_pos()
     
+    @property
+    def current_hp(self):
+        if self.swarm_index is not None:
+            return self.swarm.hp[self.swarm_index].item()
+        return self._current_hp
+
+    @current_hp.setter
+    def current_hp(self, value):
+        if self.swarm_index is not None:
+            self.swarm.hp[self.swarm_index] = value
+        else:
+            self._current_hp = value
+
+    def kill(self):
+        # 释放群体系统槽位，血量拷回本地，避免槽位复用后读到别的敌人
+        if self.swarm_index is not None:
+            self._current_hp = self.swarm.hp[self.swarm_index].item()
+            self.swarm.remove(self.swarm_index)
+            self.swarm_index = None
+        super().kill()
+        # 阴影与敌人同时移除，复用时一起重新加入
+        if self.shadow is not None:
+            self.shadow.kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
     def _check_out_of_bounds(self):
         """
         检查怪物是否在墙外，如果在墙外则自动死亡
@@ -76,19 +263,8 @@ class Enemy(Entity):
         
         return False  # 在墙内，安全
     
-    def update(self, dt):
-        # 0. [新增] 检查是否在墙外，如果是则自动死亡
-        if self._check_out_of_bounds():
-            print(f"[WARNING] Enemy detected outside walls at ({self.rect.centerx}, {self.rect.centery}), auto-killing...")
-            self.die(give_xp=False)  # 墙外死亡不给予经验值
-            return  # 死亡后不再执行后续逻辑
-        
-        # [优化] 根据距离玩家远近决定更新频率
-        enemy_vec = pygame.math.Vector2(self.rect.center)
-        player_vec = pygame.math.Vector2(self.player.rect.center)
-        distance_sq = (player_vec - enemy_vec).length_squared()
-        distance = distance_sq ** 0.5
-        
+    def _animate(self, dt, distance):
+        """[优化] 根据距离玩家远近决定动画更新频率"""
         # 根据距离设置更新频率
         if distance > 800:  # 远离玩家（>800像素）
             self.update_frame_skip = 3  # 每3帧更新一次
@@ -99,7 +275,26 @@ class Enemy(Entity):
         
         # 只在需要时更新（根据更新频率）
         self.frame_count += 1
-        should_update = (self.frame_count % self.update_frame_skip == 0)
+        if self.frame_count % self.update_frame_skip == 0:
+            self.image = self.anim_player.get_frame_image(dt * self.update_frame_skip, loop=True, scale=self.scale)
+            self.image_offset = self.anim_player.get_frame_offset(self.scale)
+
+    def update(self, dt):
+        # [优化] 群体模式：移动、出界检查与接触伤害已由 SwarmSystem.step 批量完成，这里只播放动画
+        # 镜头外 (lod 非 0) 的敌人看不见，动画也不推进
+        if self.swarm_index is not None:
+            if not self.lod:
+                self._animate(dt, self.swarm.distance[self.swarm_index])
+            return
+        
+        # 0. [新增] 检查是否在墙外，如果是则自动死亡
+        if self._check_out_of_bounds():
+            log.warning('enemy', "Enemy detected outside walls at (%s, %s), auto-killing...", self.rect.centerx, self.rect.centery)
+            self.die(give_xp=False)  # 墙外死亡不给予经验值
+            return  # 死亡后不再执行后续逻辑
+        
+        enemy_vec = pygame.math.Vector2(self.rect.center)
+        player_vec = pygame.math.Vector2(self.player.rect.center)
         
         # 1. 计算指向玩家的向量（总是更新，确保敌人能追踪玩家）
         diff = player_vec - enemy_vec
@@ -108,9 +303,8 @@ class Enemy(Entity):
         else:
             self.direction = pygame.math.Vector2()
 
-        # 2. 播放动画（根据更新频率）
-        if should_update:
-            self.image = self.anim_player.get_frame_image(dt * self.update_frame_skip, loop=True, scale=self.scale)
+        # 2. 播放动画（根据距离降低更新频率）
+        self._animate(dt, diff.magnitude())
         
         # 3. 移动与碰撞伤害 (撞玩家) - 总是更新，确保碰撞检测准确
         self.move(dt)
@@ -122,26 +316,9 @@ class Enemy(Entity):
         敌人受击逻辑
         """
         self.current_hp -= amount
-        print(f"[DEBUG] Enemy hit! Damage: {amount}, Remaining HP: {self.current_hp}")
-        # [优化] 减少受击特效生成频率，避免后期特效过多
-        import random
-        from src.settings import MAX_ENEMIES
-        
-        # 如果玩家等级较高或敌人数量很多，减少受击特效生成
-        should_create_flash = True
-        if self.player.level > 15:
-            # 15级后，只有30%概率生成受击特效
-            should_create_flash = random.random() < 0.3
-        elif len([s for s in self.groups()[0].sprites() if hasattr(s, 'stats')]) > MAX_ENEMIES * 0.6:
-            # 敌人数量超过60%上限时，50%概率生成受击特效
-            should_create_flash = random.random() < 0.5
-        
-        if should_create_flash:
-            # 防止特效加入 enemy_sprites 组
-            # self.groups()[0] 通常是 all_sprites (YSortCameraGroup)
-            # 我们只把特效加到渲染组，不加到碰撞组
-            render_group = self.groups()[0] 
-            FlashEffect(self, [render_group], duration=0.1)
+        log.debug('enemy', "Enemy hit! Damage: %s, Remaining HP: %s", amount, self.current_hp)
+        # [优化] 受击闪光只是渲染状态 (缓存的剪影)，每次受击都显示
+        self.flash(0.1)
         # 死亡判定
         if self.current_hp <= 0:
             self.die()
@@ -156,33 +333,21 @@ class Enemy(Entity):
         # 只有正常死亡才给予经验值
         if give_xp:
             self.player.xp += self.stats.get('xp', 10)
-            print(f"[DEBUG] Enemy died. Player XP: {self.player.xp}")
+            log.debug('enemy', "Enemy died. Player XP: %s", self.player.xp)
             # 播放死亡音效（只有正常死亡才播放）
             if self.audio_manager:
                 self.audio_manager.play_sfx('sfx_enemydied', volume=0.6)
-            # [优化] 检查特效数量，只在特效数量未达上限时创建
-            # 当敌人数量过多时，减少特效生成频率
-            from src.settings import MAX_VFX_COUNT, MAX_ENEMIES
-            import random
-            should_create_vfx = True
-            
-            # 如果敌人数量很多，随机跳过部分特效
-            # 通过检查 enemy_sprites 组的大小来判断（需要传入或访问）
-            # 这里使用一个简单的方法：通过检查所有精灵中敌人的数量
-            # 由于 enemy_sprites 组在 game 中，我们无法直接访问，所以使用概率控制
-            # 当敌人密度高时（通过检查周围敌人数量或使用固定概率）
-            # 使用固定概率：后期减少50%的特效生成
-            if self.player.level > 10:
-                # 10级后，50%概率跳过特效生成
-                should_create_vfx = random.random() < 0.5
-            
-            # 播放死亡爆炸动画（只有正常死亡且允许创建特效时才播放）
-            if should_create_vfx:
-                expl_surf = self.res.get_image('vfx_explosion') 
-                if expl_surf and expl_surf.get_width() > 32:
-                    Explosion(self.rect.center, self.groups(), expl_surf, frame_count=12, scale=1.25)
+            # 播放死亡爆炸动画（只有正常死亡才播放）
+            # [优化] 由 VFXManager 统一按预算生成，所有爆炸共用一份切好的帧 (延后到任务调度器中生成)
+            if self.vfx is not None:
+                self.vfx.queue_explosion(self.rect.center, scale=1.25)
+            else:
+                expl_frames = self.res.get_frames('vfx_explosion', ATLAS_SHEETS['vfx_explosion'])
+                # 缺失素材时得到的是 32x32 占位符，不播放
+                if expl_frames.size[0] > 32:
+                    Explosion(self.rect.center, [self.groups()[0]], expl_frames, frame_count=12, scale=1.25)
         else:
             # 墙外死亡，静默移除，不播放音效和动画
-            print(f"[DEBUG] Enemy removed (out of bounds), no XP given")
+            log.debug('enemy', "Enemy removed (out of bounds), no XP given")
         
         self.kill()
\ No newline at end of file
@@ -1,18 +1,38 @@
 import pygame
+import os
 import sys
-import random
 from src.settings import *
 from src.loader import ResourceManager
 from src.player import Player
-from src.enemy import Enemy
+from src.enemy import EnemyPool
 from src.components import YSortCameraGroup, Tile
 from src.upgrade_system import UpgradeManager
 from src.ui import UI
 from src.map_manager import MapManager
 from src.audio_manager import AudioManager
+from src.spatial import SpatialGrid
+from src.swarm import SwarmSystem, LOD_TIER_NAMES
+from src.vfx import VFXManager
+from src.waves import WaveDirector
+from src.input_source import InputSource
+from src.profiler import FrameProfiler
+from src.presenter import Presenter
+from src.scheduler import JobScheduler
+from src.sim_clock import SIM_CLOCK
+from src.logger import log
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, input_source=None):
+        """
+        :param headless: 无窗口模式 (SDL dummy 视频/音频驱动)，用于基准测试和 CI
+        :param input_source: 玩家输入源，默认直接读取键鼠 (见 src/input_source.py)
+        """
+        self.headless = headless
+        if headless:
+            # 必须在 pygame.init() 之前设置
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        self.input_source = input_source if input_source is not None else InputSource()
         pygame.init()
         pygame.display.set_caption("MysticEcho")
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
@@ -26,17 +46,35 @@ class Game:
         pygame.key.stop_text_input()
         self.clock = pygame.time.Clock()
         self.running = True
+        # [优化] 固定步长：真实帧间隔累积到这里，每满一步推进一次逻辑
+        self.sim_step = 1 / SIM_HZ
+        self.accumulator = 0.0
+        self.dropped_time = 0.0  # 超出追赶上限被丢弃的时间（秒），统计用
+        # 画面提交 (静态状态下只提交变化的区域)
+        self.presenter = Presenter(self.screen)
+        self.backdrop = None  # 叠加界面的背景 ((状态, 是否静音), Surface)
         
         # 加载资源
         self.loader = ResourceManager()
         self.loader.load_all()
 
         self.all_sprites = YSortCameraGroup() 
+        # 帧性能分析器 (F3 切换叠加图)，关闭时各计时范围几乎没有开销
+        self.profiler = FrameProfiler()
+        self.all_sprites.profiler = self.profiler
+        # [优化] 延后任务调度器：重建武器精灵、爆炸等不急的工作每帧按时间预算执行
+        self.scheduler = JobScheduler()
+        # [优化] 特效管理器：受击闪光/死亡爆炸的对象池与数量预算
+        self.vfx = VFXManager(self.all_sprites, self.loader, scheduler=self.scheduler)
         self.obstacle_sprites = pygame.sprite.Group()
         self.enemy_sprites = pygame.sprite.Group()
+        # [优化] 敌人空间网格：敌人移动时增量更新，武器按半径查询
+        self.enemy_grid = SpatialGrid(cell_size=SPATIAL_CELL_SIZE, query_margin=SPATIAL_QUERY_MARGIN)
         # [新增] 初始化地图管理器
         self.map_manager = MapManager(self)
         self.map_manager.generate_forest() # 生成地图
+        # [优化] 敌人群体系统：所有敌人的移动/出界/接触伤害每帧批量计算
+        self.swarm = SwarmSystem(self.map_manager, self.enemy_grid, view_size=self.screen.get_size())
         # [修改] 使用生成的出生点
         spawn_pos = self.map_manager.spawn_point
         self.player = Player(
@@ -44,158 +82,69 @@ class Game:
             groups=[self.all_sprites], 
             obstacle_sprites=self.obstacle_sprites,
             enemy_sprites=self.enemy_sprites,
-            resource_manager=self.loader
+            resource_manager=self.loader,
+            spatial_grid=self.enemy_grid,
+            obstacle_grid=self.map_manager.obstacle_grid,
+            input_source=self.input_source,
+            scheduler=self.scheduler
         )
         self.upgrade_manager = UpgradeManager(self.loader)
 
-        self.spawn_timer = 0
-        self.base_spawn_interval = 1200
 
         self.ui = UI(self.screen, self.loader) 
         
         # 初始化音频管理器
         self.audio_manager = AudioManager(self.loader)
         
+        # [优化] 敌人对象池：按 enemy_id 缓存预制体，死亡的敌人回收复用
+        self.enemy_pool = EnemyPool([self.all_sprites, self.enemy_sprites], self.obstacle_sprites, self.loader,
+                                    self.audio_manager, self.map_manager, spatial_grid=self.enemy_grid,
+                                    swarm=self.swarm, vfx=self.vfx)
+        self.enemy_pool.bind(self.player)
+        self.recycle_timer = 0
+        # [优化] 波次导演：按 waves.json 编译好的时间轴生成敌人，每帧和场上总数都有预算
+        self.wave_director = WaveDirector(self.loader.data['waves'].values(), self.enemy_pool,
+                                          self.map_manager.spawn_index, self.loader)
+        
         # 初始化声音按钮图标状态
         self.ui.update_sound_button_icon(self.audio_manager.is_muted)
         
         self.state = 'MENU'
+        # [优化] 停留在主菜单时就在后台预取开局会出现的敌人贴图
+        self._prefetch_enemy_assets()
         # 初始化时播放主菜单音乐
         self.audio_manager.update_music_for_state(self.state)
 
-    def _is_valid_spawn_position(self, x, y, min_distance=400):
+    def _prefetch_enemy_assets(self):
+        """后台预取 (并固定) 波次时间轴上即将出现的敌人贴图"""
+        self.wave_director.prefetch()
+
+    def _spawn_positions(self, count):
         """
-        检查生成位置是否有效（不在墙上，不与障碍物碰撞，距离玩家足够远）
+        在玩家周围的环形区域内取 count 个出生点
+        :return: [(x, y), ...]，地图上没有可用格子时为空列表
         """
-        # 1. 距离检查
-        spawn_pos = pygame.math.Vector2(x, y)
-        if spawn_pos.distance_to(self.player.rect.center) <= min_distance:
-            return False
-        
-        # 2. 严格的边界检查：确保完全在墙内
-        # 墙在网格坐标 0 和 width-1, height-1
-        # 墙的碰撞箱范围：x 从 0 到 TILE_SIZE（左墙），或 (width-1)*TILE_SIZE 到 width*TILE_SIZE（右墙）
-        # 同样适用于 y 轴
-        
-        map_width_px = self.map_manager.width * TILE_SIZE
-        map_height_px = self.map_manager.height * TILE_SIZE
-        
-        # 确保生成位置至少距离边界墙一个完整的 TILE_SIZE
-        # 左边界：x >= TILE_SIZE
-        # 右边界：x <= (width - 2) * TILE_SIZE
-        # 上边界：y >= TILE_SIZE
-        # 下边界：y <= (height - 2) * TILE_SIZE
-        if x < TILE_SIZE or x > (self.map_manager.width - 2) * TILE_SIZE:
-            return False
-        if y < TILE_SIZE or y > (self.map_manager.height - 2) * TILE_SIZE:
-            return False
-        
-        # 3. 网格坐标检查：使用地图网格数据直接验证
-        grid_x = x // TILE_SIZE
-        grid_y = y // TILE_SIZE
-        
-        # 检查是否在边界墙的网格坐标上或紧邻边界
-        if (grid_x <= 0 or grid_x >= self.map_manager.width - 1 or
-            grid_y <= 0 or grid_y >= self.map_manager.height - 1):
-            return False
-        
-        # 3.5 使用地图网格数据检查：如果该网格坐标是墙，直接拒绝
-        if (grid_x, grid_y) in self.map_manager.grid:
-            if self.map_manager.grid[(grid_x, grid_y)] == 'wall':
-                return False
-        
-        # 4. 检查是否与障碍物碰撞（使用实际碰撞箱）
-        # 创建一个临时的碰撞箱来检测（与 Enemy 的 hitbox 创建方式一致）
-        # Enemy 的 rect 基于 topleft=pos，然后 inflate(-10, -10)
-        test_rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
-        test_hitbox = test_rect.inflate(-10, -10)
-        
-        # 检查是否与任何障碍物碰撞（包括墙）
-        for obstacle in self.obstacle_sprites:
-            if test_hitbox.colliderect(obstacle.hitbox):
-                return False
-        
-        return True
+        return self.map_manager.spawn_index.sample(self.player.rect.center, count,
+                                                   SPAWN_MIN_DISTANCE, SPAWN_MAX_DISTANCE)
 
-    def enemy_spawner(self, dt):
-        self.spawn_timer += dt * 1000 
-        
-        # [修改] 动态间隔: 基础间隔 - (等级-1)*减少量，最低最小间隔
-        current_interval = max(SPAWN_INTERVAL_MIN, 
-                              SPAWN_INTERVAL_BASE - (self.player.level - 1) * SPAWN_INTERVAL_DECREASE)
-        
-        if self.spawn_timer >= current_interval:
-            self.spawn_timer = 0
-            
-            # 筛选符合当前等级(tier <= player.level)的怪物
-            available_enemies = []
-            for e_id, data in self.loader.data['enemies'].items():
-                tier = data.get('tier', 1)
-                if tier <= self.player.level:
-                    available_enemies.append(e_id)
-            
-            if not available_enemies: return
-
-            # [优化] 使用对数增长公式，避免后期怪物数量爆炸
-            # 公式：基础数量 + log(等级) * 系数，并设置上限
-            import math
-            base_count = 1
-            log_factor = 2.0  # 对数增长系数
-            max_per_spawn = MAX_SPAWN_COUNT  # 单次最大生成数量
-            
-            # 使用对数增长：1级=1, 5级≈2, 10级≈3, 20级≈4, 30级≈5
-            spawn_count = min(max_per_spawn, 
-                            max(1, base_count + int(math.log(self.player.level) * log_factor)))
-            
-            # [优化] 检查当前敌人数量，如果已接近上限则减少生成
-            current_enemy_count = len(self.enemy_sprites)
-            if current_enemy_count >= MAX_ENEMIES * 0.8:  # 达到80%上限时
-                spawn_count = max(1, spawn_count // 2)  # 减半生成
-            elif current_enemy_count >= MAX_ENEMIES:  # 已达到上限
-                return  # 不生成新敌人
-            
-            # 随机坐标逻辑 (严格限制在墙内)
-            # 墙在网格坐标 0 和 width-1, height-1
-            # 为了确保怪物完全在墙内，生成范围至少距离边界一个 TILE_SIZE
-            # 左边界墙：grid_x = 0，像素范围 0 到 TILE_SIZE
-            # 右边界墙：grid_x = width-1，像素范围 (width-1)*TILE_SIZE 到 width*TILE_SIZE
-            # 所以安全生成范围：TILE_SIZE 到 (width-2)*TILE_SIZE
-            
-            min_x = TILE_SIZE  # 至少距离左墙一个格子
-            max_x = (self.map_manager.width - 2) * TILE_SIZE  # 至少距离右墙一个格子
-            min_y = TILE_SIZE  # 至少距离上墙一个格子
-            max_y = (self.map_manager.height - 2) * TILE_SIZE  # 至少距离下墙一个格子
-            
-            # 确保范围有效
-            if max_x <= min_x or max_y <= min_y:
-                return  # 地图太小，无法生成怪物
-            
-            # [优化] 循环生成多个怪物，但限制总数量
-            for _ in range(spawn_count):
-                # 再次检查敌人数量（防止循环中超过上限）
-                if len(self.enemy_sprites) >= MAX_ENEMIES:
-                    break
-                enemy_id = random.choice(available_enemies)
-                spawned = False
-                
-                for attempt in range(20):  # 增加尝试次数
-                    x = random.randint(min_x, max_x)
-                    y = random.randint(min_y, max_y)
-                    
-                    # [修改] 使用辅助方法检查生成位置是否有效
-                    if self._is_valid_spawn_position(x, y):
-                        Enemy((x, y), enemy_id, [self.all_sprites, self.enemy_sprites], 
-                              self.obstacle_sprites, self.player, self.loader, self.audio_manager, self.map_manager)
-                        spawned = True
-                        break
-                
-                # 如果20次尝试都失败，跳过这个怪物（避免卡死）
-                if not spawned:
-                    continue
+    def _recycle_far_enemies(self, dt):
+        """
+        [优化] 离玩家太远 (远在镜头外) 的敌人直接挪到新的出生点，
+        代替"杀掉远处的再新建一个"，远处的敌人也不会一直在地图边缘游荡
+        """
+        self.recycle_timer += dt * 1000
+        if self.recycle_timer < ENEMY_RECYCLE_INTERVAL:
+            return
+        self.recycle_timer = 0
+        far = self.swarm.far_from_player(ENEMY_RECYCLE_DISTANCE)
+        for enemy, pos in zip(far, self._spawn_positions(len(far))):
+            enemy.relocate(pos)
 
     def update(self, dt):
         # 根据游戏状态更新背景音乐（取消静音后会自动恢复）
         self.audio_manager.update_music_for_state(self.state)
+        # 把后台预取完成的图片放入资源仓库
+        self.loader.poll_prefetch()
         
         # 在游戏状态下，确保文本输入被禁用，防止中文输入法拦截键盘事件
         if self.state == 'PLAYING':
@@ -209,15 +158,27 @@ class Game:
             # 确保玩家存在
             if self.player is None:
                 return
-            self.all_sprites.update(dt)
-            self.enemy_spawner(dt)
+            # 模拟时钟只在战斗中前进；记下各精灵本步开始时的位置，绘制时据此插值
+            SIM_CLOCK.advance(dt)
+            self.all_sprites.begin_step()
+            # 先批量推进敌人群体，再更新各精灵 (敌人只播放动画)
+            with self.profiler.scope('swarm'):
+                self.swarm.step(dt, self.player)
+            if self.profiler.enabled:
+                for name, count in zip(LOD_TIER_NAMES, self.swarm.tier_counts):
+                    self.profiler.gauge('lod.' + name, count)
+            with self.profiler.scope('sprites'):
+                self.all_sprites.update(dt)
+            with self.profiler.scope('spawner'):
+                self.wave_director.update(dt, self.player.rect.center, len(self.swarm))
+                self._recycle_far_enemies(dt)
 
             if self.player.is_dead:
-                self.state = 'GAME_OVER'
+                self._enter_overlay('GAME_OVER')
 
             # 升级逻辑
             if self.player.check_level_up():
-                print(f"--- LEVEL UP! Level: {self.player.level} ---")
+                log.info('game', "--- LEVEL UP! Level: %s ---", self.player.level)
                 
                 # 1. 获取随机选项 (UpgradeManager 已保证不重复)
                 options = self.upgrade_manager.get_random_options(self.player.level, amount=3)
@@ -225,9 +186,9 @@ class Game:
                     # 2. 初始化 UI 卡片
                     self.ui.setup_level_up(options)
                     # 3. 切换状态
-                    self.state = 'LEVEL_UP'
+                    self._enter_overlay('LEVEL_UP')
                 else:
-                    print("[WARNING] No upgrades available!")
+                    log.warning('game', "No upgrades available!")
                     
         elif self.state == 'LEVEL_UP':
             pass
@@ -241,6 +202,11 @@ class Game:
         self.all_sprites.empty()
         self.obstacle_sprites.empty()
         self.enemy_sprites.empty()
+        self.enemy_grid.clear()
+        self.swarm.clear()
+        self.vfx.clear()
+        self.scheduler.clear()
+        self.all_sprites.set_ground_layer(None)
         
         # 重置音频管理器
         self.audio_manager.reset()
@@ -249,7 +215,8 @@ class Game:
         self.player = None
         
         # 重置数值
-        self.spawn_timer = 0
+        self.wave_director.reset()
+        self.recycle_timer = 0
     
     def start_new_game(self):
         """开始新游戏：清理资源并重新生成地图和玩家，进入教程状态"""
@@ -264,13 +231,20 @@ class Game:
             groups=[self.all_sprites], 
             obstacle_sprites=self.obstacle_sprites,
             enemy_sprites=self.enemy_sprites,
-            resource_manager=self.loader
+            resource_manager=self.loader,
+            spatial_grid=self.enemy_grid,
+            obstacle_grid=self.map_manager.obstacle_grid,
+            input_source=self.input_source,
+            scheduler=self.scheduler
         )
+        self.enemy_pool.bind(self.player)
         
         # 重置数值
-        self.spawn_timer = 0
+        self.wave_director.reset()
+        self.recycle_timer = 0
+        self._prefetch_enemy_assets()
         # 状态设为 TUTORIAL，让玩家先看教程
-        self.state = 'TUTORIAL'
+        self._enter_overlay('TUTORIAL')
     
     def reset_game(self):
         """[新增] 快速重置游戏状态（用于游戏中的重新开始）"""
@@ -278,6 +252,10 @@ class Game:
         self.all_sprites.empty()
         self.obstacle_sprites.empty()
         self.enemy_sprites.empty()
+        self.enemy_grid.clear()
+        self.swarm.clear()
+        self.vfx.clear()
+        self.scheduler.clear()
         
         # 重置音频管理器
         self.audio_manager.reset()
@@ -290,55 +268,102 @@ class Game:
             groups=[self.all_sprites], 
             obstacle_sprites=self.obstacle_sprites,
             enemy_sprites=self.enemy_sprites,
-            resource_manager=self.loader
+            resource_manager=self.loader,
+            spatial_grid=self.enemy_grid,
+            obstacle_grid=self.map_manager.obstacle_grid,
+            input_source=self.input_source,
+            scheduler=self.scheduler
         )
+        self.enemy_pool.bind(self.player)
         
         # 重置数值
-        self.spawn_timer = 0
+        self.wave_director.reset()
+        self.recycle_timer = 0
+        self._prefetch_enemy_assets()
         self.state = 'PLAYING'
 
-    def draw(self):
+    def draw(self, alpha=1.0):
+        """
+        :param alpha: 渲染插值系数 (累积器中剩余的时间 / 步长)，1 表示直接画最新一步的位置
+        """
+        self.all_sprites.alpha = alpha
+        # 先更新各控件的悬停状态与动画 (绘制方法本身不再更新状态)
+        widgets = self.ui.update_widgets(self.state)
+        # [优化] 静态状态下画面没有变化时不重画，只提交光标和外观变化的控件所在的区域
+        # (性能分析叠加图每帧都在变，开启时按动态画面处理)
+        static = self.state in DIRTY_RECT_STATES and not self.profiler.show_overlay
+        if self.presenter.begin_frame(self.state if static else None, widgets):
+            self._draw_scene()
+            self.presenter.capture()
+
+        with self.profiler.scope('ui'):
+            cursor_rect = self.ui.draw_custom_cursor()
+        self.profiler.draw_overlay(self.screen)
+        with self.profiler.scope('display'):
+            self.presenter.present(cursor_rect)
+
+    def _draw_scene(self):
+        """绘制除光标以外的整个画面"""
         if self.state == 'MENU':
             # 主菜单状态：只绘制主菜单（声音按钮已在 draw_main_menu 中绘制）
-            self.ui.draw_main_menu()
+            with self.profiler.scope('ui'):
+                self.ui.draw_main_menu()
+            return
+
+        # [优化] 叠加界面 (暂停/升级/教程/结算) 下世界不再变化：进入时把世界、HUD 和遮罩合成一张
+        # 不透明的背景，之后每帧只贴这一张图，再画上界面控件
+        if self.state in BACKDROP_STATES and self.player is not None:
+            # HUD 里的声音按钮也在背景中，切换静音时重新合成
+            key = (self.state, self.ui.sound_button_is_muted)
+            if self.backdrop is None or self.backdrop[0] != key:
+                self.backdrop = (key, self._capture_backdrop())
+            self.screen.blit(self.backdrop[1], (0, 0))
         else:
-            # 其他状态：绘制游戏内容
-            self.screen.fill(COLORS['bg_void'])
-            
-            # 始终绘制游戏内容（包括教程状态下）
-            # 确保玩家存在时才绘制
-            if self.player is not None:
+            self.backdrop = None
+            self._draw_world()
+            if self.state in BACKDROP_STATES:
+                self.screen.blit(self.ui.overlay_mask(self.state), (0, 0))
+        
+        if self.state == 'TUTORIAL':
+            # 教程状态下在游戏画面上叠加教程界面
+            self.ui.draw_tutorial(mask=False)
+        elif self.state == 'PAUSED':
+            self.ui.draw_pause(mask=False)
+        elif self.state == 'GAME_OVER':
+            self.ui.draw_game_over(mask=False)
+        elif self.state == 'LEVEL_UP':
+            self.ui.draw_level_up(mask=False)
+        if self.state in BACKDROP_STATES:
+            # 在遮罩/菜单之上再绘制一次声音按钮
+            self.ui.sound_button.draw(self.ui.display_surface)
+
+    def _draw_world(self):
+        """绘制游戏世界和 HUD"""
+        self.screen.fill(COLORS['bg_void'])
+        
+        # 始终绘制游戏内容（包括教程状态下）
+        # 确保玩家存在时才绘制
+        if self.player is not None:
+            with self.profiler.scope('world'):
                 self.all_sprites.custom_draw(self.player)
+            with self.profiler.scope('hud'):
                 self.ui.draw_hud(self.player)  # draw_hud 中已包含声音按钮
-            
-            if self.state == 'TUTORIAL':
-                # 教程状态下在游戏画面上叠加教程界面
-                self.ui.draw_tutorial()
-                # 在教程状态下也绘制声音按钮（在教程遮罩之上）
-                mouse_pos = pygame.mouse.get_pos()
-                self.ui.sound_button.update(mouse_pos)
-                self.ui.sound_button.draw(self.ui.display_surface)
-            elif self.state == 'PAUSED':
-                self.ui.draw_pause()
-                # 在暂停菜单下也绘制声音按钮（在菜单之上）
-                mouse_pos = pygame.mouse.get_pos()
-                self.ui.sound_button.update(mouse_pos)
-                self.ui.sound_button.draw(self.ui.display_surface)
-            elif self.state == 'GAME_OVER':
-                self.ui.draw_game_over()
-                # 在死亡菜单下也绘制声音按钮（在菜单之上）
-                mouse_pos = pygame.mouse.get_pos()
-                self.ui.sound_button.update(mouse_pos)
-                self.ui.sound_button.draw(self.ui.display_surface)
-            elif self.state == 'LEVEL_UP':
-                self.ui.draw_level_up()
-                # 在升级选择界面下也绘制声音按钮（在菜单之上）
-                mouse_pos = pygame.mouse.get_pos()
-                self.ui.sound_button.update(mouse_pos)
-                self.ui.sound_button.draw(self.ui.display_surface)
 
-        self.ui.draw_custom_cursor()
-        pygame.display.update()
+    def _capture_backdrop(self):
+        """合成叠加界面的背景：世界 + HUD + 半透明遮罩 (与显示窗口同格式，贴图时不需要混合)"""
+        self._draw_world()
+        self.screen.blit(self.ui.overlay_mask(self.state), (0, 0))
+        return self.screen.copy()
+
+    def _enter_overlay(self, state):
+        """
+        切换到叠加界面 (暂停/升级/教程/结算)
+        每次进入都丢弃旧背景并整屏提交：连续升级时中间没有绘制过 PLAYING 帧，
+        状态名相同但世界、HUD 和卡片都已经变了，只提交控件的脏矩形会漏掉其余区域
+        """
+        self.state = state
+        self.backdrop = None
+        self.presenter.invalidate()
 
     def events(self):
         for event in pygame.event.get():
@@ -367,12 +392,19 @@ class Game:
                         # 明确处理，阻止默认行为
                         # 注意：实际的移动逻辑在 player.input() 中通过 get_pressed() 处理
                         pass
+                elif event.key == pygame.K_F3:
+                    # 切换帧性能分析叠加图
+                    self.profiler.toggle()
                 elif event.key == pygame.K_ESCAPE:
                     if self.state == 'PLAYING':
-                        self.state = 'PAUSED'
+                        self._enter_overlay('PAUSED')
                     elif self.state == 'PAUSED':
                         self.state = 'PLAYING'
             
+            # 窗口内容可能被系统清掉 (被遮挡后重新显示等)，下一帧整屏重画
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                self.presenter.invalidate()
+            
             # 处理窗口焦点事件，确保游戏窗口有焦点时能正确接收键盘输入
             if event.type == pygame.ACTIVEEVENT:
                 if event.gain == 1:  # 窗口获得焦点
@@ -424,7 +456,7 @@ class Game:
                             # 返回主界面时清理所有游戏资源
                             self.cleanup_game()
                             self.state = 'MENU'
-                        elif action == 'pause_game': self.state = 'PAUSED'
+                        elif action == 'pause_game': self._enter_overlay('PAUSED')
                         elif action == 'toggle_sound':
                             is_muted = self.audio_manager.toggle_mute()
                             self.ui.update_sound_button_icon(is_muted)
@@ -446,7 +478,7 @@ class Game:
                                 # 播放按钮点击音效
                                 self.audio_manager.play_sfx('sfx_pressbutton', volume=0.5)
                                 # 1. 应用效果
-                                print(f">> Selected Upgrade: {selected_option.title}")
+                                log.info('game', ">> Selected Upgrade: %s", selected_option.title)
                                 selected_option.apply(self.player)
                                 
                                 # 2. 刷新玩家射击状态 (防止卡住开火)
@@ -455,11 +487,46 @@ class Game:
                                 # 这里暂时只需恢复状态
                                 self.state = 'PLAYING'
 
+    def run_jobs(self):
+        """执行本帧预算内的延后任务，并把队列指标交给分析器"""
+        with self.profiler.scope('jobs'):
+            self.scheduler.run()
+        if self.profiler.enabled:
+            self.profiler.gauge('jobs.depth', len(self.scheduler))
+            self.profiler.gauge('jobs.latency_ms', round(self.scheduler.last_latency * 1000, 2))
+
+    def step(self, dt):
+        """
+        推进一帧：事件 -> 若干个固定步长的逻辑步 -> 延后任务 -> 绘制 (插值)
+        [优化] 逻辑每步固定推进 1 / SIM_HZ 秒，与渲染帧率无关：
+        卡顿的帧不会带来过大的 dt (穿墙、子弹跳过敌人)，最多追赶 SIM_MAX_CATCH_UP 步，剩下的时间丢弃
+        run() 用真实帧间隔调用；无窗口测试传入 dt = 1 / SIM_HZ 时每次恰好推进一步
+        """
+        self.profiler.begin_frame()
+        with self.profiler.scope('events'):
+            self.events()
+        self.accumulator += dt
+        steps = 0
+        while self.accumulator >= self.sim_step and steps < SIM_MAX_CATCH_UP:
+            self.input_source.advance(self.sim_step)
+            self.update(self.sim_step)
+            self.accumulator -= self.sim_step
+            steps += 1
+        if self.accumulator >= self.sim_step:
+            # 追赶不完：丢弃多出的整步，逻辑时间变慢而不是一次跳很远
+            dropped = self.accumulator - self.accumulator % self.sim_step
+            self.dropped_time += dropped
+            self.accumulator -= dropped
+        self.run_jobs()
+        if self.profiler.enabled:
+            self.profiler.gauge('sim.steps', steps)
+        self.draw(self.accumulator / self.sim_step)
+        self.profiler.end_frame()
+
     def run(self):
         while self.running:
             dt = self.clock.tick(FPS) / 1000.0
-            self.events()
-            self.update(dt)
-            self.draw()
+            self.step(dt)
+        self.profiler.flush()
         pygame.quit()
         sys.exit()
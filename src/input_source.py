@@ -0,0 +1,77 @@
+"""
+输入源 - 把玩家输入从 pygame.key / pygame.mouse 中抽离出来
+正常游戏使用 InputSource 直接读取设备状态；
+无窗口基准测试使用 ScriptedInput 按时间表回放按键和鼠标位置，保证每次运行输入一致
+"""
+import pygame
+
+
+class InputSource:
+    """实时输入：直接读取键盘和鼠标状态"""
+    def advance(self, dt):
+        """推进一帧（实时输入无需处理）"""
+        pass
+
+    def get_pressed(self):
+        """当前按住的按键，用法同 pygame.key.get_pressed()"""
+        return pygame.key.get_pressed()
+
+    def get_mouse_pos(self):
+        """鼠标在屏幕上的位置"""
+        return pygame.mouse.get_pos()
+
+    def get_mouse_pressed(self):
+        """鼠标按键状态，用法同 pygame.mouse.get_pressed()"""
+        return pygame.mouse.get_pressed()
+
+
+class _KeyState:
+    """按键状态表，支持 keys[pygame.K_w] 这样的下标访问"""
+    def __init__(self, held):
+        self.held = frozenset(held)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class ScriptedInput(InputSource):
+    """
+    脚本输入：按时间表回放
+    script 中每一步为 (持续秒数, 按住的按键, 鼠标位置)，
+    鼠标位置可以是 (x, y)，也可以是 f(t) -> (x, y) 的函数 (t 为脚本开始后的秒数)
+    """
+    def __init__(self, script, loop=True):
+        """
+        :param script: [(duration, (pygame.K_w, ...), mouse_pos), ...]
+        :param loop: 脚本结束后是否从头循环，否则停在最后一步
+        """
+        self.script = [(duration, _KeyState(keys), mouse) for duration, keys, mouse in script]
+        self.loop = loop
+        self.total_duration = sum(step[0] for step in self.script)
+        if self.total_duration <= 0:
+            raise ValueError("ScriptedInput requires at least one step with a positive duration")
+        self.time = 0.0
+        self.step_index = 0
+        self.step_time = 0.0
+
+    def advance(self, dt):
+        """推进 dt 秒，切换到对应的脚本步骤"""
+        self.time += dt
+        self.step_time += dt
+        while self.step_time >= self.script[self.step_index][0]:
+            if self.step_index == len(self.script) - 1 and not self.loop:
+                break
+            self.step_time -= self.script[self.step_index][0]
+            self.step_index = (self.step_index + 1) % len(self.script)
+
+    def get_pressed(self):
+        return self.script[self.step_index][1]
+
+    def get_mouse_pos(self):
+        mouse = self.script[self.step_index][2]
+        if callable(mouse):
+            mouse = mouse(self.time)
+        return int(mouse[0]), int(mouse[1])
+
+    def get_mouse_pressed(self):
+        return (False, False, False)
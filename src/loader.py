@@ -1,46 +1,152 @@
 import pygame
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from src.settings import *
+from src.asset_cache import AssetCache, ImageStore, TRANSFORMS
+from src.atlas import TextureAtlas, sheet_spec
+from src.vfx import slice_strip
+from src.logger import log
 
 class ResourceManager:
-    def __init__(self):
-        # 统一图片仓库：Key = 文件名(无后缀), Value = Surface
-        self.images = {} 
+    def __init__(self, cache_dir=ASSET_CACHE_DIR, workers=ASSET_LOADER_THREADS, atlas_dir=ATLAS_DIR):
+        """
+        :param cache_dir: 解码结果的磁盘缓存目录 (相对项目根目录)，为 None 时不使用缓存
+        :param workers: 解码线程数
+        :param atlas_dir: 纹理图集目录 (相对项目根目录)，为 None 时序列帧全部在运行时切割
+        """
+        # 图片索引：Key = 文件名(无后缀), Value = 文件路径 (启动时只扫描，不解码)
+        self.image_index = {}
+        # [优化] 统一图片仓库：首次 get_image 时才加载，按字节预算 LRU 淘汰
+        # 淘汰时一并释放由它切出的帧和变换结果，否则旧图片仍被引用，预算形同虚设
+        self.images = ImageStore(ASSET_IMAGE_BUDGET_MB * 1024 * 1024, on_evict=self._on_image_evicted)
+        for key in ASSET_PINNED_IMAGES:
+            self.images.pin(key)
+        self._prefetching = {}  # key -> Future，后台解码中的图片
+        self._prefetch_pool = None
+        self._pinned_keys = list(ASSET_PINNED_IMAGES)
+        self._enemy_pins = set()
+        # [优化] 纹理图集：序列帧裁掉透明边后打包在少量图集页中 (由 python -m src.atlas 构建)
+        self.atlas = None
+        self._strips = {}  # (key, 切帧参数) -> (来源 Surface, FrameStrip)，同一张序列帧的所有使用者共享
+        # 变换缓存预热：常驻图片 Key (大图或图集页) -> [(序列帧 Key, data), ...]，来自 JSON 中的缩放倍率
+        self._warm_specs = {}
         # 统一音频仓库
         self.sounds = {}
         # 数据仓库
         self.data = {
             'upgrades': {}, # Key = ID (int)
             'enemies': {},
-            'weapons': {}
+            'weapons': {},
+            'waves': {}
         }
         
         self.base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.assets_path = os.path.join(self.base_path, 'assets')
+        # [优化] 解码在线程池中进行，主线程只负责 convert_alpha；解码结果缓存到磁盘
+        self.workers = workers
+        self.cache = AssetCache(os.path.join(self.base_path, cache_dir)) if cache_dir else None
+        self.atlas_dir = os.path.join(self.base_path, atlas_dir) if atlas_dir else None
 
     def load_all(self):
         print(f"--- System: Loading Assets from {self.assets_path} ---")
         
-        # 1. 递归加载所有图形资源 (不分文件夹，建立全局索引)
-        graphics_path = os.path.join(self.assets_path, 'graphics')
-        self._load_graphics_recursive(graphics_path)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='asset') as pool:
+            # 0. 音频解码先提交，与图片解码并行
+            pending_audio = self._submit_audio(pool)
+
+            # 1. 建立图片索引、读取图集元数据和 JSON 配置，只预加载固定的常用图片
+            # (图集中的序列帧改为加载其所在的图集页)
+            self.load_index()
+            self._preload_images(self._pinned_keys, pool)
+            
+            # 2. 加载音频资源
+            self._collect_audio(pending_audio)
+
+        # 3. 预先缩放已加载的序列帧 (其余的在预取完成时再缩放)
+        warmed = sum(self.warm_transforms(key) for key in list(self._warm_specs) if key in self.images)
+
+        if DEBUG and self.cache is not None:
+            print(f"[DEBUG] Asset cache: {self.cache.hits} hits, {self.cache.misses} misses")
+        if DEBUG:
+            print(f"[DEBUG] Transform warm-up: {warmed} surfaces, {TRANSFORMS.bytes / 1048576:.1f}MB")
         
-        # 2. 加载音频资源
-        self._load_audio()
+        print("--- System: Asset Loading Complete ---")
+
+    def load_index(self):
+        """
+        扫描图形资源、读取图集元数据和 JSON 配置 (不解码任何图片)
+        构建图集时也只需要这一步
+        """
+        # 递归扫描所有图形资源 (不分文件夹，建立全局索引)
+        graphics_path = os.path.join(self.assets_path, 'graphics')
+        self._index_graphics_recursive(graphics_path)
+        self._load_atlas()
         
-        # 3. 加载 JSON 配置
-        # 必须确保 JSON 中的 "image" 字段的值，在上面的 self.images 中能找到 Key
+        # 加载 JSON 配置
+        # 必须确保 JSON 中的 "image" 字段的值，在上面的 self.image_index 中能找到 Key
         self._load_json('upgrades.json', 'upgrades', ID_RANGE_UPGRADE)
         self._load_json('enemies.json', 'enemies', ID_RANGE_ENEMY)
         self._load_json('weapons.json', 'weapons', ID_RANGE_WEAPON)
-        
-        print("--- System: Asset Loading Complete ---")
+        self._load_json('waves.json', 'waves', ID_RANGE_WAVE)
+        self._index_warm_specs()
+
+    def _index_warm_specs(self):
+        """
+        收集 JSON 中已知的 (序列帧, 缩放) 组合：敌人按 data.scale 绘制，环绕物和光环按 data.scale 绘制
+        (子弹由 ProjectileFrameCache 按角度缓存，不在这里处理)
+        """
+        self._warm_specs.clear()
+        sheets = [data for data in self.data['enemies'].values() if 'image' in data]
+        sheets += [data for data in self.data['weapons'].values() if data.get('type') in ('orbital', 'aura')]
+        for data in sheets:
+            key = data.get('effect', data['image']).lower()
+            frame_data = data.get('data', {})
+            if frame_data.get('scale', 1.0) == 1.0 or key not in self.image_index:
+                continue
+            source = self._resolve_keys([key])[0]
+            specs = self._warm_specs.setdefault(source, [])
+            if (key, frame_data) not in specs:
+                specs.append((key, frame_data))
 
-    def _load_graphics_recursive(self, folder_path):
+    def warm_transforms(self, source_key):
+        """
+        按 JSON 中的倍率预先缩放一张已加载图片 (大图或图集页) 上的序列帧，放入共享变换缓存
+        :return: 新缩放的帧数
+        """
+        count = 0
+        for key, frame_data in self._warm_specs.get(source_key, ()):
+            count += TRANSFORMS.warm_up(self.get_frames(key, frame_data).frames, frame_data['scale'])
+        return count
+
+    def _load_atlas(self):
+        """读取图集元数据，图集页登记到图片索引，常驻的序列帧改为固定其所在的图集页"""
+        if self.atlas_dir is None:
+            return
+        self.atlas = TextureAtlas.load(self.atlas_dir, self.assets_path)
+        if self.atlas is None:
+            return
+        for page_key, path in self.atlas.page_keys():
+            self.image_index[page_key] = path
+        self._pinned_keys = self._resolve_keys(ASSET_PINNED_IMAGES)
+        for key in self._pinned_keys:
+            self.images.pin(key)
+        if DEBUG:
+            print(f"[DEBUG] Atlas: {len(self.atlas.sheets)} sheets on {len(self.atlas.pages)} page(s)")
+
+    def _resolve_keys(self, keys):
+        """把图集中的序列帧 Key 换成其所在图集页的 Key (去重，保持顺序)"""
+        resolved = {}
+        for key in keys:
+            if self.atlas is not None and key in self.atlas:
+                key = self.atlas.page_key(key)
+            resolved[key] = None
+        return list(resolved)
+
+    def _index_graphics_recursive(self, folder_path):
         """
         递归扫描文件夹，支持 .png, .jpg, .jpeg, .svg
-        Key 为文件名（小写，不含后缀）
+        Key 为文件名（小写，不含后缀），只记录路径，图片在首次使用时加载
         """
         supported_ext = ('.png', '.jpg', '.jpeg', '.svg')
         
@@ -49,29 +155,68 @@ class ResourceManager:
                 if file.lower().endswith(supported_ext):
                     # 获取不带后缀的文件名作为 Key
                     file_name_no_ext = os.path.splitext(file)[0].lower()
-                    full_path = os.path.join(root, file)
                     
-                    try:
-                        # SVG 文件需要特殊处理
-                        if file.lower().endswith('.svg'):
-                            surf = self._load_svg(full_path)
-                        else:
-                            surf = pygame.image.load(full_path).convert_alpha()
-                        
-                        # 检查重名冲突 (Warn only)
-                        if file_name_no_ext in self.images:
-                            print(f"[WARNING] Duplicate filename found: {file_name_no_ext}. Overwriting.")
-                        
-                        self.images[file_name_no_ext] = surf
-                        
-                    except Exception as e:
-                        print(f"[ERROR] Failed to load image {full_path}: {e}")
+                    # 检查重名冲突 (Warn only)
+                    if file_name_no_ext in self.image_index:
+                        print(f"[WARNING] Duplicate filename found: {file_name_no_ext}. Overwriting.")
+                    
+                    self.image_index[file_name_no_ext] = os.path.join(root, file)
+
+    def _preload_images(self, keys, pool):
+        """在线程池中并行解码一批图片，主线程按顺序 convert_alpha 后放入仓库"""
+        pending = [(key, pool.submit(self._decode_image, self.image_index[key]))
+                   for key in keys if key in self.image_index and key not in self.images]
+        for key, future in pending:
+            self._store_decoded(key, future)
+
+    def _store_decoded(self, key, future):
+        """
+        (主线程) 取出解码结果，convert_alpha 后放入仓库
+        :return: Surface，加载失败返回 None
+        """
+        try:
+            surf, decoded = future.result()
+        except Exception as e:
+            log.error('assets', "Failed to load image %s: %s", self.image_index[key], e)
+            return None
+        # convert_alpha 需要在主线程进行；占位符保持原样
+        if decoded:
+            surf = surf.convert_alpha()
+        self.images.put(key, surf)
+        return surf
+
+    def _decode_image(self, full_path):
+        """
+        (工作线程) 读取并解码一张图片，优先使用磁盘缓存
+        :return: (Surface, 是否解码成功)，SVG 加载失败时返回洋红色占位符
+        """
+        if self.cache is not None:
+            surf = self.cache.load_image(full_path)
+            if surf is not None:
+                return surf, True
+
+        if full_path.lower().endswith('.svg'):
+            # SVG 文件需要特殊处理
+            surf = self._load_svg(full_path)
+            if surf is None:
+                surf = pygame.Surface((200, 100))
+                surf.fill((255, 0, 255))
+                return surf, False
+        else:
+            surf = pygame.image.load(full_path)
+
+        if self.cache is not None:
+            self.cache.save_image(full_path, surf)
+        return surf, True
     
     def _load_svg(self, svg_path):
-        """加载 SVG 文件，尝试使用 pygame 直接加载，失败则使用备用方法"""
+        """
+        加载 SVG 文件，尝试使用 pygame 直接加载，失败则使用备用方法
+        :return: 未 convert 的 Surface，失败返回 None
+        """
         try:
             # pygame-ce 2.5+ 可能支持 SVG，先尝试直接加载
-            return pygame.image.load(svg_path).convert_alpha()
+            return pygame.image.load(svg_path)
         except Exception as load_error:
             # 如果直接加载失败，尝试使用 cairosvg（如果可用）
             try:
@@ -80,20 +225,14 @@ class ResourceManager:
                 # 将 SVG 转换为 PNG 字节流
                 png_data = cairosvg.svg2png(url=svg_path)
                 # 从字节流创建 Surface
-                return pygame.image.load(io.BytesIO(png_data)).convert_alpha()
+                return pygame.image.load(io.BytesIO(png_data))
             except ImportError:
                 # 如果 cairosvg 不可用，尝试直接加载（可能 pygame 支持但需要特定格式）
                 print(f"[WARNING] SVG loading failed. Try installing cairosvg: pip install cairosvg")
-                # 返回一个占位符
-                surf = pygame.Surface((200, 100))
-                surf.fill((255, 0, 255))
-                return surf
+                return None
             except Exception as e:
                 print(f"[ERROR] Failed to load SVG {svg_path}: {e}")
-                # 返回一个占位符
-                surf = pygame.Surface((200, 100))
-                surf.fill((255, 0, 255))
-                return surf
+                return None
 
     def _load_json(self, filename, target_key, id_range):
         """通用 JSON 加载器"""
@@ -118,7 +257,7 @@ class ResourceManager:
                 # 检查 item['image'] 是否在 self.images 里，如果不在，打印警告
                 if 'image' in item:
                     img_key = item['image'].lower()
-                    if img_key not in self.images:
+                    if img_key not in self.image_index:
                         print(f"[WARNING] Asset '{img_key}' referenced in {filename} not found in graphics.")
                 
                 self.data[target_key][u_id] = item
@@ -128,8 +267,18 @@ class ResourceManager:
 
     def _load_audio(self):
         """加载音频资源（BGM 和 SFX）"""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='asset') as pool:
+            self._collect_audio(self._submit_audio(pool))
+
+    def _submit_audio(self, pool):
+        """
+        扫描音频目录，把 SFX 解码任务提交到线程池
+        :return: [(key, 路径, Future 或 None), ...]，BGM 的 Future 为 None (只保存路径)
+        """
         # 初始化 pygame mixer
         pygame.mixer.init()
+        mixer_format = pygame.mixer.get_init()
+        pending = []
         
         # 加载 BGM
         bgm_path = os.path.join(self.assets_path, 'audio', 'bgm')
@@ -137,13 +286,8 @@ class ResourceManager:
             for file in os.listdir(bgm_path):
                 if file.lower().endswith(('.mp3', '.ogg', '.wav')):
                     file_name_no_ext = os.path.splitext(file)[0].lower()
-                    full_path = os.path.join(bgm_path, file)
-                    try:
-                        # BGM 使用 pygame.mixer.music 加载，但我们也保存路径
-                        self.sounds[file_name_no_ext] = full_path
-                        print(f"[AUDIO] Loaded BGM: {file_name_no_ext}")
-                    except Exception as e:
-                        print(f"[ERROR] Failed to load BGM {full_path}: {e}")
+                    # BGM 使用 pygame.mixer.music 流式播放，只保存路径
+                    pending.append((file_name_no_ext, os.path.join(bgm_path, file), None))
         
         # 加载 SFX
         sfx_path = os.path.join(self.assets_path, 'audio', 'sfx')
@@ -152,25 +296,154 @@ class ResourceManager:
                 if file.lower().endswith(('.mp3', '.ogg', '.wav')):
                     file_name_no_ext = os.path.splitext(file)[0].lower()
                     full_path = os.path.join(sfx_path, file)
-                    try:
-                        # SFX 使用 pygame.mixer.Sound 加载
-                        sound = pygame.mixer.Sound(full_path)
-                        self.sounds[file_name_no_ext] = sound
-                        print(f"[AUDIO] Loaded SFX: {file_name_no_ext}")
-                    except Exception as e:
-                        print(f"[ERROR] Failed to load SFX {full_path}: {e}")
+                    pending.append((file_name_no_ext, full_path,
+                                    pool.submit(self._decode_sound, full_path, mixer_format)))
+        return pending
+
+    def _decode_sound(self, full_path, mixer_format):
+        """(工作线程) 解码一个音效，优先使用磁盘缓存的 PCM 数据"""
+        if self.cache is not None:
+            sound = self.cache.load_sound(full_path, mixer_format)
+            if sound is not None:
+                return sound
+        # SFX 使用 pygame.mixer.Sound 加载
+        sound = pygame.mixer.Sound(full_path)
+        if self.cache is not None:
+            self.cache.save_sound(full_path, sound, mixer_format)
+        return sound
+
+    def _collect_audio(self, pending):
+        """按扫描顺序收集音频解码结果"""
+        for file_name_no_ext, full_path, future in pending:
+            try:
+                if future is None:
+                    self.sounds[file_name_no_ext] = full_path
+                    print(f"[AUDIO] Loaded BGM: {file_name_no_ext}")
+                else:
+                    self.sounds[file_name_no_ext] = future.result()
+                    print(f"[AUDIO] Loaded SFX: {file_name_no_ext}")
+            except Exception as e:
+                kind = 'BGM' if future is None else 'SFX'
+                print(f"[ERROR] Failed to load {kind} {full_path}: {e}")
 
     def get_image(self, key):
-        """安全获取图片，缺失返回洋红色方块"""
+        """安全获取图片 (未加载时同步加载)，缺失返回洋红色方块"""
         key = str(key).lower()
-        if key in self.images:
-            return self.images[key]
-        else:
+        surf = self.images.get(key)
+        if surf is not None:
+            return surf
+        if key in self._prefetching:
+            # 后台已经在解码，等它完成即可
+            surf = self._store_decoded(key, self._prefetching.pop(key))
+        elif key in self.image_index:
+            surf = self._load_image(key)
+        if surf is None:
             # 缺失素材时的 Fallback：洋红色方块
             surf = pygame.Surface((32, 32))
             surf.fill((255, 0, 255)) # 纯洋红
-            return surf
-    
+        return surf
+
+    def get_frames(self, key, data):
+        """
+        获取序列帧 (FrameStrip)
+        图集中有该图且切帧参数一致时，直接返回图集页上裁掉透明边的帧；否则从大图切帧
+        同一张序列帧的所有使用者共享同一组帧
+        :param data: 切帧参数，通常是 json 里的 "data" 字段
+        """
+        key = str(key).lower()
+        spec = sheet_spec(data)
+        in_atlas = self.atlas is not None and self.atlas.matches(key, spec)
+        # 每次都经过仓库取来源图片 (图集页或大图)，保持 LRU 顺序
+        source = self.get_image(self.atlas.page_key(key) if in_atlas else key)
+        # [优化] 帧对象保持稳定，共享变换缓存才能按帧命中；来源图片被淘汰后重新加载时帧也随之重建
+        cache_key = (key, *spec.values())
+        cached = self._strips.get(cache_key)
+        if cached is not None and cached[0] is source:
+            return cached[1]
+        strip = self.atlas.strip(key, source) if in_atlas else slice_strip(source, data)
+        self._strips[cache_key] = (source, strip)
+        return strip
+
+    def _on_image_evicted(self, key, surface):
+        """图片被仓库淘汰：丢掉从它切出的序列帧，以及以它或这些帧为源的变换缓存"""
+        released = [surface]
+        for cache_key, (source, strip) in list(self._strips.items()):
+            if source is surface:
+                del self._strips[cache_key]
+                released.extend(strip.frames)
+        TRANSFORMS.discard(released)
+
+    def strip_bytes(self):
+        """序列帧缓存引用着、但已不在仓库中的来源图片的字节数 (正常应为 0)"""
+        stored = {id(surface) for surface in self.images.surfaces()}
+        sources = {id(source): source for source, _ in self._strips.values() if id(source) not in stored}
+        return sum(ImageStore.surface_bytes(source) for source in sources.values())
+
+    def has_image(self, key):
+        """图片是否存在 (不触发加载)"""
+        return str(key).lower() in self.image_index
+
+    def find_images(self, prefix):
+        """返回所有以 prefix 开头的图片 Key (按扫描顺序)"""
+        prefix = prefix.lower()
+        return [key for key in self.image_index if key.startswith(prefix)]
+
+    def _load_image(self, key):
+        """(主线程) 同步加载一张图片"""
+        try:
+            surf, decoded = self._decode_image(self.image_index[key])
+        except Exception as e:
+            log.error('assets', "Failed to load image %s: %s", self.image_index[key], e)
+            return None
+        if decoded:
+            surf = surf.convert_alpha()
+        self.images.put(key, surf)
+        return surf
+
+    # ------------------------------------------------------------------
+    # 后台预取
+    # ------------------------------------------------------------------
+    def prefetch(self, keys):
+        """把图片提交到后台线程解码，完成后由 poll_prefetch 放入仓库"""
+        for key in keys:
+            key = str(key).lower()
+            if key in self.images or key in self._prefetching or key not in self.image_index:
+                continue
+            if self._prefetch_pool is None:
+                self._prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+            self._prefetching[key] = self._prefetch_pool.submit(self._decode_image, self.image_index[key])
+
+    def poll_prefetch(self, limit=ASSET_PREFETCH_PER_FRAME):
+        """
+        (每帧调用) 把已解码完成的预取图片 convert_alpha 后放入仓库
+        :param limit: 每次最多处理的图片数，避免单帧卡顿
+        """
+        if not self._prefetching:
+            return
+        done = [key for key, future in self._prefetching.items() if future.done()][:limit]
+        for key in done:
+            if self._store_decoded(key, self._prefetching.pop(key)) is not None:
+                self.warm_transforms(key)
+
+    def prefetch_enemy_sheets(self, enemy_ids):
+        """
+        预取并固定这些敌人的贴图 (在图集中的换成其所在图集页)，解除其余敌人贴图的固定
+        :param enemy_ids: 通常为 WaveDirector.upcoming_enemies() 的结果
+        """
+        enemies = self.data['enemies']
+        wanted = set(self._resolve_keys(sorted(
+            enemies[e_id]['image'].lower() for e_id in enemy_ids
+            if e_id in enemies and 'image' in enemies[e_id])))
+        if wanted == self._enemy_pins:
+            return
+        for key in self._enemy_pins - wanted:
+            if key not in self._pinned_keys:
+                self.images.unpin(key)
+        for key in wanted:
+            self.images.pin(key)
+        self._enemy_pins = wanted
+        self.prefetch(sorted(wanted))
+
     def get_sound(self, key):
         """安全获取音效"""
         key = str(key).lower()
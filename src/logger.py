@@ -0,0 +1,153 @@
+"""
+日志系统 - 替代游戏循环中的 print
+用法：
+    from src.logger import log
+    log.debug('enemy', "Enemy hit! Damage: %s, Remaining HP: %s", amount, hp)
+1. 按类别 (category) 设置等级，低于等级的消息在调用处直接返回，不做任何格式化
+2. 消息以 (等级, 类别, 模板, 参数) 的形式放入环形缓冲区，格式化和输出都在后台线程完成
+3. 缓冲区满时丢弃最旧的消息，主线程永远不会因为输出而阻塞
+"""
+import sys
+import atexit
+import threading
+from collections import deque
+from src.settings import LOG_LEVEL, LOG_CATEGORY_LEVELS, LOG_BUFFER_SIZE, LOG_FLUSH_INTERVAL
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR, 'OFF': OFF}
+_LEVEL_LABELS = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+
+def _to_level(level):
+    """'DEBUG' / 10 -> 10"""
+    if isinstance(level, str):
+        return LEVEL_NAMES[level.upper()]
+    return level
+
+
+class Logger:
+    """
+    分类别、分等级、后台输出的日志器
+    """
+    def __init__(self, default_level=LOG_LEVEL, category_levels=None, buffer_size=LOG_BUFFER_SIZE,
+                 flush_interval=LOG_FLUSH_INTERVAL, stream=None):
+        """
+        :param default_level: 未单独设置的类别使用的等级
+        :param category_levels: {类别: 等级}，如 {'audio': 'INFO'}
+        :param buffer_size: 环形缓冲区容量 (条)
+        :param flush_interval: 后台线程的输出间隔（秒）
+        :param stream: 输出流，为 None 时每次输出使用当前的 sys.stdout
+        """
+        self.default_level = _to_level(default_level)
+        self.levels = {}
+        for category, level in (category_levels or {}).items():
+            self.levels[category] = _to_level(level)
+        self.buffer = deque(maxlen=buffer_size)
+        self.flush_interval = flush_interval
+        self.stream = stream
+        self.dropped = 0  # 因缓冲区满被丢弃的消息数
+
+        self._lock = threading.Lock()  # 保证同一时间只有一个线程在输出
+        self._wake = threading.Event()
+        self._writer = None
+
+    # ------------------------------------------------------------------
+    # 等级
+    # ------------------------------------------------------------------
+    def set_level(self, category, level):
+        """设置某个类别的等级 (category 为 None 时设置默认等级)"""
+        if category is None:
+            self.default_level = _to_level(level)
+        else:
+            self.levels[category] = _to_level(level)
+
+    def is_enabled(self, category, level):
+        """该类别的该等级消息是否会输出 (用于跳过昂贵的参数准备)"""
+        return level >= self.levels.get(category, self.default_level)
+
+    # ------------------------------------------------------------------
+    # 记录
+    # ------------------------------------------------------------------
+    def log(self, level, category, message, *args):
+        """
+        记录一条消息（只入队，不格式化）
+        :param message: 模板，使用 % 风格占位符
+        :param args: 模板参数，在后台线程中才会格式化
+        """
+        if level < self.levels.get(category, self.default_level):
+            return
+        buffer = self.buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append((level, category, message, args))
+        if self._writer is None:
+            self._start_writer()
+        if level >= ERROR:
+            # 错误立刻输出，避免崩溃时丢失
+            self._wake.set()
+
+    def debug(self, category, message, *args):
+        self.log(DEBUG, category, message, *args)
+
+    def info(self, category, message, *args):
+        self.log(INFO, category, message, *args)
+
+    def warning(self, category, message, *args):
+        self.log(WARNING, category, message, *args)
+
+    def error(self, category, message, *args):
+        self.log(ERROR, category, message, *args)
+
+    # ------------------------------------------------------------------
+    # 输出
+    # ------------------------------------------------------------------
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._writer_loop, name='log-writer', daemon=True)
+        self._writer.start()
+
+    def _writer_loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    @staticmethod
+    def _format(level, category, message, args):
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError) as e:
+                message = f"{message} {args} (format error: {e})"
+        return f"[{_LEVEL_LABELS.get(level, level)}][{category}] {message}\n"
+
+    def flush(self):
+        """把缓冲区中的消息全部格式化并输出 (后台线程定期调用，退出时也会调用)"""
+        with self._lock:
+            buffer = self.buffer
+            if not buffer and not self.dropped:
+                return
+            lines = []
+            if self.dropped:
+                lines.append(f"[WARNING][log] {self.dropped} messages dropped (buffer full)\n")
+                self.dropped = 0
+            while buffer:
+                try:
+                    lines.append(self._format(*buffer.popleft()))
+                except IndexError:
+                    break
+            stream = self.stream or sys.stdout
+            try:
+                stream.write(''.join(lines))
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+
+
+# 全局日志器：DEBUG 关闭时默认只输出 WARNING 及以上
+log = Logger(category_levels=LOG_CATEGORY_LEVELS)
+atexit.register(log.flush)
@@ -2,7 +2,10 @@
 import pygame
 import random
 from src.settings import *
-from src.components import Tile, AnimatedTile, Shadow
+from src.components import Tile, AnimatedTile, Shadow, GroundLayer
+from src.spatial import OccupancyGrid, SpawnIndex
+from src.logger import log
+from src.asset_cache import TRANSFORMS
 
 class MapManager:
     def __init__(self, game, map_width=80, map_height=60):
@@ -13,6 +16,10 @@ class MapManager:
         # 网格数据: 0=空/草地, 1=墙, 2=水, 3=树, 4=装饰
         self.grid = {} 
         self.spawn_point = (0, 0)
+        # [优化] 静态障碍物占用网格 (墙、树)，对象在地图重建时复用，外部可长期持有引用
+        self.obstacle_grid = OccupancyGrid(map_width, map_height)
+        # [优化] 可出生格子的索引，每张地图生成后重建一次
+        self.spawn_index = SpawnIndex()
 
     def _has_obstacle_in_range(self, x, y, grid):
         """检查目标位置周围2x2范围内是否有障碍物"""
@@ -24,8 +31,9 @@ class MapManager:
 
     def generate_forest(self):
         """生成森林地图"""
-        print("[Map] Generating Forest...")
+        log.info('map', "Generating Forest...")
         self.grid = {}
+        self.obstacle_grid.clear()
         
         # 1. 填充基础地面 (虚拟填充，实际只存特殊块)
         # 我们默认所有坐标都是草地，只记录墙、水、树
@@ -70,6 +78,7 @@ class MapManager:
                 
         # 7. 实例化到游戏世界
         self._instantiate_map()
+        self.spawn_index.build(self.obstacle_grid)
 
     def _instantiate_map(self):
         """将 Grid 数据转为 Sprite"""
@@ -81,22 +90,22 @@ class MapManager:
         
         # 调试：检查地板图片是否正确加载
         if img_floor is None:
-            print("[ERROR] tile_grass image not loaded!")
+            log.error('map', "tile_grass image not loaded!")
         else:
-            print(f"[DEBUG] tile_grass loaded: {img_floor.get_size()}")
+            log.debug('map', "tile_grass loaded: %s", img_floor.get_size())
             
         # 装饰列表 (扫描所有 deco_ 开头的)
         deco_images = []
-        for key, surf in res.images.items():
-            if key.startswith('deco_'):
-                deco_images.append(surf)
+        for key in res.find_images('deco_'):
+            deco_images.append(res.get_image(key))
                 
         if not deco_images: # 兜底
             deco_images.append(pygame.Surface((32, 32))) 
+        # 将装饰物缩放到 64x64 (每种只缩放一次)
+        deco_images = [TRANSFORMS.scale(img, (64, 64), smooth=True) for img in deco_images]
         
         # 阴影
-        img_shadow = pygame.transform.scale(res.get_image('shadows'), (24, 12))
-        img_shadow.set_alpha(80)
+        img_shadow = TRANSFORMS.scale(res.get_image('shadows'), (24, 12), alpha=80)
 
         # 树木(8帧, 宽1536 -> 单帧192) 
         # 缩放到 0.3 -> 57x76 (约占 2x2 格)
@@ -109,6 +118,12 @@ class MapManager:
         
         # --- 实例化 ---
         
+        # [优化] 地板和装饰物是静态的，直接烘焙进分块地面层，不再创建 Tile 精灵
+        # 地板图可能大于一个格子，最后一行/列会向外延伸，地面层范围要包含这部分
+        layer_w = self.width * TILE_SIZE + max(0, img_floor.get_width() - TILE_SIZE)
+        layer_h = self.height * TILE_SIZE + max(0, img_floor.get_height() - TILE_SIZE)
+        ground_layer = GroundLayer(layer_w, layer_h)
+        
         # 铺地板 - 修复：铺满整个地图（包括边缘）
         # 原代码使用 width-1 和 height-1，导致缺少最后一列和最后一行地板
         # 修复为 width 和 height，确保铺满整个地图
@@ -116,9 +131,9 @@ class MapManager:
         for x in range(self.width):
             for y in range(self.height):
                 pos = (x * TILE_SIZE, y * TILE_SIZE)
-                Tile(pos, [self.game.all_sprites], 'floor', surface=img_floor)
+                ground_layer.blit(img_floor, pos)
                 floor_count += 1
-        print(f"[DEBUG] Created {floor_count} floor tiles")
+        log.debug('map', "Baked %s floor tiles into %s ground chunks", floor_count, len(ground_layer.chunks))
         
         # 生成物件
         for coords, type_name in self.grid.items():
@@ -128,36 +143,38 @@ class MapManager:
             if type_name == 'wall':
                 # 墙壁 (带高墙逻辑)
                 # 传入 scale_to_width=32，让高墙自动按比例缩放
-                Tile(pos, [self.game.all_sprites, self.game.obstacle_sprites], 'wall', 
-                     surface=img_wall, scale_to_width=TILE_SIZE)
+                wall = Tile(pos, [self.game.all_sprites, self.game.obstacle_sprites], 'wall', 
+                            surface=img_wall, scale_to_width=TILE_SIZE)
+                self.obstacle_grid.add_obstacle(coords, wall.hitbox)
                 
             elif type_name == 'deco':
-                # 随机选一个装饰
+                # 随机选一个装饰 (已缩放到 64x64)
                 img = random.choice(deco_images)
-                # 将装饰物缩放到 64x64
-                img_scaled = pygame.transform.smoothscale(img, (64, 64))
                 # 调整位置使装饰物居中在网格上（装饰物64x64，网格32x32，需要向左上偏移16像素）
                 deco_pos = (pos[0] - 16, pos[1] - 16)
-                # 创建装饰物 Tile，放在 ground 层
-                Tile(deco_pos, [self.game.all_sprites], 'deco', surface=img_scaled)
+                # 装饰物属于 ground 层，同样烘焙进地面层
+                ground_layer.blit(img, deco_pos)
             
             elif type_name == 'tree':
                 # 随机选一种树
                 cfg = random.choice(tree_configs)
-                raw_surf = res.get_image(cfg['key'])
                 frame_data = {
                     'frames': cfg['frames'], 
                     'frame_width': cfg['frame_width'], 
                     'speed': 5
                 }
+                # [优化] 有图集时直接取裁掉透明边的帧
+                frames = res.get_frames(cfg['key'], frame_data)
                 # 树木通常向上生长，所以 offset_y 设为负数，让根部对齐格子
                 offset = (0, cfg.get('offset_y', -30))
                 
-                AnimatedTile(pos, [self.game.all_sprites, self.game.obstacle_sprites], 'tree',
-                             surface=raw_surf, frame_data=frame_data, 
-                             visual_scale=cfg['scale'], offset=offset)
+                tree = AnimatedTile(pos, [self.game.all_sprites, self.game.obstacle_sprites], 'tree',
+                                    surface=frames, frame_data=frame_data, 
+                                    visual_scale=cfg['scale'], offset=offset)
+                self.obstacle_grid.add_obstacle(coords, tree.hitbox)
                 
                 # 手动加阴影 (位置可能需要根据树的 scale 微调)
-                Shadow(self.game.all_sprites.sprites()[-1], [self.game.all_sprites], img_shadow)
-                
-        
+                Shadow(tree, [self.game.all_sprites], img_shadow)
+
+        # 地面层交给渲染组，每帧只绘制可见的块
+        self.game.all_sprites.set_ground_layer(ground_layer)
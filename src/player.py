@@ -3,10 +3,16 @@ import math
 from src.settings import *
 from src.components import Entity
 from src.weapon import WeaponController
-from src.vfx import FlashEffect
+from src.input_source import InputSource
+from src.logger import log
+from src.asset_cache import TRANSFORMS
+from src.scheduler import PRIORITY_HIGH
+from src.sim_clock import SIM_CLOCK
 
 class FloatingWeapon(pygame.sprite.Sprite):
     """纯装饰用的悬浮武器"""
+    image_offset = (0, 0)
+
     def __init__(self, groups, image, player, angle_offset, distance=50):
         # 放在 vfx_top 层，不挡住玩家
         super().__init__(groups)
@@ -31,7 +37,7 @@ class FloatingWeapon(pygame.sprite.Sprite):
         
         # [修改] 距离计算：基于角色大小 + 基础距离 + 呼吸浮动
         base_dist = (self.player.hitbox.width / 2) + 15 
-        t = pygame.time.get_ticks() / 300
+        t = SIM_CLOCK.ticks / 300
         hover_offset = math.sin(t + self.angle_offset) * 3
         
         final_dist = base_dist + hover_offset
@@ -43,10 +49,13 @@ class FloatingWeapon(pygame.sprite.Sprite):
 
 
 class Player(Entity):
-    def __init__(self, pos, groups, obstacle_sprites, enemy_sprites, resource_manager):
+    def __init__(self, pos, groups, obstacle_sprites, enemy_sprites, resource_manager, spatial_grid=None,
+                 obstacle_grid=None, input_source=None, scheduler=None):
         super().__init__(groups, pos, z_layer=LAYERS['main'])
         
         self.res = resource_manager
+        # 输入源 (默认直接读取键鼠；无窗口测试时传入 ScriptedInput)
+        self.input_source = input_source if input_source is not None else InputSource()
         
         # 动画状态机
         self.status = 'down'
@@ -59,11 +68,9 @@ class Player(Entity):
         self.image = self.animations[self.status][0]
         self.rect = self.image.get_rect(topleft=pos)
         self.hitbox = self.rect.inflate(-4, -10) # 针对16x20的小人微调碰撞箱
-        self.set_obstacles(obstacle_sprites)
+        self.set_obstacles(obstacle_sprites, obstacle_grid)
         # 生成阴影
-        shadow_img = self.res.get_image('shadows')
-        shadow_img = pygame.transform.scale(shadow_img, (24, 10))
-        shadow_img.set_alpha(100)
+        shadow_img = TRANSFORMS.scale(self.res.get_image('shadows'), (24, 10), alpha=100)
         
         from src.components import Shadow # 局部导入防循环，或放顶部
         Shadow(self, groups, shadow_img)
@@ -86,8 +93,12 @@ class Player(Entity):
         self.last_hit_time = 0
         
         # 武器接口
+        # spatial_grid 是敌人的空间网格，只交给武器做查询，玩家自己不注册进去
+        # scheduler 是延后任务调度器，武器精灵和悬浮武器的重建放在里面执行
+        self.scheduler = scheduler
         self.weapon_controller = WeaponController(self, groups, enemy_sprites, 
-                        obstacle_sprites, resource_manager)
+                        obstacle_sprites, resource_manager, spatial_grid=spatial_grid,
+                        obstacle_grid=obstacle_grid, scheduler=scheduler)
         
         # 悬浮武器组
         self.floating_weapons = pygame.sprite.Group()
@@ -109,6 +120,15 @@ class Player(Entity):
         if proj_ids == self.visual_weapon_cache:
             return
         self.visual_weapon_cache = proj_ids.copy()
+        # [优化] 重建 (缩放图标、新建精灵) 放到延后任务中，连续变化时只重建最后一次
+        if self.scheduler is None:
+            self._rebuild_floating_weapons(proj_ids)
+        else:
+            self.scheduler.submit(self._rebuild_floating_weapons, proj_ids, priority=PRIORITY_HIGH,
+                                  key=self._rebuild_floating_weapons)
+
+    def _rebuild_floating_weapons(self, proj_ids):
+        """按发射型武器列表重新生成悬浮武器"""
         # 清空旧的
         for s in self.floating_weapons: s.kill()
         self.floating_weapons.empty()
@@ -121,9 +141,8 @@ class Player(Entity):
         for i, w_id in enumerate(proj_ids):
             w_data = self.res.data['weapons'].get(w_id)
             # 使用 ICON 图像
-            img = self.res.get_image(w_data['image'])
             # 缩小一点
-            img = pygame.transform.scale(img, (24, 24))
+            img = TRANSFORMS.scale(self.res.get_image(w_data['image']), (24, 24))
             
             FloatingWeapon(
                 groups=[self.groups()[0], self.floating_weapons], # 加入 all_sprites 以便被绘制
@@ -135,7 +154,7 @@ class Player(Entity):
 
     def input(self):
         """处理键盘输入"""
-        keys = pygame.key.get_pressed()
+        keys = self.input_source.get_pressed()
 
         # 移动输入
         if keys[pygame.K_w]:
@@ -203,7 +222,7 @@ class Player(Entity):
         self.rect = self.image.get_rect(center=self.hitbox.center)
     def get_mouse_direction(self):
         """计算鼠标相对于屏幕中心的角度，并改变朝向图片"""
-        mouse_pos = pygame.math.Vector2(pygame.mouse.get_pos())
+        mouse_pos = pygame.math.Vector2(self.input_source.get_mouse_pos())
         screen_center = pygame.math.Vector2(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
         diff = mouse_pos - screen_center
         
@@ -247,7 +266,7 @@ class Player(Entity):
 
     def take_damage(self, amount):
         """受击逻辑"""
-        current_time = pygame.time.get_ticks()
+        current_time = SIM_CLOCK.ticks
         if current_time - self.last_hit_time < self.iframes:
             return
 
@@ -256,8 +275,8 @@ class Player(Entity):
         if self.current_hp < 0:
             self.current_hp = 0
         self.last_hit_time = current_time
-        print(f"[DEBUG] Player hit! HP: {self.current_hp}")
-        FlashEffect(self, [self.groups()[0]], duration=0.2)
+        log.debug('player', "Player hit! HP: %s", self.current_hp)
+        self.flash(0.2)
 
         if self.current_hp <= 0:
             self.is_dead = True
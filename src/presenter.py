@@ -0,0 +1,82 @@
+"""
+画面提交
+PLAYING 等每帧都在变化的状态：整屏重画并 pygame.display.update()
+菜单、暂停、结算、升级、教程等静态状态 [优化]：
+1. 各控件的外观 (悬停、缩放动画帧、图标) 都没变时不重画画面，只用快照擦掉旧光标、画上新光标
+2. 只把变化的区域 (外观变化的控件、光标的新旧位置) 传给 pygame.display.update(rects)
+"""
+import pygame
+
+
+class Presenter:
+    def __init__(self, screen):
+        self.screen = screen
+        self.static_key = None  # 当前静态画面的标识 (游戏状态)，None 表示动态画面
+        self.snapshot = None  # 静态画面不含光标的快照
+        self.appearance = {}  # {控件 Key: 外观签名}
+        self.cursor_rect = None  # 上一帧光标绘制的区域
+        self.full = True  # 本帧是否整屏提交
+        self.dirty = []  # 本帧的脏矩形 (不含光标)
+
+    def invalidate(self):
+        """下一帧强制整屏重画 (窗口被遮挡后重新显示、进入静态状态或界面内容重建等)"""
+        self.static_key = None
+        self.snapshot = None
+
+    def begin_frame(self, static_key, widgets):
+        """
+        决定本帧是否需要重画画面
+        :param static_key: 静态画面的标识 (通常是游戏状态)，动态画面传 None
+        :param widgets: [(控件 Key, 外观签名, 脏矩形), ...]，即 UI.update_widgets 的返回值
+        :return: True 表示需要重画 (之后调用 capture)，False 表示画面沿用快照
+        """
+        appearance = {key: state for key, state, _ in widgets}
+        self.dirty = []
+        if static_key is None or static_key != self.static_key or self.snapshot is None:
+            # 动态画面，或刚进入静态状态：整屏重画
+            self.full = True
+            self.static_key = static_key
+            self.snapshot = None
+            self.appearance = appearance
+            return True
+
+        self.full = False
+        for key, state, rect in widgets:
+            if self.appearance.get(key) != state:
+                self.dirty.append(rect)
+        self.appearance = appearance
+        if self.dirty:
+            return True
+        # 画面不变：用快照擦掉上一帧的光标
+        if self.cursor_rect is not None:
+            self.screen.blit(self.snapshot, self.cursor_rect, self.cursor_rect)
+        return False
+
+    def capture(self):
+        """重画完成 (画光标之前) 调用：静态画面保存快照"""
+        if self.static_key is None:
+            return
+        if self.snapshot is None:
+            self.snapshot = self.screen.copy()
+        else:
+            # 只有脏矩形内的内容变了
+            for rect in self.dirty:
+                self.snapshot.blit(self.screen, rect, rect)
+
+    def present(self, cursor_rect):
+        """
+        提交画面
+        :param cursor_rect: 本帧光标绘制的区域
+        """
+        previous = self.cursor_rect
+        self.cursor_rect = cursor_rect
+        if self.full:
+            pygame.display.update()
+            return
+        rects = list(self.dirty)
+        if cursor_rect != previous:
+            if previous is not None:
+                rects.append(previous)
+            rects.append(cursor_rect)
+        if rects:
+            pygame.display.update(rects)
@@ -0,0 +1,250 @@
+"""
+帧性能分析器 - 统计每帧各子系统 (精灵更新、敌人生成、世界绘制、HUD、屏幕刷新等) 的耗时
+用法：
+    with profiler.scope('spawner'):
+        self.enemy_spawner(dt)
+关闭时 scope() 返回一个共享的空上下文，几乎没有开销；
+开启后可在屏幕上叠加耗时曲线 (F3 切换)，并定期把窗口平均值追加到 CSV，方便对比不同版本
+"""
+import os
+import csv
+import time
+from collections import deque
+import pygame
+from src.settings import *
+from src.logger import log
+
+
+class _NullScope:
+    """分析器关闭时使用的空计时范围"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    """计时范围：退出时把耗时累加到分析器"""
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler:
+    """
+    帧性能分析器
+    每帧的数据以 {scope 名: 秒} 保存，精灵更新额外按类名统计
+    """
+    # 曲线图中各阶段的颜色，未列出的 scope 使用灰色
+    COLORS = {
+        'events': (120, 120, 120),
+        'swarm': (230, 120, 60),
+        'sprites': (220, 60, 60),
+        'spawner': (230, 200, 60),
+        'jobs': (200, 160, 90),
+        'world': (60, 160, 230),
+        'hud': (90, 220, 120),
+        'ui': (180, 100, 220),
+        'display': (240, 240, 240),
+    }
+
+    def __init__(self, enabled=PROFILER_ENABLED, history=PROFILER_HISTORY, csv_path=PROFILER_CSV_PATH,
+                 csv_interval=PROFILER_CSV_INTERVAL, csv_max_rows=PROFILER_CSV_MAX_ROWS):
+        """
+        :param enabled: 是否开启统计
+        :param history: 曲线图保留的帧数
+        :param csv_path: CSV 路径，为 None 时不导出
+        :param csv_interval: 每隔多少帧写一次窗口平均值
+        :param csv_max_rows: CSV 超过该行数时滚动为 .1 文件并重新开始
+        """
+        self.enabled = enabled
+        self.show_overlay = False
+        self.history = deque(maxlen=history)  # [(帧总耗时, {scope: 秒}), ...]
+        self.current = {}
+        self.class_costs = {}  # 当前窗口内每个精灵类的 update 总耗时
+        self.gauges = {}  # 非耗时的指标 (如延后任务队列深度)，保存最新值
+        self.frame_start = None
+        self.frame_count = 0
+
+        self.csv_path = csv_path
+        self.csv_interval = csv_interval
+        self.csv_max_rows = csv_max_rows
+        self.csv_rows = 0
+        self.window = {}  # 当前 CSV 窗口内各 scope 的总耗时
+        self.window_frames = 0
+        self.font = None
+
+    # ------------------------------------------------------------------
+    # 计时
+    # ------------------------------------------------------------------
+    def scope(self, name):
+        """返回计时范围 (with 语句使用)，关闭时返回空上下文"""
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _Scope(self, name)
+
+    def add(self, name, seconds):
+        """累加一个 scope 的耗时 (同一帧内可多次进入)"""
+        self.current[name] = self.current.get(name, 0.0) + seconds
+
+    def add_class_cost(self, class_name, seconds):
+        """累加某个精灵类的 update 耗时"""
+        self.class_costs[class_name] = self.class_costs.get(class_name, 0.0) + seconds
+
+    def gauge(self, name, value):
+        """记录一个指标的最新值，显示在叠加图底部并随 CSV 导出"""
+        if self.enabled:
+            self.gauges[name] = value
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.current = {}
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        total = time.perf_counter() - self.frame_start
+        self.frame_start = None
+        self.history.append((total, self.current))
+        self.frame_count += 1
+
+        for name, seconds in self.current.items():
+            self.window[name] = self.window.get(name, 0.0) + seconds
+        self.window['frame'] = self.window.get('frame', 0.0) + total
+        self.window_frames += 1
+        if self.window_frames >= self.csv_interval:
+            self.flush()
+
+    def toggle(self):
+        """切换分析器与叠加图 (关闭时把剩余数据写入 CSV)"""
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.enabled = True
+        else:
+            self.flush()
+            self.enabled = False
+            self.frame_start = None
+
+    # ------------------------------------------------------------------
+    # 导出
+    # ------------------------------------------------------------------
+    def get_averages(self):
+        """返回历史帧中各 scope 的平均耗时 (毫秒)，包含 'frame' 总耗时"""
+        if not self.history:
+            return {}
+        totals = {}
+        for frame_total, scopes in self.history:
+            totals['frame'] = totals.get('frame', 0.0) + frame_total
+            for name, seconds in scopes.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        count = len(self.history)
+        return {name: seconds / count * 1000 for name, seconds in totals.items()}
+
+    def flush(self):
+        """把当前窗口的平均耗时追加到 CSV (长表格式：frame, time, scope, ms)"""
+        if not self.window_frames:
+            return
+        window, frames = self.window, self.window_frames
+        class_costs = self.class_costs
+        self.window, self.window_frames, self.class_costs = {}, 0, {}
+        if self.csv_path is None:
+            return
+
+        rows = [(name, seconds / frames * 1000) for name, seconds in sorted(window.items())]
+        rows += [(f"class.{name}", seconds / frames * 1000) for name, seconds in sorted(class_costs.items())]
+        rows += [(f"gauge.{name}", value) for name, value in sorted(self.gauges.items())]
+        try:
+            folder = os.path.dirname(self.csv_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            if self.csv_rows + len(rows) > self.csv_max_rows and os.path.exists(self.csv_path):
+                os.replace(self.csv_path, self.csv_path + '.1')
+                self.csv_rows = 0
+            new_file = not os.path.exists(self.csv_path)
+            with open(self.csv_path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(['frame', 'time', 'scope', 'ms'])
+                stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+                for name, ms in rows:
+                    writer.writerow([self.frame_count, stamp, name, f"{ms:.4f}"])
+            self.csv_rows += len(rows)
+        except OSError as e:
+            log.warning('profiler', "Failed to write profiler CSV %s: %s", self.csv_path, e)
+            self.csv_path = None
+
+    # ------------------------------------------------------------------
+    # 叠加图
+    # ------------------------------------------------------------------
+    def draw_overlay(self, surface):
+        """在屏幕右上角绘制每帧耗时的堆叠柱状图和各阶段平均值"""
+        if not self.show_overlay or not self.history:
+            return
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+
+        graph_w, graph_h = self.history.maxlen, 100
+        budget = 1000 / FPS  # 一帧的时间预算 (ms)，对应图高的一半
+        px_per_ms = graph_h / (budget * 2)
+        legend_h = 9 * 14
+        # 放在右上角暂停按钮下方
+        panel = pygame.Rect(surface.get_width() - graph_w - 150, 80, graph_w + 140,
+                            max(graph_h, legend_h) + 40)
+        backdrop = pygame.Surface(panel.size, pygame.SRCALPHA)
+        backdrop.fill((0, 0, 0, 170))
+        surface.blit(backdrop, panel.topleft)
+
+        # 1. 堆叠柱状图 (每帧一列)
+        base_y = panel.top + 10 + graph_h
+        x = panel.left + 10 + graph_w - len(self.history)
+        for frame_total, scopes in self.history:
+            y = base_y
+            for name, seconds in scopes.items():
+                h = seconds * 1000 * px_per_ms
+                if h < 0.5:
+                    continue
+                top = max(panel.top + 10, y - h)
+                pygame.draw.line(surface, self.COLORS.get(name, (150, 150, 150)), (x, y), (x, top))
+                y = top
+            x += 1
+        budget_y = base_y - budget * px_per_ms
+        pygame.draw.line(surface, (255, 80, 80), (panel.left + 10, budget_y), (panel.left + 10 + graph_w, budget_y))
+
+        # 2. 各阶段平均值
+        averages = self.get_averages()
+        lines = [(f"frame {averages.get('frame', 0):.2f}ms", (255, 255, 255))]
+        for name in sorted(averages, key=averages.get, reverse=True):
+            if name != 'frame':
+                lines.append((f"{name} {averages[name]:.2f}", self.COLORS.get(name, (150, 150, 150))))
+        text_x = panel.left + graph_w + 20
+        for i, (text, color) in enumerate(lines[:9]):
+            surface.blit(self.font.render(text, True, color), (text_x, panel.top + 10 + i * 14))
+
+        # 3. 当前窗口内 update 最耗时的精灵类
+        frames = max(1, self.window_frames)
+        top_classes = sorted(self.class_costs.items(), key=lambda item: item[1], reverse=True)[:4]
+        text = '  '.join(f"{name} {seconds / frames * 1000:.2f}" for name, seconds in top_classes)
+        text_y = panel.top + 10 + max(graph_h, legend_h) + 8
+        surface.blit(self.font.render(text, True, (220, 220, 220)), (panel.left + 10, text_y))
+
+        # 4. 指标
+        if self.gauges:
+            text = '  '.join(f"{name} {value:g}" for name, value in sorted(self.gauges.items()))
+            surface.blit(self.font.render(text, True, (220, 220, 220)), (panel.left + 10, text_y + 14))
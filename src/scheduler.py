@@ -0,0 +1,116 @@
+"""
+延后任务调度器
+[优化] 不需要在触发的那一帧立刻完成的工作 (升级后重建环绕物/光环、重建悬浮武器图标、死亡爆炸等)
+放进队列，主循环每帧在逻辑更新之后按优先级执行，总耗时不超过 JOB_BUDGET_MS，剩下的留到下一帧，
+一次游戏事件不会让某一帧突然变长
+用法：
+    scheduler.submit(self._respawn_orbitals, ids, priority=PRIORITY_HIGH, key=self._respawn_orbitals)
+同一个 key 的任务在执行前只保留一份 (参数取最后一次提交的)，位置和提交时间保持不变
+"""
+import time
+import heapq
+from itertools import count
+from src.settings import JOB_BUDGET_MS
+
+# 优先级：数值越小越先执行
+PRIORITY_HIGH = 0    # 玩家马上能看到的 (武器精灵、爆炸)
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2     # 预热、整理之类可以慢慢做的
+
+
+class JobScheduler:
+    """
+    按优先级和每帧时间预算执行延后任务，并统计队列深度和延迟
+    """
+    def __init__(self, budget_ms=JOB_BUDGET_MS):
+        """
+        :param budget_ms: 每帧执行任务的时间预算（毫秒）
+        """
+        self.budget = budget_ms / 1000
+        self.queue = []  # 堆：[优先级, 序号, 函数, 参数, 提交时间, key]
+        self.keyed = {}  # {key: 队列中的条目}
+        self._seq = count()
+        # 统计
+        self.executed = 0  # 已执行的任务数
+        self.max_depth = 0  # 队列最大深度
+        self.last_latency = 0.0  # 本帧执行的任务中最长的等待时间（秒）
+        self.max_latency = 0.0  # 任务从提交到执行的最长等待时间（秒）
+        self.total_latency = 0.0
+        self.slow_jobs = 0  # 单个任务本身就超出整帧预算的次数 (需要继续拆分的任务)
+
+    def __len__(self):
+        return len(self.queue)
+
+    def submit(self, fn, *args, priority=PRIORITY_NORMAL, key=None):
+        """
+        提交任务
+        :param priority: PRIORITY_HIGH / PRIORITY_NORMAL / PRIORITY_LOW
+        :param key: 合并用的标识，队列中已有同 key 的任务时只更新它的函数和参数
+        """
+        if key is not None:
+            entry = self.keyed.get(key)
+            if entry is not None:
+                entry[2] = fn
+                entry[3] = args
+                return
+        entry = [priority, next(self._seq), fn, args, time.perf_counter(), key]
+        heapq.heappush(self.queue, entry)
+        if key is not None:
+            self.keyed[key] = entry
+        self.max_depth = max(self.max_depth, len(self.queue))
+
+    def run(self, budget=None):
+        """
+        执行任务直到用完本帧预算 (每帧至少执行一个，保证队列总能清空)
+        :param budget: 本帧预算（秒），默认使用构造时的预算
+        :return: 本帧执行的任务数
+        """
+        queue = self.queue
+        if not queue:
+            self.last_latency = 0.0
+            return 0
+        start = time.perf_counter()
+        deadline = start + (self.budget if budget is None else budget)
+        ran = 0
+        latency = 0.0
+        now = start
+        while queue:
+            if ran and now >= deadline:
+                break
+            _, _, fn, args, submitted, key = heapq.heappop(queue)
+            if key is not None:
+                del self.keyed[key]
+            wait = now - submitted
+            latency = max(latency, wait)
+            self.total_latency += wait
+            fn(*args)
+            ran += 1
+            finished = time.perf_counter()
+            if finished - now > self.budget:
+                self.slow_jobs += 1
+            now = finished
+        self.executed += ran
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        return ran
+
+    def flush(self):
+        """不计预算执行完所有任务 (测试或需要立即生效时使用)"""
+        while self.queue:
+            self.run(budget=float('inf'))
+
+    def clear(self):
+        """丢弃所有任务 (重置世界时调用，旧世界的任务不再有意义)"""
+        self.queue.clear()
+        self.keyed.clear()
+
+    def metrics(self):
+        """统计数据 (毫秒)：队列深度、最大深度、已执行数、平均/最长延迟、超出预算的任务数"""
+        return {
+            'depth': len(self.queue),
+            'max_depth': self.max_depth,
+            'executed': self.executed,
+            'avg_latency_ms': self.total_latency / self.executed * 1000 if self.executed else 0.0,
+            'max_latency_ms': self.max_latency * 1000,
+            'slow_jobs': self.slow_jobs,
+        }
@@ -5,7 +5,10 @@ import pygame
 # =========================================
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
-FPS = 60
+FPS = 60  # 渲染帧率上限
+SIM_HZ = 60  # 逻辑固定步长的频率，每步推进 1 / SIM_HZ 秒 (与渲染帧率无关)
+SIM_MAX_CATCH_UP = 5  # 一帧内最多追赶的逻辑步数，卡顿更久时丢弃多出的时间 (游戏变慢而不是跳跃)
+INTERP_SNAP_DISTANCE = 64  # 两步之间位移超过该距离（像素）时视为瞬移，不做渲染插值
 TILE_SIZE = 32  # 像素画网格大小
 
 # =========================================
@@ -40,21 +43,106 @@ ID_RANGE_VFX     = (1, 999)      # 特效、特殊动画
 ID_RANGE_UPGRADE = (1000, 1999)  # 升级选项、武器获取
 ID_RANGE_ENEMY   = (2000, 2999)  # 怪物类型
 ID_RANGE_WEAPON  = (3000, 3999)  # 武器类型
+ID_RANGE_WAVE    = (4000, 4999)  # 刷怪波次
 
 # =========================================
 # 5. 敌人生成设置
 # =========================================
-SPAWN_INTERVAL_BASE = 1200  # 基础生成间隔（毫秒）
-SPAWN_INTERVAL_DECREASE = 50  # 每级减少的间隔（毫秒）
-SPAWN_INTERVAL_MIN = 200  # 最小生成间隔（毫秒）
+# 生成节奏由 assets/json/waves.json 配置 (见 src/waves.py)
+WAVE_TIMELINE_LENGTH = 3600  # 波次时间轴总长度（秒），没有 end 的波次一直持续到这里
+SPAWN_BUDGET_PER_FRAME = 2  # 每帧最多生成的敌人数量，大波次分摊到多帧
+SPAWN_BACKLOG_LIMIT = 160  # 场上满员时待生成队列最多积压的数量，超出时丢弃最早的普通敌人 (精英保留)
+ELITE_HP_MULTIPLIER = 3.0  # 精英敌人的血量倍率
+ELITE_DAMAGE_MULTIPLIER = 1.5  # 精英敌人的伤害倍率
+ELITE_XP_MULTIPLIER = 3.0  # 精英敌人的经验倍率
+ELITE_SCALE = 1.3  # 精英敌人的体型倍率
 
 # 性能优化设置
-MAX_ENEMIES = 80  # 最大敌人数量限制（防止后期卡顿）
-MAX_SPAWN_COUNT = 5  # 单次最大生成数量（防止一次性生成过多）
-MAX_VFX_COUNT = 30  # 最大同时存在的特效数量（防止特效过多导致卡顿）
+MAX_ENEMIES = 80  # 场上敌人总数预算，达到时暂停生成（防止后期卡顿）
+SPAWN_MIN_DISTANCE = 400  # 出生点离玩家的最小距离（像素）
+SPAWN_MAX_DISTANCE = 1200  # 出生点离玩家的最大距离（像素），小于 ENEMY_RECYCLE_DISTANCE，刚出生不会被回收
+VFX_BUDGETS = {'explosion': 16}  # 各类特效同时存在的上限（超出时优先丢弃离镜头最远的）
+HIT_FLASH_COLOR = (255, 255, 255, 200)  # 受击闪光剪影的颜色
+ENEMY_POOL_SIZE = 96  # 敌人对象池最多保留的空闲敌人数量
+ENEMY_RECYCLE_DISTANCE = 1400  # 离玩家超过该距离（像素）的敌人被挪到新的出生点，而不是一直在远处游荡
+ENEMY_RECYCLE_INTERVAL = 500  # 检查远处敌人的间隔（毫秒）
+
+# 敌人细节档位 LOD (src/swarm.py)：镜头附近完整模拟，镜头外按距离降低精度
+LOD_VIEW_MARGIN = 192  # 屏幕外扩多少像素内仍按"可见"处理 (需大于渲染剔除边距，进入画面前已恢复完整精度)
+LOD_FAR_DISTANCE = 900  # 镜头外且离玩家超过该距离（像素）的敌人进入远档
+LOD_FAR_STEP_INTERVAL = 4  # 远档敌人每隔多少个模拟步移动一次 (一次走完累积的时间，只检查目的地是否压到障碍物)
+
+# 延后任务 (src/scheduler.py)
+JOB_BUDGET_MS = 2  # 每帧执行延后任务 (重建武器精灵、爆炸等) 的时间预算（毫秒）
+
+# 资源加载
+ASSET_LOADER_THREADS = 4  # 图片/音效解码线程数
+ASSET_CACHE_DIR = '.cache/assets'  # 解码结果磁盘缓存目录 (相对项目根目录)，None 表示不使用缓存
+ASSET_IMAGE_BUDGET_MB = 16  # 常驻图片的内存预算 (MB)，超出后按最久未使用淘汰 (固定的图片除外)
+ASSET_PREFETCH_AHEAD = 30  # 提前预取波次时间轴上接下来多少秒会出现的敌人贴图
+ASSET_PREFETCH_INTERVAL = 5  # 按时间轴刷新预取列表的间隔（秒）
+ASSET_PREFETCH_PER_FRAME = 2  # 每帧最多把几张预取完成的图片放入仓库
+TRANSFORM_CACHE_BUDGET_MB = 16  # 共享变换缓存 (缩放/旋转/翻转结果) 的内存预算 (MB)
+# 启动时预加载并常驻的图片 (界面、玩家、地图和常用特效)
+ASSET_PINNED_IMAGES = (
+    'pointer', 'cursor', 'bar_left', 'bar_mid', 'bar_right', 'bigbar_fill',
+    'ribbon_blue_3slides', 'ribbon_red_3slides', 'ribbon_yellow_3slides', 'banner_slots',
+    'button_blue', 'button_blue_pressed', 'button_red', 'button_red_pressed',
+    'button_yellow', 'button_yellow_pressed',
+    'icon_resume', 'icon_restart', 'icon_quit', 'icon_home', 'icon_pause', 'icon_sound', 'icon_mute',
+    'title', 'choice_bg',
+    'character_18_frame16x20', 'shadows', 'tile_grass', 'tile_wall', 'vfx_explosion',
+    'obs_tree1_anim', 'obs_tree2_anim', 'obs_tree3_anim', 'obs_tree4_anim',
+)
+
+# 纹理图集 (python -m src.atlas 构建)：序列帧裁掉透明边后装箱到少量图集页
+ATLAS_DIR = 'assets/atlas'  # 图集页和元数据目录 (相对项目根目录)，None 表示不使用图集
+ATLAS_PAGE_SIZE = 1024  # 图集页边长（像素）
+ATLAS_PADDING = 1  # 图集中帧之间的间隔（像素）
+# enemies.json 之外需要打包的序列帧 (树、爆炸)，切帧参数与使用处一致
+ATLAS_SHEETS = {
+    'obs_tree1_anim': {'frames': 8, 'frame_width': 192},
+    'obs_tree2_anim': {'frames': 8, 'frame_width': 192},
+    'obs_tree3_anim': {'frames': 8, 'frame_width': 192},
+    'obs_tree4_anim': {'frames': 8, 'frame_width': 192},
+    'vfx_explosion': {'frames': 12, 'frame_width': 64},
+}
+
+# 地面层预烘焙
+GROUND_CHUNK_SIZE = 512  # 地面烘焙块的边长（像素），渲染时只绘制与屏幕相交的块
+
+# 渲染队列
+RENDER_CELL_SIZE = 256  # 静态精灵 (墙、树、树影) 剔除网格的格子大小（像素）
+
+# 空间分区（敌人广相位碰撞）
+SPATIAL_CELL_SIZE = 128  # 敌人空间网格的格子大小（像素）
+SPATIAL_QUERY_MARGIN = 64  # 查询半径的最小额外余量；敌人池创建新的预制体时按其碰撞箱半宽 (含精英放大) 自动调大
+
+# 子弹对象池与预旋转帧缓存
+PROJECTILE_ANGLE_STEP = 2  # 子弹朝向量化步长（度），同一角度桶内的子弹共享预旋转帧
+PROJECTILE_FRAME_CACHE_SIZE = 1024  # 预旋转帧缓存最多保存的 (武器, 缩放, 角度桶) 条目数
+PROJECTILE_POOL_SIZE = 256  # 对象池最多保留的空闲子弹数量
+
+# 界面
+UI_HOVER_SCALE_STEP = 0.025  # 按钮悬停缩放动画的倍率量化步长，1.0~1.1 之间只有几种尺寸
+DIRTY_RECT_STATES = ('MENU', 'PAUSED', 'GAME_OVER', 'LEVEL_UP', 'TUTORIAL')  # 画面基本静止的状态，只提交变化的区域
+BACKDROP_STATES = ('PAUSED', 'GAME_OVER', 'LEVEL_UP', 'TUTORIAL')  # 世界暂停、盖着遮罩的叠加界面，世界画面冻结成一张背景
 
 # =========================================
 # 6. 调试模式
 # =========================================
 DEBUG = True  # 开启后会在控制台打印详细加载信息
-DEBUG_WEAPON = False  # 武器系统调试信息
\ No newline at end of file
+DEBUG_WEAPON = False  # 武器系统调试信息
+
+# 日志 (src/logger.py)：DEBUG 关闭时游戏循环中不做任何日志格式化和输出
+LOG_LEVEL = 'DEBUG' if DEBUG else 'WARNING'  # 默认日志等级
+LOG_CATEGORY_LEVELS = {}  # 按类别覆盖等级，例如 {'enemy': 'INFO', 'audio': 'WARNING'}
+LOG_BUFFER_SIZE = 4096  # 日志环形缓冲区容量 (条)，写满时丢弃最旧的消息
+LOG_FLUSH_INTERVAL = 0.25  # 后台线程输出间隔（秒）
+
+# 帧性能分析器 (游戏中按 F3 切换叠加图)
+PROFILER_ENABLED = False  # 启动时是否开启统计
+PROFILER_HISTORY = 240  # 叠加图保留的帧数
+PROFILER_CSV_PATH = 'logs/frame_profile.csv'  # 窗口平均耗时导出路径 (None 表示不导出)
+PROFILER_CSV_INTERVAL = 60  # 每隔多少帧写一次 CSV
+PROFILER_CSV_MAX_ROWS = 50000  # CSV 超过该行数时滚动为 .1 文件
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+模拟时钟
+[优化] 游戏逻辑按固定步长推进 (Game.step)，武器冷却、受击无敌、闪光等计时都读这个时钟，
+不再读 pygame.time.get_ticks() 的真实时间：
+1. 掉帧时逻辑时间和真实时间解耦，冷却不会因为一帧卡顿而提前结束
+2. 暂停、升级界面等状态下时钟不走，恢复后计时从暂停处继续
+用法：
+    from src.sim_clock import SIM_CLOCK
+    if SIM_CLOCK.ticks - self.cooldown >= w_data['cooldown']: ...
+"""
+
+
+class SimClock:
+    """只在模拟步中前进的毫秒时钟 (单调递增，重开游戏也不归零)"""
+    def __init__(self):
+        self.ticks = 0.0  # 毫秒
+        self.steps = 0  # 已推进的模拟步数
+
+    def advance(self, dt):
+        """
+        推进一个模拟步
+        :param dt: 步长（秒）
+        """
+        self.ticks += dt * 1000
+        self.steps += 1
+
+
+# 全局模拟时钟 (Game.update 在 PLAYING 状态下推进)
+SIM_CLOCK = SimClock()
@@ -2,22 +2,40 @@
 空间分区系统 - 用于优化碰撞检测
 将地图划分为网格，只检测同一网格或相邻网格内的碰撞
 """
+import random
 import pygame
+import numpy as np
 from src.settings import TILE_SIZE
 
 class SpatialGrid:
     """
     网格空间分区系统
     将地图划分为固定大小的网格，用于快速查找附近的精灵
+    [优化] 记录每个精灵所在的网格，移动时只有跨格才会改动网格数据
     """
-    def __init__(self, cell_size=128):
+    def __init__(self, cell_size=128, query_margin=0):
         """
         :param cell_size: 网格大小（像素），默认 128
+        :param query_margin: 查询半径的额外余量 (精灵按中心登记，余量需覆盖中心到碰撞箱边缘的最大距离)
         """
         self.cell_size = cell_size
-        # 网格字典：{(grid_x, grid_y): [sprite1, sprite2, ...]}
+        self.query_margin = query_margin
+        # 网格字典：{(grid_x, grid_y): {sprite1, sprite2, ...}}
         self.grid = {}
-    
+        # 反向索引：{sprite: (grid_x, grid_y)}，用于增量更新和 O(1) 移除
+        self.sprite_cells = {}
+
+    def __len__(self):
+        return len(self.sprite_cells)
+
+    def fit_margin(self, reach):
+        """
+        保证查询余量不小于 reach (新的一类精灵登记前调用)
+        :param reach: 这类精灵中心到其碰撞箱边缘的最大距离
+        """
+        if reach > self.query_margin:
+            self.query_margin = reach
+
     def get_cell(self, pos):
         """
         根据世界坐标获取网格坐标
@@ -25,73 +43,243 @@ class SpatialGrid:
         :return: (grid_x, grid_y) 网格坐标
         """
         return (int(pos[0] // self.cell_size), int(pos[1] // self.cell_size))
-    
+
+    def _discard(self, sprite, cell):
+        """从指定网格中移除精灵，网格为空时删除网格"""
+        bucket = self.grid.get(cell)
+        if bucket is not None:
+            bucket.discard(sprite)
+            if not bucket:
+                del self.grid[cell]
+
     def add_sprite(self, sprite):
         """
-        将精灵添加到对应的网格
+        将精灵添加到对应的网格（已存在则按当前位置刷新）
         :param sprite: 要添加的精灵
         """
         cell = self.get_cell(sprite.rect.center)
+        old_cell = self.sprite_cells.get(sprite)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            self._discard(sprite, old_cell)
+
         if cell not in self.grid:
-            self.grid[cell] = []
-        if sprite not in self.grid[cell]:
-            self.grid[cell].append(sprite)
-    
+            self.grid[cell] = set()
+        self.grid[cell].add(sprite)
+        self.sprite_cells[sprite] = cell
+
     def remove_sprite(self, sprite):
         """
         从网格中移除精灵
         :param sprite: 要移除的精灵
         """
-        cell = self.get_cell(sprite.rect.center)
-        if cell in self.grid and sprite in self.grid[cell]:
-            self.grid[cell].remove(sprite)
-            # 如果网格为空，删除网格（可选，节省内存）
-            if not self.grid[cell]:
-                del self.grid[cell]
-    
-    def update_sprite(self, sprite, old_pos=None):
+        cell = self.sprite_cells.pop(sprite, None)
+        if cell is not None:
+            self._discard(sprite, cell)
+
+    def update_sprite(self, sprite):
         """
         更新精灵在网格中的位置
+        只有精灵跨越网格边界时才会改动网格数据，每帧调用开销很小
+        未注册（或已被移除）的精灵直接忽略，防止同一帧内被击杀的精灵又被移动逻辑加回来
         :param sprite: 要更新的精灵
-        :param old_pos: 旧位置（如果提供，会先从旧位置移除）
-        """
-        if old_pos:
-            old_cell = self.get_cell(old_pos)
-            if old_cell in self.grid and sprite in self.grid[old_cell]:
-                self.grid[old_cell].remove(sprite)
-                if not self.grid[old_cell]:
-                    del self.grid[old_cell]
-        
-        # 添加到新位置
-        self.add_sprite(sprite)
-    
+        """
+        old_cell = self.sprite_cells.get(sprite)
+        if old_cell is None:
+            return
+        cell = self.get_cell(sprite.rect.center)
+        if cell != old_cell:
+            self._discard(sprite, old_cell)
+            if cell not in self.grid:
+                self.grid[cell] = set()
+            self.grid[cell].add(sprite)
+            self.sprite_cells[sprite] = cell
+
     def get_nearby_sprites(self, pos, radius=None):
         """
-        获取指定位置附近的精灵
+        获取指定位置附近的精灵（粗筛，调用方仍需做精确碰撞）
         :param pos: (x, y) 世界坐标
         :param radius: 搜索半径（像素），如果为 None 则只搜索同一网格
         :return: 附近的精灵列表
         """
-        center_cell = self.get_cell(pos)
         nearby = []
-        
+
         if radius is None:
             # 只搜索同一网格
+            center_cell = self.get_cell(pos)
             if center_cell in self.grid:
                 nearby.extend(self.grid[center_cell])
         else:
-            # 搜索中心网格和相邻网格
-            # 计算需要搜索的网格范围
-            cells_to_check = int(radius // self.cell_size) + 1
-            
-            for dx in range(-cells_to_check, cells_to_check + 1):
-                for dy in range(-cells_to_check, cells_to_check + 1):
-                    cell = (center_cell[0] + dx, center_cell[1] + dy)
-                    if cell in self.grid:
-                        nearby.extend(self.grid[cell])
-        
+            # 搜索与 [pos - radius, pos + radius] 方形范围重叠的所有网格
+            min_x, min_y = self.get_cell((pos[0] - radius, pos[1] - radius))
+            max_x, max_y = self.get_cell((pos[0] + radius, pos[1] + radius))
+
+            for gx in range(min_x, max_x + 1):
+                for gy in range(min_y, max_y + 1):
+                    bucket = self.grid.get((gx, gy))
+                    if bucket:
+                        nearby.extend(bucket)
+
+        return nearby
+
+    def query_rect(self, rect):
+        """
+        获取中心点落在 rect 覆盖的网格内的精灵（粗筛）
+        :param rect: 世界坐标矩形
+        :return: 精灵列表
+        """
+        nearby = []
+        min_x, min_y = self.get_cell(rect.topleft)
+        max_x, max_y = self.get_cell(rect.bottomright)
+        for gx in range(min_x, max_x + 1):
+            for gy in range(min_y, max_y + 1):
+                bucket = self.grid.get((gx, gy))
+                if bucket:
+                    nearby.extend(bucket)
         return nearby
-    
+
     def clear(self):
         """清空所有网格"""
         self.grid.clear()
+        self.sprite_cells.clear()
+
+
+class OccupancyGrid:
+    """
+    静态障碍物占用网格
+    用布尔数组记录每个地图格子是否有障碍物，并保存该格障碍物的精确碰撞箱，
+    碰撞检测只需检查矩形覆盖的 2~4 个格子，不再遍历整个 obstacle_sprites
+    """
+    def __init__(self, width, height, cell_size=TILE_SIZE):
+        """
+        :param width, height: 地图尺寸（格子数）
+        :param cell_size: 格子大小（像素）
+        """
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        # solid[x, y] 为 True 表示该格子有障碍物
+        self.solid = np.zeros((width, height), dtype=bool)
+        # {(grid_x, grid_y): Rect}，障碍物的精确碰撞箱（世界坐标）
+        self.hitboxes = {}
+        # 每次修改都会递增，供缓存了网格派生数据的系统判断是否需要重建
+        self.version = 0
+
+    def add_obstacle(self, cell, hitbox):
+        """
+        登记一个障碍物
+        :param cell: (grid_x, grid_y) 障碍物所在格子
+        :param hitbox: 障碍物碰撞箱，必须位于该格子内
+        """
+        gx, gy = cell
+        if 0 <= gx < self.width and 0 <= gy < self.height:
+            self.solid[gx, gy] = True
+            self.hitboxes[(gx, gy)] = hitbox.copy()
+            self.version += 1
+
+    def is_solid(self, gx, gy):
+        """格子是否有障碍物（地图外视为无障碍物）"""
+        if 0 <= gx < self.width and 0 <= gy < self.height:
+            return bool(self.solid[gx, gy])
+        return False
+
+    def _cell_range(self, rect):
+        """rect 覆盖的格子范围 (已裁剪到地图内)：(first_x, last_x, first_y, last_y)"""
+        size = self.cell_size
+        return (max(0, rect.left // size), min(self.width - 1, (rect.right - 1) // size),
+                max(0, rect.top // size), min(self.height - 1, (rect.bottom - 1) // size))
+
+    def get_hits(self, rect):
+        """
+        返回与 rect 相交的所有障碍物碰撞箱
+        :param rect: 世界坐标矩形（通常是实体的 hitbox）
+        """
+        first_x, last_x, first_y, last_y = self._cell_range(rect)
+        hits = []
+        hitboxes = self.hitboxes
+        for gx in range(first_x, last_x + 1):
+            for gy in range(first_y, last_y + 1):
+                box = hitboxes.get((gx, gy))
+                if box is not None and box.colliderect(rect):
+                    hits.append(box)
+        return hits
+
+    def collides(self, rect):
+        """rect 是否与任意障碍物相交"""
+        first_x, last_x, first_y, last_y = self._cell_range(rect)
+        hitboxes = self.hitboxes
+        for gx in range(first_x, last_x + 1):
+            for gy in range(first_y, last_y + 1):
+                box = hitboxes.get((gx, gy))
+                if box is not None and box.colliderect(rect):
+                    return True
+        return False
+
+    def clear(self):
+        """清空所有障碍物（重新生成地图前调用）"""
+        self.solid[:] = False
+        self.hitboxes.clear()
+        self.version += 1
+
+
+class SpawnIndex:
+    """
+    [优化] 出生点索引
+    地图生成后一次性收集所有可以出生的格子 (墙内、无障碍物)，取样时对格子坐标做向量化的距离掩码，
+    直接在玩家周围的环形区域内选格子，不再随机取点后逐个检查、失败重试
+    """
+    # 出生检查的碰撞箱比格子每边小 5 像素 (与 Enemy 的 inflate(-10, -10) 一致)，
+    # 出生点在格子内抖动不超过这个距离时碰撞箱不会越出格子，也就不会碰到相邻格子的障碍物
+    JITTER = 5
+
+    def __init__(self, cell_size=TILE_SIZE):
+        """
+        :param cell_size: 格子大小（像素）
+        """
+        self.cell_size = cell_size
+        self.cells = np.empty((0, 2), dtype=np.int32)  # 可出生格子的左上角像素坐标
+        self.points = np.empty((0, 2), dtype=np.float32)  # 同上 (浮点)，用于距离计算
+        self.bounds = (0, 0)  # 出生点左上角允许的范围 (紧贴边界墙的格子抖动后不能压到墙格)
+        self.rng = np.random.default_rng()
+
+    def __len__(self):
+        return len(self.cells)
+
+    def build(self, obstacle_grid):
+        """
+        由障碍物占用网格重建索引 (地图实例化之后调用)
+        最外一圈是边界墙，内部除去有障碍物的格子都可以出生
+        :param obstacle_grid: OccupancyGrid
+        """
+        free = ~obstacle_grid.solid
+        free[0, :] = free[-1, :] = False
+        free[:, 0] = free[:, -1] = False
+        gx, gy = np.nonzero(free)
+        self.cells = np.stack([gx, gy], axis=1).astype(np.int32) * self.cell_size
+        self.points = self.cells.astype(np.float32)
+        self.bounds = (self.cell_size, (np.array(free.shape) - 2) * self.cell_size)
+        # 随机数跟随 random 模块的种子，固定种子的测试仍然可复现
+        self.rng = np.random.default_rng(random.getrandbits(32))
+
+    def sample(self, center, count, min_distance, max_distance):
+        """
+        在 center 周围 min_distance~max_distance 的环形区域内随机取 count 个出生点
+        环形区域内没有空格子时 (地图角落) 退回到 min_distance 以外的任意空格子
+        :param center: (x, y) 通常是玩家中心
+        :return: [(x, y), ...] 出生点左上角坐标；没有可用格子时返回空列表
+        """
+        if count <= 0 or not len(self.cells):
+            return []
+        offset = self.points - np.asarray(center, dtype=np.float32)
+        dist_sq = (offset * offset).sum(axis=1)
+        outside = dist_sq > min_distance * min_distance
+        candidates = np.flatnonzero(outside & (dist_sq <= max_distance * max_distance))
+        if not len(candidates):
+            candidates = np.flatnonzero(outside)
+            if not len(candidates):
+                return []
+        picks = candidates[self.rng.integers(len(candidates), size=count)]
+        jitter = self.rng.integers(-self.JITTER, self.JITTER + 1, size=(count, 2))
+        positions = np.clip(self.cells[picks] + jitter, *self.bounds)
+        return [tuple(pos) for pos in positions.tolist()]
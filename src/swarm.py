@@ -0,0 +1,348 @@
+"""
+敌人群体系统 - 用 NumPy 批量模拟所有敌人
+敌人的位置、速度、血量、碰撞箱尺寸以 "结构数组" (SoA) 的形式保存，
+追踪玩家、移动、出界检查和接触伤害每帧一次性批量计算，
+Enemy 精灵只负责动画和把结果同步到 rect 上
+[优化] 细节档位 (LOD)：每步按是否接近镜头和离玩家的距离给敌人分档
+    LOD_VISIBLE  镜头内或接近镜头：完整模拟 (障碍物碰撞、动画、阴影、接触伤害)
+    LOD_NEAR     镜头外：照常移动和障碍物碰撞，跳过动画、阴影跟随和接触伤害
+    LOD_FAR      镜头外且离玩家超过 LOD_FAR_DISTANCE：每 LOD_FAR_STEP_INTERVAL 步移动一次 (错开槽位)，
+                 一次走完累积的时间，不做逐个碰撞，只用占用网格检查目的地，会压到障碍物时原地不动
+"""
+import pygame
+import numpy as np
+from src.settings import *
+from src.logger import log
+
+# 细节档位 (数值越大精度越低)
+LOD_VISIBLE = 0
+LOD_NEAR = 1
+LOD_FAR = 2
+LOD_TIER_NAMES = ('visible', 'near', 'far')
+
+
+class SwarmSystem:
+    """
+    敌人群体模拟
+    每个敌人占用一个槽位 (slot)，槽位下标保存在 Enemy.swarm_index 中
+    """
+    def __init__(self, map_manager=None, spatial_grid=None, capacity=128, view_size=None):
+        """
+        :param map_manager: 地图管理器 (用于障碍物占用网格与出界检查)
+        :param spatial_grid: 敌人空间网格 (跨格时同步更新)
+        :param capacity: 初始槽位数量，不够时自动翻倍
+        :param view_size: 镜头 (屏幕) 尺寸，镜头以玩家为中心；为 None 时不分档，所有敌人完整模拟
+        """
+        self.map_manager = map_manager
+        self.spatial_grid = spatial_grid
+        # 可见档的范围：以玩家中心为原点，屏幕半宽/半高加上 LOD_VIEW_MARGIN
+        self.view_extent = None
+        if view_size is not None:
+            self.view_extent = (view_size[0] / 2 + LOD_VIEW_MARGIN, view_size[1] / 2 + LOD_VIEW_MARGIN)
+        self.tier_counts = [0] * len(LOD_TIER_NAMES)  # 上一步各档的敌人数量 (供性能分析)
+        self.step_count = 0
+
+        self.capacity = 0
+        self.pos = np.zeros((0, 2), dtype=np.float64)       # 碰撞箱左上角 (世界坐标，浮点)
+        self.size = np.zeros((0, 2), dtype=np.int32)        # 碰撞箱宽高
+        self.speed = np.zeros(0, dtype=np.float64)          # 移动速度 (像素/秒)
+        self.hp = np.zeros(0, dtype=np.float64)             # 当前血量
+        self.distance = np.zeros(0, dtype=np.float64)       # 到玩家的距离 (每步更新，供动画降频使用)
+        self.cells = np.zeros((0, 2), dtype=np.int64)       # 上一次同步到空间网格的格子
+        self.tier = np.zeros(0, dtype=np.int8)              # 细节档位 (LOD_*)
+        self.lag = np.zeros(0, dtype=np.float64)            # 还没走的时间（秒），远档敌人降频移动时累积
+        self.active = np.zeros(0, dtype=bool)
+        self.sprites = []
+        self.free_slots = []
+        self._grow(capacity)
+
+        # 障碍物占用网格的积分图 (summed-area table)，用于批量判断移动范围内是否有障碍物
+        self._occupancy_sum = None
+        self._occupancy_version = None
+
+    def __len__(self):
+        return len(self.sprites) - len(self.free_slots)
+
+    # ------------------------------------------------------------------
+    # 槽位管理
+    # ------------------------------------------------------------------
+    def _grow(self, new_capacity):
+        """扩容所有数组，旧数据保持不变"""
+        old = self.capacity
+        extra = new_capacity - old
+
+        def grow(arr, shape):
+            return np.concatenate([arr, np.zeros(shape, dtype=arr.dtype)])
+
+        self.pos = grow(self.pos, (extra, 2))
+        self.size = grow(self.size, (extra, 2))
+        self.speed = grow(self.speed, extra)
+        self.hp = grow(self.hp, extra)
+        self.distance = grow(self.distance, extra)
+        self.cells = grow(self.cells, (extra, 2))
+        self.tier = grow(self.tier, extra)
+        self.lag = grow(self.lag, extra)
+        self.active = grow(self.active, extra)
+        self.sprites.extend([None] * extra)
+        # 倒序放入，使 pop() 优先分配小下标
+        self.free_slots.extend(range(new_capacity - 1, old - 1, -1))
+        self.capacity = new_capacity
+
+    def add(self, enemy, hp, speed):
+        """登记一个敌人，返回槽位下标（以 enemy.hitbox 的当前位置与尺寸为准）"""
+        if not self.free_slots:
+            self._grow(self.capacity * 2)
+        i = self.free_slots.pop()
+        self.pos[i] = enemy.hitbox.topleft
+        self.size[i] = enemy.hitbox.size
+        self.speed[i] = speed
+        self.hp[i] = hp
+        self.distance[i] = 0
+        self.cells[i] = (-1, -1)
+        self.tier[i] = LOD_VISIBLE
+        self.lag[i] = 0
+        self.active[i] = True
+        self.sprites[i] = enemy
+        enemy.lod = LOD_VISIBLE
+        return i
+
+    def remove(self, i):
+        """释放槽位"""
+        if self.sprites[i] is None:
+            return
+        self.active[i] = False
+        self.sprites[i] = None
+        self.free_slots.append(i)
+
+    def move_to(self, i, topleft):
+        """瞬移一个敌人 (回收到新出生点时调用)，下一次 step 会重新同步空间网格"""
+        self.pos[i] = topleft
+        self.distance[i] = 0
+        self.cells[i] = (-1, -1)
+        self.lag[i] = 0
+
+    def far_from_player(self, distance):
+        """上一次 step 时离玩家超过 distance 的敌人"""
+        idx = np.flatnonzero(self.active & (self.distance > distance))
+        return [self.sprites[i] for i in idx.tolist()]
+
+    def clear(self):
+        """清空所有敌人（重置游戏时调用）"""
+        for i, sprite in enumerate(self.sprites):
+            if sprite is not None:
+                sprite.swarm_index = None
+                self.remove(i)
+
+    # ------------------------------------------------------------------
+    # 批量模拟
+    # ------------------------------------------------------------------
+    def _get_occupancy_sum(self):
+        """获取障碍物占用网格的积分图，地图重新生成后自动重建"""
+        grid = self.map_manager.obstacle_grid
+        version = (id(grid), grid.version)
+        if self._occupancy_version != version:
+            solid = grid.solid.astype(np.int32)
+            table = np.zeros((grid.width + 1, grid.height + 1), dtype=np.int32)
+            table[1:, 1:] = solid.cumsum(axis=0).cumsum(axis=1)
+            self._occupancy_sum = table
+            self._occupancy_version = version
+        return self._occupancy_sum
+
+    def _may_hit_obstacle(self, idx, start, end):
+        """
+        批量粗筛：移动前后碰撞箱的包围范围内是否有障碍物格子
+        :return: 与 idx 等长的布尔数组
+        """
+        grid = self.map_manager.obstacle_grid
+        table = self._get_occupancy_sum()
+        size = self.size[idx]
+        left = np.floor(np.minimum(start[:, 0], end[:, 0])).astype(np.int64)
+        top = np.floor(np.minimum(start[:, 1], end[:, 1])).astype(np.int64)
+        right = np.floor(np.maximum(start[:, 0], end[:, 0])).astype(np.int64) + size[:, 0]
+        bottom = np.floor(np.maximum(start[:, 1], end[:, 1])).astype(np.int64) + size[:, 1]
+
+        cell = grid.cell_size
+        x0 = np.clip(left // cell, 0, grid.width - 1)
+        x1 = np.clip((right - 1) // cell, 0, grid.width - 1)
+        y0 = np.clip(top // cell, 0, grid.height - 1)
+        y1 = np.clip((bottom - 1) // cell, 0, grid.height - 1)
+        count = table[x1 + 1, y1 + 1] - table[x0, y1 + 1] - table[x1 + 1, y0] + table[x0, y0]
+        return count > 0
+
+    def _resolve_move(self, i, step_x, step_y):
+        """
+        单个敌人的分离轴移动 + 障碍物碰撞 (与 Entity.move 的规则一致)
+        只有粗筛判定可能碰到障碍物的敌人才会走这里
+        """
+        grid = self.map_manager.obstacle_grid
+        x, y = self.pos[i]
+        w, h = int(self.size[i, 0]), int(self.size[i, 1])
+
+        x += step_x
+        for box in grid.get_hits(pygame.Rect(int(x), int(y), w, h)):
+            if step_x > 0:
+                x = box.left - w
+            elif step_x < 0:
+                x = box.right
+
+        y += step_y
+        for box in grid.get_hits(pygame.Rect(int(x), int(y), w, h)):
+            if step_y > 0:
+                y = box.top - h
+            elif step_y < 0:
+                y = box.bottom
+
+        self.pos[i] = (x, y)
+
+    def _far_destination(self, idx, start, end):
+        """
+        远档敌人的落点：不逐个处理碰撞，只用占用网格检查目的地，一次走好几步也不会嵌进树和墙里
+        目的地会压到障碍物格子时改为只沿 x 或只沿 y 移动 (贴着障碍物滑动)，都不行就原地不动；
+        本来就压着障碍物格子的照常移动，否则会一直卡住 (离开远档时再推出来)
+        """
+        def free(target):
+            return ~self._may_hit_obstacle(idx, target, target)
+
+        slide_x = np.column_stack([end[:, 0], start[:, 1]])
+        slide_y = np.column_stack([start[:, 0], end[:, 1]])
+        dest = np.where(free(slide_y)[:, None], slide_y, start)
+        dest = np.where(free(slide_x)[:, None], slide_x, dest)
+        return np.where((free(end) | ~free(start))[:, None], end, dest)
+
+    def _depenetrate(self, i, max_iterations=4):
+        """
+        把和障碍物重叠的敌人推出去：每次处理一个障碍物，四个方向中优先选推出后不再重叠的最短距离，
+        都会撞上别的障碍物时先按最短距离推，下一轮再处理新的重叠
+        """
+        grid = self.map_manager.obstacle_grid
+        x, y = self.pos[i]
+        w, h = int(self.size[i, 0]), int(self.size[i, 1])
+        for _ in range(max_iterations):
+            rect = pygame.Rect(int(x), int(y), w, h)
+            hits = grid.get_hits(rect)
+            if not hits:
+                break
+            box = hits[0]
+            # 四个方向各需要移动的距离：左、右、上、下 (按距离从短到长)
+            pushes = sorted(((box.left - rect.right, 0), (box.right - rect.left, 0),
+                             (0, box.top - rect.bottom), (0, box.bottom - rect.top)),
+                            key=lambda push: abs(push[0]) + abs(push[1]))
+            dx, dy = next((push for push in pushes if not grid.get_hits(rect.move(push))), pushes[0])
+            x += dx
+            y += dy
+        self.pos[i] = (x, y)
+
+    def _classify(self, center, dist, player):
+        """
+        按镜头可见性和离玩家的距离分档
+        :return: 与 center 等长的 LOD_* 数组
+        """
+        tier = np.full(len(center), LOD_VISIBLE, dtype=np.int8)
+        if self.view_extent is None:
+            return tier
+        px, py = player.rect.center
+        ex, ey = self.view_extent
+        hidden = (np.abs(center[:, 0] - px) > ex) | (np.abs(center[:, 1] - py) > ey)
+        tier[hidden] = LOD_NEAR
+        tier[hidden & (dist > LOD_FAR_DISTANCE)] = LOD_FAR
+        return tier
+
+    def step(self, dt, player):
+        """
+        推进一步模拟：分档、追踪玩家、移动、障碍物碰撞、出界检查、接触伤害，
+        最后把结果写回各个 Enemy 的 hitbox / rect
+        """
+        idx = np.flatnonzero(self.active)
+        self.step_count += 1
+        if idx.size == 0:
+            self.tier_counts = [0] * len(LOD_TIER_NAMES)
+            return
+
+        # 1. 追踪玩家：方向 = 归一化 (玩家中心 - 敌人中心)
+        pos = self.pos[idx]
+        size = self.size[idx]
+        center = pos + size * 0.5
+        diff = np.array(player.rect.center, dtype=np.float64) - center
+        dist = np.hypot(diff[:, 0], diff[:, 1])
+        self.distance[idx] = dist
+
+        # 2. 分档：档位变化的敌人同步到精灵上 (动画和阴影据此跳过)
+        tier = self._classify(center, dist, player)
+        surfaced = idx[(self.tier[idx] == LOD_FAR) & (tier != LOD_FAR)]  # 本步离开远档的敌人
+        changed = np.flatnonzero(tier != self.tier[idx])
+        self.tier[idx] = tier
+        sprites = self.sprites
+        for j, t in zip(changed.tolist(), tier[changed].tolist()):
+            sprites[idx[j]].lod = t
+        self.tier_counts = np.bincount(tier, minlength=len(LOD_TIER_NAMES)).tolist()
+
+        # 3. 本步要移动的敌人：远档按槽位错开，每 LOD_FAR_STEP_INTERVAL 步走一次累积的时间
+        far = tier == LOD_FAR
+        self.lag[idx] += dt
+        if far.any():
+            moving = ~far | ((idx + self.step_count) % LOD_FAR_STEP_INTERVAL == 0)
+            far = far[moving]
+            idx, pos, size, diff, dist = idx[moving], pos[moving], size[moving], diff[moving], dist[moving]
+            tier = tier[moving]
+            if idx.size == 0:
+                return
+        elapsed = self.lag[idx]
+        self.lag[idx] = 0
+
+        safe = np.where(dist > 0, dist, 1.0)
+        velocity = diff / safe[:, None] * (self.speed[idx] * elapsed)[:, None]
+        new_pos = pos + velocity
+
+        # 4. 移动与障碍物碰撞：先批量粗筛，只有可能撞到障碍物的敌人逐个精确处理
+        if self.map_manager is not None:
+            blocked = self._may_hit_obstacle(idx, pos, new_pos)
+            if far.any():
+                new_pos[far] = self._far_destination(idx[far], pos[far], new_pos[far])
+                blocked &= ~far
+            self.pos[idx[~blocked]] = new_pos[~blocked]
+            for j in np.flatnonzero(blocked):
+                self._resolve_move(idx[j], velocity[j, 0], velocity[j, 1])
+        else:
+            self.pos[idx] = new_pos
+        # 离开远档的敌人可能还和障碍物重叠，先推出来 (之后的移动只阻挡新的重叠)
+        if self.map_manager is not None:
+            for i in surfaced.tolist():
+                self._depenetrate(i)
+
+        # 5. 写回精灵 (rect 跟随 hitbox)
+        left = np.floor(self.pos[idx, 0]).astype(np.int64)
+        top = np.floor(self.pos[idx, 1]).astype(np.int64)
+        cx = left + size[:, 0] // 2
+        cy = top + size[:, 1] // 2
+        for i, x, y, c_x, c_y in zip(idx.tolist(), left.tolist(), top.tolist(), cx.tolist(), cy.tolist()):
+            sprite = sprites[i]
+            sprite.hitbox.topleft = (x, y)
+            sprite.rect.center = (c_x, c_y)
+
+        # 6. 空间网格：只同步跨格的敌人
+        if self.spatial_grid is not None:
+            cell = self.spatial_grid.cell_size
+            cells = np.stack([cx // cell, cy // cell], axis=1)
+            moved = np.any(cells != self.cells[idx], axis=1)
+            for j in np.flatnonzero(moved):
+                self.spatial_grid.update_sprite(sprites[idx[j]])
+            self.cells[idx] = cells
+
+        # 7. 出界检查 (墙只在地图边缘)，墙外的敌人直接移除且不给经验
+        if self.map_manager is not None:
+            width, height = self.map_manager.width, self.map_manager.height
+            out = ((cx < TILE_SIZE) | (cx > (width - 2) * TILE_SIZE) |
+                   (cy < TILE_SIZE) | (cy > (height - 2) * TILE_SIZE))
+            for j in np.flatnonzero(out):
+                sprite = sprites[idx[j]]
+                log.warning('enemy', "Enemy detected outside walls at (%s, %s), auto-killing...",
+                            sprite.rect.centerx, sprite.rect.centery)
+                sprite.die(give_xp=False)
+
+        # 8. 接触伤害：批量 AABB 检测 (与 Rect.colliderect 规则一致)，镜头外的敌人碰不到玩家
+        p = player.hitbox
+        touching = ((left < p.right) & (left + size[:, 0] > p.left) &
+                    (top < p.bottom) & (top + size[:, 1] > p.top) &
+                    (tier == LOD_VISIBLE) & self.active[idx])
+        for j in np.flatnonzero(touching):
+            player.take_damage(sprites[idx[j]].stats['damage'])
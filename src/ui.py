@@ -1,5 +1,7 @@
 import pygame
+import numpy as np
 from src.settings import *
+from src.asset_cache import TRANSFORMS
 
 class UIElement:
     """
@@ -30,15 +32,34 @@ class UIElement:
             # 简单的线性插值动画 (Lerp)
             self.scale_factor += (self.target_scale - self.scale_factor) * 0.2
 
+    def draw_scale(self):
+        """
+        绘制时实际使用的缩放倍率
+        [优化] 按 UI_HOVER_SCALE_STEP 量化，悬停动画只有少数几帧
+        """
+        if not self.scale_on_hover or abs(self.scale_factor - 1.0) <= 0.01:
+            return 1.0
+        return round(self.scale_factor / UI_HOVER_SCALE_STEP) * UI_HOVER_SCALE_STEP
+
+    def appearance(self):
+        """外观签名：签名不变时绘制结果不变 (静态画面据此判断控件是否需要重画)"""
+        return (self.is_hovered, self.draw_scale(), self.original_image, self.hover_image)
+
+    def dirty_rect(self):
+        """控件可能绘制到的最大范围 (悬停放大到 1.1 倍)"""
+        return self.rect.inflate(self.rect.width // 10 + 2, self.rect.height // 10 + 2)
+
     def draw(self, surface):
-        """绘制逻辑"""
+        """绘制逻辑 (悬停状态由 update 更新)"""
         img_to_draw = self.hover_image if self.is_hovered else self.original_image
         
-        if self.scale_on_hover and abs(self.scale_factor - 1.0) > 0.01:
+        factor = self.draw_scale()
+        if factor != 1.0:
             # 动态缩放
-            w = int(img_to_draw.get_width() * self.scale_factor)
-            h = int(img_to_draw.get_height() * self.scale_factor)
-            img_to_draw = pygame.transform.scale(img_to_draw, (w, h))
+            # [优化] 缩放结果放在共享变换缓存中，之后的悬停动画不再重复缩放
+            w = int(img_to_draw.get_width() * factor)
+            h = int(img_to_draw.get_height() * factor)
+            img_to_draw = TRANSFORMS.scale(img_to_draw, (w, h))
         
         # 保持中心位置不变
         draw_rect = img_to_draw.get_rect(center=self.rect.center)
@@ -186,6 +207,84 @@ class UpgradeCard(UIElement):
         # 更好的做法是在 __init__ 里传 icon_surf
         pass 
 
+class CachedText:
+    """
+    保留模式文字
+    [优化] 绑定的文本不变时复用上次渲染的 Surface，不再每帧 font.render
+    """
+    def __init__(self, font, color, antialias=False):
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.text = None
+        self.image = None
+
+    def render(self, text):
+        if text != self.text:
+            self.text = text
+            self.image = self.font.render(text, self.antialias, self.color)
+        return self.image
+
+class HealthBar:
+    """
+    血条控件：左右端盖 + 拉伸的中段组成外框，内部是按比例拉伸的填充和 "当前/最大" 文字
+    [优化] 外框中段在创建时拉伸一次；填充只在宽度变化时重新缩放，文字只在数值变化时重新渲染，
+    数值不变时每帧只有几次 blit，没有缩放和文字渲染
+    """
+    def __init__(self, pos, target_width, bar_L, bar_M, bar_R, bar_fill, font,
+                 frame_height=50, fill_height=24, fill_offset_y=12):
+        """
+        :param pos: 外框左上角
+        :param target_width: 外框总宽度
+        """
+        self.pos = pos
+        self.target_width = target_width
+        self.bar_fill = bar_fill
+        self.fill_height = fill_height
+        self.fill_offset_y = fill_offset_y
+        self.frame_height = frame_height
+        w_L = bar_L.get_width() - 12  # 22-10=10
+        w_R = bar_R.get_width() - 14   # 24-14=10
+        self.w_L = w_L
+
+        # 外框：左、右，中间 (拉伸) 宽度 = 总宽 - 左宽 - 右宽，中段只拉伸一次
+        self.bar_L = bar_L
+        self.bar_R = bar_R
+        self.right_x = target_width - w_R
+        mid_target_w = target_width - w_L - w_R
+        self.mid_scaled = pygame.transform.scale(bar_M, (mid_target_w, frame_height)) if mid_target_w > 0 else None
+        # 填充区域的最大宽度 = 中间部分的宽度 (即不覆盖左右两边的盖子)
+        self.max_fill_w = mid_target_w + 12
+
+        self.fill_w = 0
+        self.fill_surf = None
+        self.text = CachedText(font, (255, 255, 255))
+
+    def draw(self, surface, current, max_val):
+        x, y = self.pos
+        # --- 1. 背景框 ---
+        surface.blit(self.bar_L, self.pos)
+        surface.blit(self.bar_R, (x + self.right_x, y))
+        if self.mid_scaled is not None:
+            surface.blit(self.mid_scaled, (x + self.w_L, y))
+
+        # --- 2. 血条填充 (宽度变化时才重新拉伸) ---
+        ratio = max(0, min(1, current / max_val))
+        current_fill_w = int(self.max_fill_w * ratio)
+        if current_fill_w != self.fill_w:
+            self.fill_w = current_fill_w
+            self.fill_surf = (pygame.transform.scale(self.bar_fill, (current_fill_w, self.fill_height))
+                              if current_fill_w > 0 else None)
+        if self.fill_surf is not None:
+            surface.blit(self.fill_surf, (x + self.w_L, y + self.fill_offset_y))
+
+        # --- 3. 文字 ---
+        # 确保显示的生命值不会为负数
+        txt_surf = self.text.render(f"{max(0, int(current))}/{max_val}")
+        # 稍微向下微调一点视觉中心
+        txt_rect = txt_surf.get_rect(center=(x + self.target_width // 2, y + self.frame_height // 2 - 2))
+        surface.blit(txt_surf, txt_rect)
+
 class UI:
     """
     UI 管理类。
@@ -236,11 +335,10 @@ class UI:
         self.bar_M = self.res.get_image('bar_mid')
         self.bar_R = self.res.get_image('bar_right')
         self.bar_fill = self.res.get_image('bigbar_fill') 
-        self.w_L = self.bar_L.get_width() - 12  # 22-10=10
-        self.w_R = self.bar_R.get_width() - 14   # 24-14=10
         self.frame_height = 50
-        self.fill_height = 24
-        self.fill_offset_y = 12
+        self._bars = {}  # {(x, y, 宽度): HealthBar}
+        # [优化] HUD 等级文字只在等级变化时重新渲染
+        self.level_text = CachedText(self.level_font, (255, 255, 255))  # 白色字体，加粗
 
         # 创建半透明遮罩 (黑色，透明度 150/255)
         # 使用 SRCALPHA 模式支持透明度，确保底层游戏内容可见
@@ -261,9 +359,6 @@ class UI:
         self._init_buttons()
         self.level_up_cards = []
         
-        # 加载新手引导图片
-        self.guide_image = self.res.get_image('guide')
-        
         # 创建半透明遮罩（用于教程，能看到游戏画面）
         # 使用更暗的颜色，这样即使底层是黑色背景，也不会太明显
         self.tutorial_mask = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
@@ -272,7 +367,11 @@ class UI:
         # 加载主菜单背景图片
         self.menu_bg = self.res.get_image('cover')
         # 缩放背景图片到窗口大小
-        self.menu_bg = pygame.transform.scale(self.menu_bg, (WINDOW_WIDTH, WINDOW_HEIGHT))
+        # 背景铺满整个窗口，转成不透明格式 (个别边缘像素带一点透明度，会叠在上一帧上，静态画面快照时结果不确定)
+        self.menu_bg = pygame.transform.scale(self.menu_bg, (WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        
+        # [优化] 描边/渐变文字缓存 {(类型, 字体, 文字, 颜色..., 描边宽度): Surface}
+        self._text_cache = {}
         
         # 主菜单按钮文本和位置（用于点击检测）
         self.menu_started_rect = None
@@ -353,7 +452,10 @@ class UI:
             self.sound_button.update_icon(icon)
 
     def draw_custom_cursor(self):
-        """绘制自定义光标"""
+        """
+        绘制自定义光标
+        :return: 光标绘制的区域
+        """
         mouse_pos = pygame.mouse.get_pos()
         
         # 检查是否悬停在任何活跃按钮上
@@ -377,7 +479,7 @@ class UI:
             hovering = True
             
         cursor_img = self.cursor_hov if hovering else self.cursor_ptr
-        self.display_surface.blit(cursor_img, mouse_pos)
+        return self.display_surface.blit(cursor_img, mouse_pos)
 
     def draw_bar(self, x, y, current, max_val, target_width=300):
         """
@@ -385,46 +487,20 @@ class UI:
         x, y: 外框左上角
         target_width: 外框总宽度
         """
-        # --- 1. 绘制背景框 ---
-        self.display_surface.blit(self.bar_L, (x, y))
-        # 右坐标 = x + 总宽 - 右宽
-        self.display_surface.blit(self.bar_R, (x + target_width - self.w_R, y))
-        # 中间 (拉伸) 宽度 = 总宽 - 左宽 - 右宽
-        mid_target_w = target_width - self.w_L - self.w_R
-        if mid_target_w > 0:
-            mid_scaled = pygame.transform.scale(self.bar_M, (mid_target_w, self.frame_height))
-            # 坐标 = x + 左宽
-            self.display_surface.blit(mid_scaled, (x + self.w_L, y))
-        
-        # --- 2. 绘制血条填充 ---
-        ratio = current / max_val
-        ratio = max(0, min(1, ratio))
-        # 填充区域的最大宽度 = 中间部分的宽度 (即不覆盖左右两边的盖子)
-        max_fill_w = mid_target_w + 12
-        # 当前实际宽度
-        current_fill_w = int(max_fill_w * ratio)
-        if current_fill_w > 0:
-            # 拉伸 fill 素材
-            fill_surf = pygame.transform.scale(self.bar_fill, (current_fill_w, self.fill_height))
-            # 绘制坐标：
-            self.display_surface.blit(fill_surf, (x + self.w_L, y + self.fill_offset_y))
-            
-        # --- 3. 绘制文字 ---
-        # 确保显示的生命值不会为负数
-        display_current = max(0, int(current))
-        txt = f"{display_current}/{max_val}"
-        txt_surf = self.font.render(txt, False, (255, 255, 255))
-        # 稍微向下微调一点视觉中心
-        txt_rect = txt_surf.get_rect(center=(x + target_width // 2, y + self.frame_height // 2 - 2))
-        self.display_surface.blit(txt_surf, txt_rect)
+        key = (x, y, target_width)
+        bar = self._bars.get(key)
+        if bar is None:
+            bar = HealthBar((x, y), target_width, self.bar_L, self.bar_M, self.bar_R, self.bar_fill,
+                            self.font, frame_height=self.frame_height)
+            self._bars[key] = bar
+        bar.draw(self.display_surface, current, max_val)
 
     def draw_hud(self, player):
         '''绘制战斗HUD'''
         self.draw_bar(20, 20, player.current_hp, player.stats['max_hp'], target_width=300)
         
         # 在血条右侧显示等级
-        level_text = f"LV.{player.level}"
-        level_surf = self.level_font.render(level_text, False, (255, 255, 255))  # 白色字体，加粗
+        level_surf = self.level_text.render(f"LV.{player.level}")
         # 血条右端位置：x=20, width=300，所以右端在320，加上间距30
         level_x = 20 + 300 + 30
         # 垂直居中，与血条对齐
@@ -432,13 +508,10 @@ class UI:
         level_rect = level_surf.get_rect(midleft=(level_x, level_y))
         self.display_surface.blit(level_surf, level_rect)
         
-        mouse_pos = pygame.mouse.get_pos()
         for btn in self.hud_buttons:
-            btn.update(mouse_pos)
             btn.draw(self.display_surface)
         
         # 绘制声音按钮
-        self.sound_button.update(mouse_pos)
         self.sound_button.draw(self.display_surface)
 
     def draw_xp_text(self, level, xp):
@@ -515,9 +588,13 @@ class UI:
             
             self.level_up_cards.append(card)
 
-    def draw_level_up(self):
+    def draw_level_up(self, mask=True):
+        """
+        :param mask: 是否先盖上半透明遮罩 (传入已经压暗的背景时为 False)
+        """
         # 1. 遮罩
-        self.display_surface.blit(self.mask, (0, 0))
+        if mask:
+            self.display_surface.blit(self.mask, (0, 0))
         
         # 2. 顶部 Banner
         cx, cy = WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2
@@ -535,9 +612,7 @@ class UI:
         self.display_surface.blit(info_surf, info_rect)
         
         # 4. 绘制卡片
-        mouse_pos = pygame.mouse.get_pos()
         for card in self.level_up_cards:
-            card.update(mouse_pos)
             card.draw(self.display_surface)
 
     def get_level_up_choice(self):
@@ -553,13 +628,16 @@ class UI:
     # ====================================================
     # 3. 暂停菜单 (状态: PAUSED)
     # ====================================================
-    def _draw_menu_base(self, banner_img, title_text, buttons):
-        """通用菜单绘制"""
+    def _draw_menu_base(self, banner_img, title_text, buttons, mask=True):
+        """
+        通用菜单绘制
+        :param mask: 是否先盖上半透明遮罩 (传入已经压暗的背景时为 False)
+        """
         # 遮罩
-        self.display_surface.blit(self.mask, (0, 0))
+        if mask:
+            self.display_surface.blit(self.mask, (0, 0))
         
         cx, cy = WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2
-        mouse_pos = pygame.mouse.get_pos()
         
         # 绘制 Banner
         banner_rect = banner_img.get_rect(center=(cx, cy - 50))
@@ -572,14 +650,17 @@ class UI:
         
         # 绘制按钮
         for btn in buttons:
-            btn.update(mouse_pos)
             btn.draw(self.display_surface)
 
-    def draw_pause(self):
-        self._draw_menu_base(self.banner_blue, "PAUSED", self.pause_buttons)
+    def draw_pause(self, mask=True):
+        self._draw_menu_base(self.banner_blue, "PAUSED", self.pause_buttons, mask)
+
+    def draw_game_over(self, mask=True):
+        self._draw_menu_base(self.banner_red, "YOU DIED", self.death_buttons, mask)
 
-    def draw_game_over(self):
-        self._draw_menu_base(self.banner_red, "YOU DIED", self.death_buttons)
+    def overlay_mask(self, state):
+        """叠加界面使用的半透明遮罩 (教程更暗)"""
+        return self.tutorial_mask if state == 'TUTORIAL' else self.mask
         
 
     # ====================================================
@@ -611,16 +692,22 @@ class UI:
     # ====================================================
     # 4. 新手引导教程 (状态: TUTORIAL)
     # ====================================================
-    def draw_tutorial(self):
-        """绘制新手引导教程"""
+    def draw_tutorial(self, mask=True):
+        """
+        绘制新手引导教程
+        :param mask: 是否先盖上半透明遮罩 (传入已经压暗的背景时为 False)
+        """
         # 1. 绘制半透明遮罩（能看到游戏画面）
         # 使用 SRCALPHA 模式的 Surface 可以直接支持透明度
-        self.display_surface.blit(self.tutorial_mask, (0, 0))
+        if mask:
+            self.display_surface.blit(self.tutorial_mask, (0, 0))
         
         # 2. 居中显示 guide.png
         cx, cy = WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2
-        guide_rect = self.guide_image.get_rect(center=(cx, cy))
-        self.display_surface.blit(self.guide_image, guide_rect)
+        # [优化] 引导图只在教程中使用，每次从资源仓库取 (不常驻，可被淘汰)
+        guide_image = self.res.get_image('guide')
+        guide_rect = guide_image.get_rect(center=(cx, cy))
+        self.display_surface.blit(guide_image, guide_rect)
         
         # 存储 guide_rect 以便点击检测
         self.guide_rect = guide_rect
@@ -632,14 +719,22 @@ class UI:
             return not self.guide_rect.collidepoint(mouse_pos)
         return True
 
+    def _outline_offsets(self, outline_width):
+        return [(-outline_width, -outline_width), (outline_width, -outline_width),
+                (-outline_width, outline_width), (outline_width, outline_width),
+                (0, -outline_width), (0, outline_width),
+                (-outline_width, 0), (outline_width, 0)]
+
     def _render_text_with_outline(self, font, text, text_color, outline_color, outline_width=2):
-        """渲染带描边的文字"""
-        # 先渲染描边（在多个方向偏移）
-        offsets = [(-outline_width, -outline_width), (outline_width, -outline_width),
-                   (-outline_width, outline_width), (outline_width, outline_width),
-                   (0, -outline_width), (0, outline_width),
-                   (-outline_width, 0), (outline_width, 0)]
-        
+        """
+        渲染带描边的文字
+        [优化] 结果按 (字体, 文字, 颜色, 描边宽度) 缓存；描边只渲染一次文字，在 8 个方向各贴一次
+        """
+        key = ('outline', font, text, text_color, outline_color, outline_width)
+        cached = self._text_cache.get(key)
+        if cached is not None:
+            return cached
+
         # 获取文字尺寸
         text_surf = font.render(text, True, text_color)
         w, h = text_surf.get_size()
@@ -647,236 +742,218 @@ class UI:
         # 创建更大的 Surface 以容纳描边
         outline_surf = pygame.Surface((w + outline_width * 2, h + outline_width * 2), pygame.SRCALPHA)
         
-        # 绘制描边
-        for offset_x, offset_y in offsets:
-            outline_text = font.render(text, True, outline_color)
+        # 绘制描边（在多个方向偏移）
+        outline_text = font.render(text, True, outline_color)
+        for offset_x, offset_y in self._outline_offsets(outline_width):
             outline_surf.blit(outline_text, (outline_width + offset_x, outline_width + offset_y))
         
         # 绘制主文字（在描边之上）
-        text_surf = font.render(text, True, text_color)
         outline_surf.blit(text_surf, (outline_width, outline_width))
         
+        self._text_cache[key] = outline_surf
         return outline_surf
 
+    def _gradient_rows(self, height):
+        """
+        渐变每一行的颜色，linear-gradient(180deg, #FFB400 0%, rgba(190, 98, 33, 0.8279) 56%, #2C1200 100%)
+        [优化] 用 NumPy 一次算出所有行 (与逐行计算后 int() 截断的结果一致)
+        :return: (height, 3) 的 uint8 数组
+        """
+        color_start = np.array((255, 180, 0), dtype=np.float64)   # #FFB400
+        color_mid = np.array((190, 98, 33), dtype=np.float64)     # rgba(190, 98, 33, 0.8279) 的 RGB
+        color_end = np.array((44, 18, 0), dtype=np.float64)       # #2C1200
+        
+        mid_position = int(height * 0.56)  # 56% 位置
+        y = np.arange(height, dtype=np.float64)[:, None]
+        # 从 start 到 mid
+        t = y / mid_position if mid_position > 0 else np.zeros_like(y)
+        upper = color_start * (1 - t) + color_mid * t
+        # 从 mid 到 end
+        t = (y - mid_position) / (height - mid_position) if (height - mid_position) > 0 else np.zeros_like(y)
+        lower = color_mid * (1 - t) + color_end * t
+        rows = np.where(y < mid_position, upper, lower)
+        return rows.astype(np.int64).astype(np.uint8)
+
     def _create_gradient_surface(self, width, height):
         """创建渐变 surface，颜色为 linear-gradient(180deg, #FFB400 0%, rgba(190, 98, 33, 0.8279) 56%, #2C1200 100%)"""
-        # 创建带透明度的 surface
+        # 创建带透明度的 surface，使用完全不透明的颜色
         gradient_surf = pygame.Surface((width, height), pygame.SRCALPHA)
-        
-        # 渐变颜色定义（RGB 值）
-        # #FFB400 = (255, 180, 0)
-        # rgba(190, 98, 33, 0.8279) 中的 RGB = (190, 98, 33)
-        # #2C1200 = (44, 18, 0)
-        
-        color_start = (255, 180, 0)      # #FFB400
-        color_mid = (190, 98, 33)        # rgba(190, 98, 33, 0.8279) 的 RGB
-        color_end = (44, 18, 0)          # #2C1200
-        
-        mid_position = int(height * 0.56)  # 56% 位置
-        
-        # 从上到下绘制渐变
-        for y in range(height):
-            if y < mid_position:
-                # 从 start 到 mid
-                t = y / mid_position if mid_position > 0 else 0
-                r = int(color_start[0] * (1 - t) + color_mid[0] * t)
-                g = int(color_start[1] * (1 - t) + color_mid[1] * t)
-                b = int(color_start[2] * (1 - t) + color_mid[2] * t)
-            else:
-                # 从 mid 到 end
-                t = (y - mid_position) / (height - mid_position) if (height - mid_position) > 0 else 0
-                r = int(color_mid[0] * (1 - t) + color_end[0] * t)
-                g = int(color_mid[1] * (1 - t) + color_end[1] * t)
-                b = int(color_mid[2] * (1 - t) + color_end[2] * t)
-            
-            # 使用完全不透明的颜色
-            pygame.draw.line(gradient_surf, (r, g, b, 255), (0, y), (width, y))
-        
+        gradient_surf.fill((0, 0, 0, 255))
+        rgb = pygame.surfarray.pixels3d(gradient_surf)
+        rgb[:] = self._gradient_rows(height)[None, :, :]
+        del rgb  # 释放像素锁
         return gradient_surf
 
     def _render_text_with_gradient(self, font, text, outline_color, outline_width=2):
-        """渲染带描边和渐变色的文字（悬停时使用）"""
-        # 先渲染描边（在多个方向偏移）
-        offsets = [(-outline_width, -outline_width), (outline_width, -outline_width),
-                   (-outline_width, outline_width), (outline_width, outline_width),
-                   (0, -outline_width), (0, outline_width),
-                   (-outline_width, 0), (outline_width, 0)]
-        
+        """
+        渲染带描边和渐变色的文字（悬停时使用）
+        [优化] 渐变着色用数组操作代替逐像素 get_at/set_at，结果按 (字体, 文字, 描边颜色, 描边宽度) 缓存
+        """
+        key = ('gradient', font, text, outline_color, outline_width)
+        cached = self._text_cache.get(key)
+        if cached is not None:
+            return cached
+
         # 先渲染文字作为遮罩（白色，用于提取渐变）
         text_surf = font.render(text, True, (255, 255, 255))
         w, h = text_surf.get_size()
         
-        # 创建渐变 surface（与文字同尺寸）
-        gradient_surf = self._create_gradient_surface(w, h)
-        
         # 创建最终 surface（包含描边和渐变文字）
         final_surf = pygame.Surface((w + outline_width * 2, h + outline_width * 2), pygame.SRCALPHA)
         
         # 绘制描边
-        for offset_x, offset_y in offsets:
-            outline_text = font.render(text, True, outline_color)
+        outline_text = font.render(text, True, outline_color)
+        for offset_x, offset_y in self._outline_offsets(outline_width):
             final_surf.blit(outline_text, (outline_width + offset_x, outline_width + offset_y))
         
-        # 绘制渐变文字：使用文字作为遮罩从渐变中提取颜色
-        # 创建一个临时 surface 来应用遮罩
+        # 绘制渐变文字：使用文字作为遮罩从渐变中提取颜色 (只改有像素的位置，保留原透明度)
         text_mask = pygame.Surface((w, h), pygame.SRCALPHA)
         text_mask.blit(text_surf, (0, 0))
-        
-        # 将渐变应用到文字遮罩上
-        for x in range(w):
-            for y in range(h):
-                _, _, _, alpha = text_mask.get_at((x, y))
-                if alpha > 0:
-                    r, g, b, _ = gradient_surf.get_at((x, y))
-                    text_mask.set_at((x, y), (r, g, b, alpha))
+        rgb = pygame.surfarray.pixels3d(text_mask)
+        covered = pygame.surfarray.pixels_alpha(text_mask) > 0
+        gradient = np.broadcast_to(self._gradient_rows(h)[None, :, :], rgb.shape)
+        rgb[covered] = gradient[covered]
+        del rgb  # 释放像素锁
         
         # 将渐变文字绘制到最终 surface 上
         final_surf.blit(text_mask, (outline_width, outline_width))
         
+        self._text_cache[key] = final_surf
         return final_surf
 
     # ====================================================
     # 5. 主菜单 (状态: MENU)
     # ====================================================
-    def draw_main_menu(self):
-        """绘制主菜单"""
-        # 1. 绘制背景图片
-        self.display_surface.blit(self.menu_bg, (0, 0))
-        
-        # 2. 绘制标题（使用 title.svg）
-        # 距离顶部220px，距离右边距100px
-        title_image = self.res.get_image('title')
-        title_rect = title_image.get_rect()
+    def _menu_layout(self):
+        """主菜单布局：(标题矩形, "Started" 背景矩形, "Quit" 背景矩形)"""
+        # 标题距离顶部150px，距离右边距100px
+        title_rect = self.res.get_image('title').get_rect()
         title_rect.top = 150  
         title_rect.right = WINDOW_WIDTH - 100  
-        self.display_surface.blit(title_image, title_rect)
         
-        # 3. 加载选项背景
+        # 计算选项位置：标题和选项之间间距为 36，选项之间间距为 16
         choice_bg = self.res.get_image('choice_bg')
-        
-        # 4. 计算选项位置
-        # 标题底部位置
-        title_bottom = title_rect.bottom
-        # 标题和选项之间间距为 36
-        first_option_top = title_bottom + 36
-        # 选项之间间距为 16
+        first_option_top = title_rect.bottom + 36
         option_spacing = 16
         
         # 计算第一个选项的中心 Y 坐标（需要知道背景高度）
         bg_height = choice_bg.get_height()
-        bg_width = choice_bg.get_width()
         first_option_center_y = first_option_top + bg_height // 2
         second_option_center_y = first_option_center_y + bg_height + option_spacing
         
         # 选项的X坐标：与标题右对齐（距离右边距100px）
         option_x = WINDOW_WIDTH - 100 - choice_bg.get_width() // 2
-        
-        mouse_pos = pygame.mouse.get_pos()
-        
-        # 5. 处理 "Started" 选项的悬停和缩放
         started_bg_rect = choice_bg.get_rect(center=(option_x, first_option_center_y))
-        self.menu_started_hovered = started_bg_rect.collidepoint(mouse_pos)
+        quit_bg_rect = choice_bg.get_rect(center=(option_x, second_option_center_y))
+        return title_rect, started_bg_rect, quit_bg_rect
+
+    def _menu_choice_scale(self, scale):
+        """主菜单选项绘制时实际使用的缩放倍率 (与 UIElement.draw_scale 相同的量化)"""
+        if abs(scale - 1.0) <= 0.01:
+            return 1.0
+        return round(scale / UI_HOVER_SCALE_STEP) * UI_HOVER_SCALE_STEP
+
+    def _update_main_menu(self, mouse_pos):
+        """主菜单选项的悬停检测与缩放动画，返回两个选项的 (Key, 外观签名, 脏矩形)"""
+        _, started_bg_rect, quit_bg_rect = self._menu_layout()
         
         # 更新缩放因子（平滑动画）
+        self.menu_started_hovered = started_bg_rect.collidepoint(mouse_pos)
         target_scale = 1.1 if self.menu_started_hovered else 1.0
         self.menu_started_scale += (target_scale - self.menu_started_scale) * 0.2
         
-        # 计算缩放后的尺寸和位置
-        scaled_width = int(bg_width * self.menu_started_scale)
-        scaled_height = int(bg_height * self.menu_started_scale)
-        scaled_rect = pygame.Rect(0, 0, scaled_width, scaled_height)
-        scaled_rect.center = (option_x, first_option_center_y)
-        
-        # 绘制按钮背景（只缩放，不改变颜色）
-        if abs(self.menu_started_scale - 1.0) > 0.01:
-            scaled_bg = pygame.transform.scale(choice_bg, (scaled_width, scaled_height))
-            self.display_surface.blit(scaled_bg, scaled_rect)
-        else:
-            self.display_surface.blit(choice_bg, started_bg_rect)
-        
-        # 渲染文字（悬停时使用渐变色，否则使用黑色）
-        if self.menu_started_hovered:
-            started_text_surf = self._render_text_with_gradient(
-                self.menu_button_font, "Started", 
-                (255, 255, 255),  # 白色描边
-                outline_width=2
-            )
-        else:
-            started_text_surf = self._render_text_with_outline(
-                self.menu_button_font, "Started", 
-                (0, 0, 0),  # 黑色文字
-                (255, 255, 255),  # 白色描边
-                outline_width=2
-            )
-        if abs(self.menu_started_scale - 1.0) > 0.01:
-            text_scaled = pygame.transform.scale(
-                started_text_surf, 
-                (int(started_text_surf.get_width() * self.menu_started_scale),
-                 int(started_text_surf.get_height() * self.menu_started_scale))
-            )
-            text_rect = text_scaled.get_rect(center=scaled_rect.center)
-            self.display_surface.blit(text_scaled, text_rect)
-        else:
-            started_text_rect = started_text_surf.get_rect(center=started_bg_rect.center)
-            self.display_surface.blit(started_text_surf, started_text_rect)
-        
-        # 更新点击检测区域（使用原始背景区域，但考虑缩放）
-        self.menu_started_rect = scaled_rect if abs(self.menu_started_scale - 1.0) > 0.01 else started_bg_rect
-        
-        # 6. 处理 "Quit" 选项的悬停和缩放
-        quit_bg_rect = choice_bg.get_rect(center=(option_x, second_option_center_y))
         self.menu_quit_hovered = quit_bg_rect.collidepoint(mouse_pos)
-        
-        # 更新缩放因子（平滑动画）
         target_scale = 1.1 if self.menu_quit_hovered else 1.0
         self.menu_quit_scale += (target_scale - self.menu_quit_scale) * 0.2
         
-        # 计算缩放后的尺寸和位置
-        scaled_width = int(bg_width * self.menu_quit_scale)
-        scaled_height = int(bg_height * self.menu_quit_scale)
-        scaled_rect = pygame.Rect(0, 0, scaled_width, scaled_height)
-        scaled_rect.center = (option_x, second_option_center_y)
-        
-        # 绘制按钮背景（只缩放，不改变颜色）
-        if abs(self.menu_quit_scale - 1.0) > 0.01:
-            scaled_bg = pygame.transform.scale(choice_bg, (scaled_width, scaled_height))
-            self.display_surface.blit(scaled_bg, scaled_rect)
+        return [
+            ('menu_started', (self.menu_started_hovered, self._menu_choice_scale(self.menu_started_scale)),
+             started_bg_rect.inflate(started_bg_rect.width // 10 + 2, started_bg_rect.height // 10 + 2)),
+            ('menu_quit', (self.menu_quit_hovered, self._menu_choice_scale(self.menu_quit_scale)),
+             quit_bg_rect.inflate(quit_bg_rect.width // 10 + 2, quit_bg_rect.height // 10 + 2)),
+        ]
+
+    def update_widgets(self, state):
+        """
+        更新当前状态下各控件的悬停状态与缩放动画 (每帧一次，在绘制之前调用)
+        :return: [(控件 Key, 外观签名, 脏矩形), ...]，静态画面据此判断哪些区域需要重画
+        """
+        mouse_pos = pygame.mouse.get_pos()
+        if state == 'MENU':
+            widgets = self._update_main_menu(mouse_pos)
+            buttons = []
         else:
-            self.display_surface.blit(choice_bg, quit_bg_rect)
+            # HUD 在所有游戏内状态下都会绘制 (叠加界面下已冻结在背景里，不再参与悬停)
+            widgets = []
+            buttons = [] if state in BACKDROP_STATES else list(self.hud_buttons)
+            if state == 'PAUSED':
+                buttons += self.pause_buttons
+            elif state == 'GAME_OVER':
+                buttons += self.death_buttons
+            elif state == 'LEVEL_UP':
+                buttons += self.level_up_cards
+        # 声音按钮在所有状态下都显示
+        buttons.append(self.sound_button)
+        
+        for btn in buttons:
+            btn.update(mouse_pos)
+            widgets.append((btn, btn.appearance(), btn.dirty_rect()))
+        return widgets
+
+    def draw_main_menu(self):
+        """绘制主菜单 (悬停状态由 update_widgets 更新)"""
+        # 1. 绘制背景图片
+        self.display_surface.blit(self.menu_bg, (0, 0))
         
+        # 2. 绘制标题（使用 title.svg）
+        title_rect, started_bg_rect, quit_bg_rect = self._menu_layout()
+        self.display_surface.blit(self.res.get_image('title'), title_rect)
+        
+        # 3. 绘制选项，并更新点击检测区域（使用原始背景区域，但考虑缩放）
+        choice_bg = self.res.get_image('choice_bg')
+        self.menu_started_rect = self._draw_menu_choice(
+            choice_bg, started_bg_rect, "Started", self.menu_started_hovered, self.menu_started_scale)
+        self.menu_quit_rect = self._draw_menu_choice(
+            choice_bg, quit_bg_rect, "Quit", self.menu_quit_hovered, self.menu_quit_scale)
+        
+        # 绘制声音按钮（在主菜单也显示）
+        self.sound_button.draw(self.display_surface)
+
+    def _draw_menu_choice(self, choice_bg, bg_rect, label, hovered, scale):
+        """
+        绘制一个主菜单选项 (背景 + 文字)
+        [优化] 文字来自缓存；缩放倍率按 UI_HOVER_SCALE_STEP 量化后从共享变换缓存取，动画过程中不再逐帧缩放
+        :return: 选项当前占据的矩形 (用于点击检测)
+        """
         # 渲染文字（悬停时使用渐变色，否则使用黑色）
-        if self.menu_quit_hovered:
-            quit_text_surf = self._render_text_with_gradient(
-                self.menu_button_font, "Quit",
+        if hovered:
+            text_surf = self._render_text_with_gradient(
+                self.menu_button_font, label,
                 (255, 255, 255),  # 白色描边
                 outline_width=2
             )
         else:
-            quit_text_surf = self._render_text_with_outline(
-                self.menu_button_font, "Quit",
+            text_surf = self._render_text_with_outline(
+                self.menu_button_font, label,
                 (0, 0, 0),  # 黑色文字
                 (255, 255, 255),  # 白色描边
                 outline_width=2
             )
-        if abs(self.menu_quit_scale - 1.0) > 0.01:
-            text_scaled = pygame.transform.scale(
-                quit_text_surf, 
-                (int(quit_text_surf.get_width() * self.menu_quit_scale),
-                 int(quit_text_surf.get_height() * self.menu_quit_scale))
-            )
-            text_rect = text_scaled.get_rect(center=scaled_rect.center)
-            self.display_surface.blit(text_scaled, text_rect)
-        else:
-            quit_text_rect = quit_text_surf.get_rect(center=quit_bg_rect.center)
-            self.display_surface.blit(quit_text_surf, quit_text_rect)
-        
-        # 更新点击检测区域（使用原始背景区域，但考虑缩放）
-        self.menu_quit_rect = scaled_rect if abs(self.menu_quit_scale - 1.0) > 0.01 else quit_bg_rect
         
-        # 绘制声音按钮（在主菜单也显示）
-        mouse_pos = pygame.mouse.get_pos()
-        self.sound_button.update(mouse_pos)
-        self.sound_button.draw(self.display_surface)
+        factor = self._menu_choice_scale(scale)
+        if factor == 1.0:
+            self.display_surface.blit(choice_bg, bg_rect)
+            self.display_surface.blit(text_surf, text_surf.get_rect(center=bg_rect.center))
+            return bg_rect
+        
+        # 计算缩放后的尺寸和位置，绘制按钮背景（只缩放，不改变颜色）
+        scaled_bg = TRANSFORMS.scale(choice_bg, (int(bg_rect.width * factor), int(bg_rect.height * factor)))
+        scaled_rect = scaled_bg.get_rect(center=bg_rect.center)
+        self.display_surface.blit(scaled_bg, scaled_rect)
+        text_scaled = TRANSFORMS.scale(text_surf, (int(text_surf.get_width() * factor),
+                                                   int(text_surf.get_height() * factor)))
+        self.display_surface.blit(text_scaled, text_scaled.get_rect(center=scaled_rect.center))
+        return scaled_rect
 
     def get_main_menu_click(self, mouse_pos):
         """检测主菜单点击位置，返回 'start' 或 'quit' 或 'toggle_sound' 或 None"""
@@ -1,5 +1,6 @@
 # --- src/upgrade_system.py ---
 import random
+from src.logger import log
 
 class UpgradeOption:
     """升级选项基类"""
@@ -36,16 +37,16 @@ class StatUpgrade(UpgradeOption):   #type: stat
             elif mode == 'mult':
                 player.stats[attr] *= val
                 
-            print(f"[UPGRADE] Stat '{attr}' changed: {old_val} -> {player.stats[attr]}")
+            log.info('upgrade', "Stat '%s' changed: %s -> %s", attr, old_val, player.stats[attr])
         else:
-            print(f"[WARNING] Player stats missing attribute: {attr}")
+            log.warning('upgrade', "Player stats missing attribute: %s", attr)
 
 class WeaponAddUpgrade(UpgradeOption):  #type: weapon_add
     def __init__(self, data):
         super().__init__(data)
     def apply(self, player):
         w_id = int(self.raw_data['weapon_id'])
-        print(f"[UPGRADE] Adding Weapon ID: {w_id}")
+        log.info('upgrade', "Adding Weapon ID: %s", w_id)
         player.weapon_controller.add_weapon(w_id)
 
 class WeaponBuffUpgrade(UpgradeOption):
@@ -123,7 +124,7 @@ class WeaponBuffUpgrade(UpgradeOption):
             
             count += 1
             
-        print(f"[UPGRADE] Applied {len(changes)} buffs to {count} weapons. Changes: {changes}")
+        log.info('upgrade', "Applied %s buffs to %s weapons. Changes: %s", len(changes), count, changes)
 
 class HealUpgrade(UpgradeOption):   #type: heal
     def apply(self, player):
@@ -133,7 +134,7 @@ class HealUpgrade(UpgradeOption):   #type: heal
         # 回血并限制不超过上限
         player.current_hp = min(player.current_hp + amount, player.stats['max_hp'])
         
-        print(f"[UPGRADE] Healed {player.current_hp - old_hp} HP.")
+        log.info('upgrade', "Healed %s HP.", player.current_hp - old_hp)
 
 class SpecialUpgrade(UpgradeOption):    #type: special
     def apply(self, player):
@@ -143,7 +144,7 @@ class SpecialUpgrade(UpgradeOption):    #type: special
         # 直接设置到 player 身上
         # 例如 player.life_steal = True
         setattr(player, key, val)
-        print(f"[UPGRADE] Set special ability '{key}' to {val}")
+        log.info('upgrade', "Set special ability '%s' to %s", key, val)
 
 class UpgradeManager:
     def __init__(self, resource_manager):
@@ -1,5 +1,7 @@
 import pygame
 from src.settings import *
+from src.asset_cache import TRANSFORMS
+from src.scheduler import PRIORITY_HIGH
 
 def slice_frames(sheet, frame_count, frame_w=0, spacing=0, margin=0):
     """
@@ -39,6 +41,25 @@ def slice_frames(sheet, frame_count, frame_w=0, spacing=0, margin=0):
         
     return frames
 
+class FrameStrip:
+    """
+    切好的一组动画帧
+    frames 可能是图集中裁掉透明边的图像，offsets 为每帧在原始帧中的左上角偏移 (锚点偏移)，
+    size 为原始帧尺寸；直接从大图切出的帧偏移全为 0
+    """
+    __slots__ = ('frames', 'offsets', 'size')
+
+    def __init__(self, frames, offsets=None, size=None):
+        self.frames = frames
+        self.offsets = offsets if offsets is not None else [(0, 0)] * len(frames)
+        self.size = size if size is not None else frames[0].get_size()
+
+def slice_strip(sheet, data_dict):
+    """按 data 字段 ('frames', 'frame_width', 'spacing', 'margin') 切割大图，返回未裁剪的 FrameStrip"""
+    frames = slice_frames(sheet, data_dict.get('frames', 1), data_dict.get('frame_width', 0),
+                          data_dict.get('spacing', 0), data_dict.get('margin', 0))
+    return FrameStrip(frames)
+
 class AnimationPlayer:
     """
     通用动画控制器。
@@ -46,29 +67,33 @@ class AnimationPlayer:
     """
     def __init__(self, full_image, data_dict, default_speed=10):
         """
-        :param full_image: 完整的序列帧大图 (Surface)
+        :param full_image: 完整的序列帧大图 (Surface)，或已切好的 FrameStrip (如图集中裁剪过的帧)
         :param data_dict: 包含 'frames'(数量), 'frame_width'(宽) 的字典
         :param default_speed: 默认播放速度
         """
-        # 1. 解析配置
-        # data_dict 通常是 json 里的 "data" 字段
-        frame_count = data_dict.get('frames', 1)
-        frame_w = data_dict.get('frame_width', 0) 
-         # [新增] 读取间距参数
-        spacing = data_dict.get('spacing', 0)
-        margin = data_dict.get('margin', 0)
-        
-        # 2. 切割帧
-        self.frames = slice_frames(full_image, frame_count, frame_w, spacing, margin)
+        # 1. 切割帧
+        # data_dict 通常是 json 里的 "data" 字段 (帧数、帧宽、间距)
+        strip = full_image if isinstance(full_image, FrameStrip) else slice_strip(full_image, data_dict)
+        self.animation_speed = default_speed
+        self.set_strip(strip)
+
+    def set_strip(self, strip):
+        """
+        换上一组帧并从头播放 (对象池复用精灵时调用，不必重建 AnimationPlayer)
+        :param strip: FrameStrip
+        """
+        self.frames = strip.frames
+        # [优化] 图集帧裁掉了透明边：offsets 为各帧在原始帧中的偏移，frame_size 为原始帧尺寸
+        self.offsets = strip.offsets
+        self.frame_size = strip.size
         
         # 3. 播放状态
         self.frame_index = 0
-        self.animation_speed = default_speed
         self.finished = False # 是否播放完毕 (用于非循环动画)
         
-        # [优化] 缩放缓存：缓存不同 scale 值对应的缩放结果
-        # 格式: {(frame_index, scale): scaled_surface}
-        self.scale_cache = {}
+        # [优化] 缩放结果放在进程共享的 TRANSFORMS 缓存中，同一张序列帧的所有使用者共用
+        # 这里只记住上一次的结果，帧和缩放都没变时不必再查缓存
+        self._last_scaled = (None, None, None)  # (原始帧, scale, 缩放结果)
 
     def update(self, dt, loop=True):
         """
@@ -92,12 +117,34 @@ class AnimationPlayer:
                     self.frame_index = len(self.frames) - 1
                     self.finished = True
             
+        return self.frames[self._current_index()]
+
+    def _current_index(self):
         frame_idx = int(self.frame_index)
         if frame_idx >= len(self.frames):
             frame_idx = len(self.frames) - 1
         if frame_idx < 0:
             frame_idx = 0
-        return self.frames[frame_idx]
+        return frame_idx
+
+    def get_frame_offset(self, scale=1.0):
+        """当前帧图像在 (缩放后的) 原始帧中的偏移，绘制时加到 rect 左上角"""
+        if not self.frames:
+            return (0, 0)
+        ox, oy = self.offsets[self._current_index()]
+        if scale == 1.0:
+            return (ox, oy)
+        return (int(ox * scale), int(oy * scale))
+
+    def get_frame_rect(self, scale=1.0, **anchor):
+        """
+        按原始帧尺寸 (未裁剪) 生成矩形，用于定位和碰撞，不随裁剪后的帧大小变化
+        :param anchor: 传给 get_rect 的定位参数，如 center=(x, y)
+        """
+        w, h = self.frame_size
+        if scale != 1.0:
+            w, h = int(w * scale), int(h * scale)
+        return pygame.Rect(0, 0, w, h).move_to(**anchor) if anchor else pygame.Rect(0, 0, w, h)
     
     # 获取当前帧+缩放函数
     def get_frame_image(self, dt, loop=True, scale=1.0):
@@ -108,130 +155,81 @@ class AnimationPlayer:
         if scale == 1.0:
             return raw_img
         
-        # [优化] 使用缓存避免重复缩放
-        frame_idx = int(self.frame_index)
-        cache_key = (frame_idx, scale)
-        
-        if cache_key in self.scale_cache:
-            return self.scale_cache[cache_key]
-        
-        # 缓存未命中，执行缩放并缓存
-        w = int(raw_img.get_width() * scale)
-        h = int(raw_img.get_height() * scale)
-        scaled_img = pygame.transform.scale(raw_img, (w, h))
-        
-        # [优化] 限制缓存大小，避免内存占用过大
-        # 只保留最近使用的 50 个缓存项
-        if len(self.scale_cache) > 50:
-            # 删除最旧的缓存项（简单策略：清空一半）
-            keys_to_remove = list(self.scale_cache.keys())[:25]
-            for key in keys_to_remove:
-                del self.scale_cache[key]
-        
-        self.scale_cache[cache_key] = scaled_img
+        raw_last, scale_last, scaled_img = self._last_scaled
+        if raw_last is raw_img and scale_last == scale:
+            return scaled_img
+        scaled_img = TRANSFORMS.scale_by(raw_img, scale)
+        self._last_scaled = (raw_img, scale, scaled_img)
         return scaled_img
         
     def get_all_frames(self):
         """获取所有原始帧 (用于像子弹那样需要预先旋转的情况)"""
         return self.frames
 
-class FlashEffect(pygame.sprite.Sprite):
-    """受击闪白/闪红特效"""
-    def __init__(self, target_sprite, groups, duration=0.1):
-        super().__init__(groups)
-        self.target = target_sprite
-        self.z_layer = LAYERS['vfx_top']
-        self.duration = duration * 1000
-        self.start_time = pygame.time.get_ticks()
-        
-        # 创建初始 mask 和图像
-        self.base_mask = pygame.mask.from_surface(self.target.image)
-        mask_surf = self.base_mask.to_surface(setcolor=(255, 255, 255, 200), unsetcolor=(0,0,0,0))
-        self.image = mask_surf
-        self.last_image_size = self.target.image.get_size()
-        
-        self.rect = self.target.rect.copy()
-        self.hitbox = self.rect.copy() 
+EXPLOSION_FRAME_SIZE = (64, 64)  # 爆炸特效每帧的尺寸
 
-    def update(self, dt):
-        # 跟随目标
-        if self.target.alive():
-            self.rect.center = self.target.rect.center
-            # 只在目标图像大小变化时更新 mask（适配动画）
-            current_size = self.target.image.get_size()
-            if current_size != self.last_image_size:
-                self.base_mask = pygame.mask.from_surface(self.target.image)
-                mask_surf = self.base_mask.to_surface(setcolor=(255, 255, 255, 200), unsetcolor=(0,0,0,0))
-                self.image = mask_surf
-                self.last_image_size = current_size
-            self.hitbox = self.rect.copy() # 同步 hitbox
+def fit_strip(strip, frame_size):
+    """
+    把每帧统一成 frame_size：大了从中心裁切，小了缩放
+    (slice_frames 使用整个图片高度作为帧高度，爆炸大图切出的帧不一定是 64x64)
+    :return: 新的 FrameStrip
+    """
+    frame_width, frame_height = frame_size
+    frames = []
+    for frame in strip.frames:
+        frame_w, frame_h = frame.get_size()
+        if frame_w == frame_width and frame_h == frame_height:
+            frames.append(frame)
+        elif frame_w >= frame_width and frame_h >= frame_height:
+            # 裁切到中心 64x64 区域（从中心裁切）
+            x_offset = (frame_w - frame_width) // 2
+            y_offset = (frame_h - frame_height) // 2
+            frames.append(frame.subsurface(pygame.Rect(x_offset, y_offset, frame_width, frame_height)))
         else:
-            self.kill()
-
-        # 计时销毁
-        if pygame.time.get_ticks() - self.start_time > self.duration:
-            self.kill()
+            # 如果更小，则缩放
+            frames.append(pygame.transform.scale(frame, frame_size))
+    return FrameStrip(frames, size=frame_size)
 
 class Explosion(pygame.sprite.Sprite):
     """死亡/爆炸特效"""
-    # 类变量：跟踪当前存在的特效数量
-    _active_count = 0
+    image_offset = (0, 0)
+    vfx_category = 'explosion'  # VFXManager 中的预算类别
     
-    def __init__(self, pos, groups, texture, frame_count=12, scale=1.0):
+    def __init__(self, pos, groups, texture, frame_count=12, scale=1.0, manager=None):
+        """
+        :param texture: 爆炸序列帧大图，或已按 64x64 切好的 FrameStrip (图集帧 / VFXManager 共享的帧)
+        :param manager: 所属的 VFXManager，销毁时回收到它的对象池
+        """
         super().__init__(groups)
         self.z_layer = LAYERS['vfx_top']
+        self.manager = manager
         
-        # [优化] 检查特效数量限制
-        if Explosion._active_count >= MAX_VFX_COUNT:
-            # 如果特效过多，直接销毁，不创建新特效
-            self.kill()
-            return
-        
-        # [优化] 明确设置每帧大小为 64x64，确保正确裁切
-        # 期望每帧大小为 64x64
-        frame_width = 64
-        frame_height = 64
-        
-        # 构造 data_dict 给 AnimationPlayer 用
-        anim_data = {
-            'frames': frame_count,
-            'frame_width': frame_width,  # 明确设置为 64
-            'spacing': 0,
-            'margin': 0
-        }
-        
-        # 使用 AnimationPlayer 进行帧切割
-        self.anim_player = AnimationPlayer(texture, anim_data, default_speed=20)
-        
-        # [关键修复] 确保每帧都是 64x64 大小
-        # slice_frames 使用整个图片高度作为帧高度，所以需要后处理确保每帧都是 64x64
-        for i, frame in enumerate(self.anim_player.frames):
-            frame_w, frame_h = frame.get_size()
-            if frame_w != frame_width or frame_h != frame_height:
-                # 如果尺寸不匹配，进行裁切或缩放
-                if frame_w >= frame_width and frame_h >= frame_height:
-                    # 裁切到中心 64x64 区域（从中心裁切）
-                    x_offset = (frame_w - frame_width) // 2
-                    y_offset = (frame_h - frame_height) // 2
-                    rect = pygame.Rect(x_offset, y_offset, frame_width, frame_height)
-                    try:
-                        self.anim_player.frames[i] = frame.subsurface(rect)
-                    except ValueError:
-                        # 如果裁切失败，使用缩放
-                        self.anim_player.frames[i] = pygame.transform.scale(frame, (frame_width, frame_height))
-                else:
-                    # 如果更小，则缩放
-                    self.anim_player.frames[i] = pygame.transform.scale(frame, (frame_width, frame_height))
-        
+        # 传入大图时在这里切帧并统一成 64x64 (VFXManager 会把切好的帧共享给所有爆炸)
+        if not isinstance(texture, FrameStrip):
+            anim_data = {'frames': frame_count, 'frame_width': EXPLOSION_FRAME_SIZE[0]}
+            texture = fit_strip(slice_strip(texture, anim_data), EXPLOSION_FRAME_SIZE)
+        self.anim_player = AnimationPlayer(texture, None, default_speed=20)
+        self.reset(pos, texture, scale)
+
+    def reset(self, pos, strip, scale=1.0):
+        """(重新)初始化爆炸，对象池复用时调用"""
+        if strip.frames is not self.anim_player.frames:
+            self.anim_player.set_strip(strip)
+        else:
+            self.anim_player.frame_index = 0
+            self.anim_player.finished = False
         self.scale = scale
         
         # 初始化第一帧
         self.image = self.anim_player.get_frame_image(0, loop=False, scale=self.scale)
-        self.rect = self.image.get_rect(center=pos)
+        self.rect = self.anim_player.get_frame_rect(self.scale, center=pos)
+        self.image_offset = self.anim_player.get_frame_offset(self.scale)
         self.hitbox = self.rect.copy()
-        
-        # [优化] 增加活跃特效计数
-        Explosion._active_count += 1
+
+    def kill(self):
+        super().kill()
+        if self.manager is not None:
+            self.manager.release(self)
 
     def update(self, dt):
         # get_frame_image 内部处理了帧更新
@@ -239,11 +237,117 @@ class Explosion(pygame.sprite.Sprite):
         img = self.anim_player.get_frame_image(dt, loop=False, scale=self.scale)
         
         if self.anim_player.finished:
-            # [优化] 减少活跃特效计数
-            Explosion._active_count = max(0, Explosion._active_count - 1)
             self.kill()
         elif img:
             self.image = img
             # 保持中心不动
-            self.rect = self.image.get_rect(center=self.rect.center)
+            self.rect = self.anim_player.get_frame_rect(self.scale, center=self.rect.center)
+            self.image_offset = self.anim_player.get_frame_offset(self.scale)
+
+class VFXManager:
+    """
+    特效管理器
+    [优化] 死亡爆炸等一次性特效统一从这里生成：
+    1. 对象池：结束的特效回收复用，爆炸共用一份切好的帧
+    2. 按类别限制同时存在的数量 (VFX_BUDGETS)，超出时优先丢弃离镜头最远的特效
+    3. 随世界一起重置 (clear)
+    4. 有延后任务调度器时，queue_explosion 把爆炸放到调度器里，大量敌人同帧死亡时分摊到后面几帧
+    受击闪光不是独立特效，由渲染组按精灵的 flash_until 叠加缓存的剪影
+    """
+    def __init__(self, group, resource_manager, budgets=None, scheduler=None):
+        """
+        :param group: 特效加入的渲染组 (YSortCameraGroup)，同时用它的镜头偏移计算特效离镜头的距离
+        :param budgets: {类别: 同时存在的上限}，默认 VFX_BUDGETS
+        :param scheduler: 延后任务调度器 (JobScheduler)，为 None 时特效立即生成
+        """
+        self.group = group
+        self.res = resource_manager
+        self.scheduler = scheduler
+        self.budgets = dict(VFX_BUDGETS if budgets is None else budgets)
+        self.active = {category: [] for category in self.budgets}
+        self.free = {category: [] for category in self.budgets}
+        self._explosion_frames = (None, None)  # (get_frames 返回的帧, 统一成 64x64 后的帧)
+        self.dropped = 0  # 因超出预算被丢弃的特效数量 (基准测试统计用)
+
+    def __len__(self):
+        return sum(len(active) for active in self.active.values())
+
+    def _distance_sq(self, pos):
+        """到镜头中心的距离平方"""
+        offset = self.group.offset
+        dx = pos[0] - (offset.x + self.group.half_width)
+        dy = pos[1] - (offset.y + self.group.half_height)
+        return dx * dx + dy * dy
+
+    def _make_room(self, category, pos):
+        """
+        预算已满时腾出位置：移除离镜头最远的特效；新特效本身最远时放弃生成
+        :return: 是否可以生成
+        """
+        active = self.active[category]
+        if len(active) < self.budgets[category]:
+            return True
+        self.dropped += 1
+        farthest = max(active, key=lambda effect: self._distance_sq(effect.rect.center))
+        if self._distance_sq(pos) >= self._distance_sq(farthest.rect.center):
+            return False
+        farthest.kill()
+        return True
+
+    def _reuse(self, category):
+        """从对象池取出一个特效并重新加入渲染组，池空时返回 None"""
+        free = self.free[category]
+        if not free:
+            return None
+        effect = free.pop()
+        effect.add(self.group)
+        return effect
+
+    def explosion_frames(self):
+        """
+        共享的爆炸帧 (图集帧已是 64x64，从大图切出的帧在这里统一尺寸，只处理一次)
+        :return: FrameStrip，素材缺失时返回 None
+        """
+        frames = self.res.get_frames('vfx_explosion', ATLAS_SHEETS['vfx_explosion'])
+        # 缺失素材时得到的是 32x32 占位符，不播放
+        if frames.size[0] <= 32:
+            return None
+        source, fitted = self._explosion_frames
+        if source is not frames:
+            fitted = frames if frames.size == EXPLOSION_FRAME_SIZE else fit_strip(frames, EXPLOSION_FRAME_SIZE)
+            self._explosion_frames = (frames, fitted)
+        return fitted
+
+    def explosion(self, pos, scale=1.0):
+        """在 pos 播放爆炸，素材缺失或超出预算被丢弃时返回 None"""
+        strip = self.explosion_frames()
+        if strip is None or not self._make_room('explosion', pos):
+            return None
+        effect = self._reuse('explosion')
+        if effect is None:
+            effect = Explosion(pos, [self.group], strip, scale=scale, manager=self)
+        else:
+            effect.reset(pos, strip, scale)
+        self.active['explosion'].append(effect)
+        return effect
+
+    def queue_explosion(self, pos, scale=1.0):
+        """在 pos 播放爆炸，有调度器时延后到本帧的任务预算内生成"""
+        if self.scheduler is None:
+            self.explosion(pos, scale)
+        else:
+            self.scheduler.submit(self.explosion, pos, scale, priority=PRIORITY_HIGH)
+
+    def release(self, effect):
+        """回收特效（由特效的 kill 调用）；只回收仍在 active 中的，重复 kill 不会重复回收"""
+        category = effect.vfx_category
+        active = self.active[category]
+        if effect in active:
+            active.remove(effect)
+            self.free[category].append(effect)
 
+    def clear(self):
+        """重置游戏时调用：场上的特效全部回收 (渲染组已清空)"""
+        for active in self.active.values():
+            for effect in list(active):
+                effect.kill()
@@ -0,0 +1,199 @@
+"""
+波次导演
+[优化] 刷怪由 waves.json 驱动：
+1. 加载时把各波次编译成按时间排序的生成事件 (每组的敌人组成、是否精英、出生环都已确定)
+2. 到时间的事件放入待生成队列，每帧最多生成 SPAWN_BUDGET_PER_FRAME 个，大波次分摊到多帧，没有集中刷怪的卡顿
+3. 场上敌人达到 MAX_ENEMIES 时暂停生成，队列等敌人死亡后继续；
+   积压超过 SPAWN_BACKLOG_LIMIT 时丢弃最早的普通敌人 (精英不丢)，丢弃数量记在 WaveDirector.dropped
+
+waves.json 每一项是一个波次：
+    id        4000~4999
+    start     开始时间（秒，从开局算起）
+    end       结束时间（秒），省略时一直持续到 WAVE_TIMELINE_LENGTH
+    interval  每隔多少秒生成一组
+    count     每组的敌人数量
+    enemies   {敌人ID: 权重}，整个波次按权重平滑轮转，组成与比例一致
+    elite     可选，true 时这一波都是精英 (血量/伤害/经验/体型按 ELITE_* 放大)
+    ring      可选，[最小距离, 最大距离] 出生环（像素），默认 SPAWN_MIN_DISTANCE~SPAWN_MAX_DISTANCE
+"""
+from collections import deque
+from itertools import islice
+from src.settings import *
+from src.logger import log
+
+
+class SpawnEvent:
+    """时间轴上的一组生成：time 毫秒时生成 enemy_ids 中的敌人"""
+    __slots__ = ('time', 'enemy_ids', 'elite', 'ring')
+
+    def __init__(self, time, enemy_ids, elite, ring):
+        self.time = time
+        self.enemy_ids = enemy_ids
+        self.elite = elite
+        self.ring = ring
+
+
+def _weighted_rotation(weights):
+    """
+    平滑加权轮转：按权重比例依次产出敌人ID，任意一段连续的结果都接近权重比例
+    :param weights: [(敌人ID, 权重), ...]
+    """
+    current = [0] * len(weights)
+    total = sum(weight for _, weight in weights)
+    while True:
+        for i, (_, weight) in enumerate(weights):
+            current[i] += weight
+        best = max(range(len(weights)), key=current.__getitem__)
+        current[best] -= total
+        yield weights[best][0]
+
+
+def compile_waves(waves, known_enemies, length=WAVE_TIMELINE_LENGTH):
+    """
+    把波次配置编译成时间轴
+    :param waves: loader.data['waves'] 的值
+    :param known_enemies: 已加载的敌人ID，未知的敌人会被忽略
+    :param length: 时间轴总长度（秒），没有 end 的波次持续到这里
+    :return: 按时间排序的 SpawnEvent 列表
+    """
+    timeline = []
+    for wave in waves:
+        weights = []
+        for e_id, weight in wave.get('enemies', {}).items():
+            if int(e_id) not in known_enemies:
+                log.warning('waves', "Wave %s references unknown enemy %s, skipped", wave['id'], e_id)
+                continue
+            if weight > 0:
+                weights.append((int(e_id), weight))
+        interval = wave.get('interval', 1.0)
+        count = wave.get('count', 1)
+        if not weights or interval <= 0 or count <= 0:
+            log.warning('waves', "Wave %s spawns nothing, skipped", wave['id'])
+            continue
+
+        ring = tuple(wave.get('ring', (SPAWN_MIN_DISTANCE, SPAWN_MAX_DISTANCE)))
+        elite = bool(wave.get('elite', False))
+        rotation = _weighted_rotation(weights)
+        start, end = wave.get('start', 0), min(wave.get('end', length), length)
+        t = start
+        while t < end:
+            enemy_ids = tuple(next(rotation) for _ in range(count))
+            timeline.append(SpawnEvent(int(t * 1000), enemy_ids, elite, ring))
+            t += interval
+    timeline.sort(key=lambda event: event.time)
+    return timeline
+
+
+class WaveDirector:
+    """
+    按时间轴生成敌人，每帧的生成数量和场上敌人总数都有预算
+    """
+    def __init__(self, waves, enemy_pool, spawn_index, resource_manager,
+                 max_enemies=MAX_ENEMIES, per_frame=SPAWN_BUDGET_PER_FRAME, backlog=SPAWN_BACKLOG_LIMIT):
+        """
+        :param waves: loader.data['waves'] 的值
+        :param enemy_pool: EnemyPool
+        :param spawn_index: SpawnIndex (地图重建时原地更新，可以长期持有)
+        :param resource_manager: 提供敌人数据，并预取即将出现的敌人贴图
+        :param max_enemies: 场上敌人总数预算
+        :param per_frame: 每帧最多生成的敌人数量
+        :param backlog: 待生成队列的积压上限
+        """
+        self.enemy_pool = enemy_pool
+        self.res = resource_manager
+        self.spawn_index = spawn_index
+        self.max_enemies = max_enemies
+        self.per_frame = per_frame
+        self.backlog = backlog
+        self.timeline = compile_waves(sorted(waves, key=lambda wave: wave['id']), resource_manager.data['enemies'])
+        if not self.timeline:
+            log.warning('waves', "waves.json defines no spawns, no enemies will appear")
+        self.pending = deque()  # 待生成的 (敌人ID, 是否精英, 出生环)
+        self.dropped = 0  # 因积压超限丢弃的普通敌人数量
+        self.clock = 0  # 开局以来的时间（毫秒）
+        self.cursor = 0  # 下一个未触发的事件
+        self.prefetch_timer = 0
+        log.info('waves', "Compiled %s waves into %s spawn events", len(waves), len(self.timeline))
+
+    def __len__(self):
+        return len(self.pending)
+
+    def reset(self):
+        """新的一局从头开始"""
+        self.pending.clear()
+        self.dropped = 0
+        self.clock = 0
+        self.cursor = 0
+        self.prefetch_timer = 0
+
+    def upcoming_enemies(self, ahead=ASSET_PREFETCH_AHEAD):
+        """
+        待生成队列中和接下来 ahead 秒内会生成的敌人ID
+        """
+        horizon = self.clock + ahead * 1000
+        enemy_ids = {e_id for e_id, _, _ in self.pending}
+        for event in islice(self.timeline, self.cursor, None):
+            if event.time > horizon:
+                break
+            enemy_ids.update(event.enemy_ids)
+        return enemy_ids
+
+    def _trim_backlog(self):
+        """积压超限时从最早的开始丢弃普通敌人，精英和出生环设定保留"""
+        excess = len(self.pending) - self.backlog
+        if excess <= 0:
+            return
+        kept = deque()
+        dropped = 0
+        for entry in self.pending:
+            if dropped < excess and not entry[1]:
+                dropped += 1
+                continue
+            kept.append(entry)
+        self.pending = kept
+        if dropped and not self.dropped:
+            # 只在本局第一次溢出时记录，之后只累加计数
+            log.info('waves', "Spawn backlog over %s, dropping the oldest regular enemies", self.backlog)
+        self.dropped += dropped
+
+    def prefetch(self):
+        """后台预取 (并固定) 即将出现的敌人贴图"""
+        self.res.prefetch_enemy_sheets(self.upcoming_enemies())
+
+    def update(self, dt, center, live_count):
+        """
+        推进时间轴并生成本帧预算内的敌人
+        :param center: 出生环的中心 (玩家中心)
+        :param live_count: 场上现有敌人数量
+        :return: 本帧生成的敌人数量
+        """
+        self.clock += dt * 1000
+        self.prefetch_timer += dt * 1000
+        if self.prefetch_timer >= ASSET_PREFETCH_INTERVAL * 1000:
+            self.prefetch_timer = 0
+            self.prefetch()
+        timeline = self.timeline
+        while self.cursor < len(timeline) and timeline[self.cursor].time <= self.clock:
+            event = timeline[self.cursor]
+            self.pending.extend((e_id, event.elite, event.ring) for e_id in event.enemy_ids)
+            self.cursor += 1
+        self._trim_backlog()
+
+        room = min(self.per_frame, self.max_enemies - live_count, len(self.pending))
+        if room <= 0:
+            return 0
+        # 同一出生环的敌人一次取样
+        batches = {}
+        for _ in range(room):
+            e_id, elite, ring = self.pending.popleft()
+            batches.setdefault(ring, []).append((e_id, elite))
+        spawned = 0
+        for ring, batch in batches.items():
+            positions = self.spawn_index.sample(center, len(batch), *ring)
+            for pos, (e_id, elite) in zip(positions, batch):
+                self.enemy_pool.spawn(pos, e_id, elite)
+                spawned += 1
+            # 没有可用出生点 (min_distance 以外没有空格子) 时放回队首，下一帧再试
+            for e_id, elite in reversed(batch[len(positions):]):
+                self.pending.appendleft((e_id, elite, ring))
+        return spawned
@@ -1,23 +1,142 @@
 # --- src/weapon.py ---
 import pygame
 import math
+from collections import OrderedDict
 from src.components import GameSprite
 from src.settings import *
-from src.vfx import slice_frames, AnimationPlayer
+from src.vfx import slice_frames, slice_strip, AnimationPlayer
+from src.logger import log
+from src.scheduler import PRIORITY_HIGH
+from src.sim_clock import SIM_CLOCK
+
+def query_enemies(spatial_grid, enemy_sprites, pos, radius):
+    """
+    敌人广相位查询：返回碰撞箱可能进入 pos 周围 radius 内的敌人（调用方仍需精确碰撞）
+    有空间网格时只查附近网格 (半径加上网格的 query_margin，覆盖最大的敌人碰撞箱)；
+    没有网格时退回全组距离筛选，按每个敌人自己的碰撞箱放宽
+    :param radius: 武器自身的作用半径 (从 pos 到武器碰撞箱边缘)
+    """
+    if spatial_grid is not None:
+        return spatial_grid.get_nearby_sprites(pos, radius + spatial_grid.query_margin)
+
+    px, py = pos
+    nearby = []
+    for enemy in enemy_sprites:
+        ex, ey = enemy.rect.center
+        reach = radius + max(enemy.hitbox.size) // 2 + 1
+        if (ex - px) ** 2 + (ey - py) ** 2 <= reach * reach:
+            nearby.append(enemy)
+    return nearby
+
+class ProjectileFrameCache:
+    """
+    子弹预旋转帧缓存（所有子弹共享）
+    Key = (武器ID, 缩放, 量化后的角度)，Value = 已缩放并旋转好的帧列表
+    [优化] 同一角度桶内的子弹直接复用帧列表，发射时不再切帧 / 缩放 / 旋转
+    """
+    def __init__(self, angle_step=PROJECTILE_ANGLE_STEP, max_entries=PROJECTILE_FRAME_CACHE_SIZE):
+        """
+        :param angle_step: 角度量化步长（度）
+        :param max_entries: 最多保存的条目数，超出时淘汰最久未使用的条目
+        """
+        self.angle_step = angle_step
+        self.max_entries = max_entries
+        self.frames = OrderedDict()
+
+    def __len__(self):
+        return len(self.frames)
+
+    @staticmethod
+    def _is_placeholder(full_image):
+        """缺失素材时的洋红色占位方块"""
+        return full_image.get_size() == (32, 32) and full_image.get_at((16, 16)) == (255, 0, 255, 255)
+
+    @staticmethod
+    def _full_frames(strip):
+        """图集帧裁掉了透明边：按偏移贴回原始帧尺寸，旋转中心才与原图一致"""
+        if not any(strip.offsets):
+            return strip.frames
+        frames = []
+        for frame, offset in zip(strip.frames, strip.offsets):
+            full = pygame.Surface(strip.size, pygame.SRCALPHA)
+            full.blit(frame, offset)
+            frames.append(full)
+        return frames
+
+    def get_frames(self, weapon_id, full_image, data, scale, angle, strip=None):
+        """
+        获取指定武器、缩放和朝向的帧列表（缓存未命中时现场生成）
+        [优化] 原始帧直接用资源管理器共享的序列帧 (res.get_frames)，这里不再另存一份，
+        大图被仓库淘汰后不会被子弹缓存继续占着
+        :param weapon_id: 武器ID
+        :param full_image: 子弹图像 (可能是 sprite sheet)，用于识别占位符
+        :param data: 武器的 data 字段 (帧数、帧宽等)
+        :param scale: 缩放倍率
+        :param angle: 朝向角度（度），按 angle_step 量化
+        :param strip: 已切好的 FrameStrip，为 None 时现场从 full_image 切帧
+        """
+        bucket = round(angle / self.angle_step) * self.angle_step % 360
+        key = (weapon_id, scale, bucket)
+        frames = self.frames.get(key)
+        if frames is not None:
+            self.frames.move_to_end(key)
+            return frames
+
+        if self._is_placeholder(full_image):    # 黄色圆形占位符，不需要旋转
+            r = int(10 * scale)
+            image = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
+            pygame.draw.circle(image, (255, 200, 50), (r, r), r-2)
+            frames = [image]
+        else:   # 处理流程： 原图 -> 缩放 -> 旋转 -> 保存
+            if strip is None:
+                strip = slice_strip(full_image, data)
+            frames = []
+            for frame in self._full_frames(strip):
+                if scale != 1.0:
+                    w = int(frame.get_width() * scale)
+                    h = int(frame.get_height() * scale)
+                    frame = pygame.transform.scale(frame, (w, h))
+                frames.append(pygame.transform.rotate(frame, bucket))
+
+        self.frames[key] = frames
+        if len(self.frames) > self.max_entries:
+            self.frames.popitem(last=False)
+        return frames
+
+    def clear(self):
+        self.frames.clear()
+
+# 全局共享的子弹帧缓存
+PROJECTILE_FRAME_CACHE = ProjectileFrameCache()
 
 class Projectile(GameSprite):
     '''子弹类武器'''
     def __init__(self, pos, direction, weapon_data, groups, 
-                 enemy_sprites, obstacle_sprites, angle_offset=0):
+                 enemy_sprites, obstacle_sprites, angle_offset=0, spatial_grid=None,
+                 obstacle_grid=None, image_surf=None, pool=None, frame_cache=None, strip=None):
         super().__init__(groups, pos, z_layer=LAYERS['main'])
         
         self.enemy_sprites = enemy_sprites
         self.obstacle_sprites = obstacle_sprites
-
+        self.obstacle_grid = obstacle_grid
+        self.spatial_grid = spatial_grid
+        self.pool = pool  # 所属对象池 (可为 None，此时 kill 后直接丢弃)
+        self.frame_cache = frame_cache if frame_cache is not None else PROJECTILE_FRAME_CACHE
+        self.animation_speed = 10
+
+        self.reset(pos, direction, weapon_data, angle_offset, image_surf, strip)
+
+    def reset(self, pos, direction, weapon_data, angle_offset=0, image_surf=None, strip=None):
+        """
+        (重新)初始化子弹状态，对象池复用子弹时调用
+        :param image_surf: 子弹图像，为 None 时读取 weapon_data['image_surf']
+        :param strip: 子弹序列帧 (res.get_frames 的结果)，为 None 时从子弹图像切帧
+        """
         self.damage = weapon_data['damage']
         self.speed = weapon_data['speed']
         self.range = weapon_data.get('range', 1000)
-        self.scale = weapon_data.get('data', {}).get('scale', 1.0)
+        data = weapon_data.get('data', {})
+        self.scale = data.get('scale', 1.0)
 
         # 1. 处理方向
         # 原始方向向量为发射角度
@@ -26,54 +145,13 @@ class Projectile(GameSprite):
         final_angle = base_angle + angle_offset
         rad = math.radians(final_angle)
         self.direction = pygame.math.Vector2(math.cos(rad), - math.sin(rad))
-            
-        # 使用通用控制器获取原始帧
-        # 注意：子弹比较特殊，因为需要旋转。如果每帧 update 都旋转，性能开销大。
-        # 最佳实践是：在 init 里把所有动画帧都预先旋转好。
-        
-        # [逻辑] 检查占位符
-        full_image = weapon_data.get('image_surf')
-        is_placeholder = False
-        if full_image.get_size() == (32, 32):
-             if full_image.get_at((16, 16)) == (255, 0, 255, 255):
-                is_placeholder = True
-        
-        self.rotated_frames = []
-        self.anim_player = None # 标记是否有动画
-        
-        if is_placeholder:    # 黄色圆形占位符，不需要旋转
-            r = int(10 * self.scale)
-            self.image = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
-            pygame.draw.circle(self.image, (255, 200, 50), (r, r), r-2)
-        else:   # 正常图片：处理动画与预旋转
-            temp_anim = AnimationPlayer(
-                full_image=full_image,
-                data_dict=weapon_data.get('data', {}),
-                default_speed=10
-            )
-            raw_frames = temp_anim.get_all_frames()
-
-            # 处理流程： 原图 -> 缩放 -> 旋转 -> 保存
-            for frame in raw_frames:
-                # 1. 缩放
-                if self.scale != 1.0:
-                    w = int(frame.get_width() * self.scale)
-                    h = int(frame.get_height() * self.scale)
-                    scaled_frame = pygame.transform.scale(frame, (w, h))
-                else:
-                    scaled_frame = frame
-                
-                # 2. 旋转
-                rotated_frame = pygame.transform.rotate(scaled_frame, final_angle)
-                self.rotated_frames.append(rotated_frame)
-            
-            self.image = self.rotated_frames[0]
-            self.anim_player = True 
 
+        # 2. 从共享缓存取预旋转帧 (移动方向保持精确角度，只有贴图按角度桶量化)
+        full_image = image_surf if image_surf is not None else weapon_data.get('image_surf')
+        self.rotated_frames = self.frame_cache.get_frames(
+            weapon_data.get('id'), full_image, data, self.scale, final_angle, strip)
+        self.image = self.rotated_frames[0]
         self.frame_index = 0
-        self.animation_speed = 10 
-        
-        self.rect = self.image.get_rect(center=pos)
 
         # 3. 设置 Rect 和 Hitbox
         self.rect = self.image.get_rect(center=pos)
@@ -86,6 +164,11 @@ class Projectile(GameSprite):
         self.pos_vec = pygame.math.Vector2(self.rect.center)
         self.distance_traveled = 0
 
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
     def update(self, dt):
         # 移动
         move_amount = self.speed * dt
@@ -94,8 +177,8 @@ class Projectile(GameSprite):
         self.rect.center = self.hitbox.center
         self.distance_traveled += move_amount
 
-        # 仅当不是占位符且有多帧时，播放预旋转的动画
-        if self.anim_player and len(self.rotated_frames) > 1:
+        # 仅当有多帧时（占位符只有一帧），播放预旋转的动画
+        if len(self.rotated_frames) > 1:
             self.frame_index += self.animation_speed * dt
             if self.frame_index >= len(self.rotated_frames):
                 self.frame_index = 0
@@ -103,31 +186,23 @@ class Projectile(GameSprite):
             # 保持 rect 中心
             self.rect = self.image.get_rect(center=self.hitbox.center)
 
-        # 撞墙检测
-        if self.obstacle_sprites:
+        # 撞墙检测 [优化] 有占用网格时只检查子弹所在的格子
+        if self.obstacle_grid is not None:
+            if self.obstacle_grid.collides(self.hitbox):
+                self.kill()
+                return
+        elif self.obstacle_sprites:
             wall_hits = pygame.sprite.spritecollide(self, self.obstacle_sprites, 
                         False, lambda s, o: s.hitbox.colliderect(o.hitbox))
             if wall_hits:
                 self.kill()
                 return
 
-        # 撞人检测 [优化] 使用距离预过滤减少碰撞检测次数
-        # 先进行粗略的距离检查，只对附近的敌人进行精确碰撞检测
-        bullet_pos = pygame.math.Vector2(self.hitbox.center)
-        nearby_enemies = []
-        max_check_distance = 100  # 最大检测距离（像素）
-        
-        for enemy in self.enemy_sprites:
-            enemy_pos = pygame.math.Vector2(enemy.rect.center)
-            distance_sq = (bullet_pos - enemy_pos).length_squared()
-            if distance_sq <= max_check_distance * max_check_distance:
-                nearby_enemies.append(enemy)
-        
-        # 只对附近的敌人进行精确碰撞检测
-        if nearby_enemies:
-            hits = pygame.sprite.spritecollide(self, pygame.sprite.Group(nearby_enemies), 
-                                              False, lambda s, e: s.hitbox.colliderect(e.hitbox))
-            for enemy in hits:
+        # 撞人检测 [优化] 空间网格粗筛 + hitbox 精确检测
+        max_check_distance = self.hitbox.width // 2
+        for enemy in query_enemies(self.spatial_grid, self.enemy_sprites, 
+                                   self.hitbox.center, max_check_distance):
+            if self.hitbox.colliderect(enemy.hitbox):
                 if hasattr(enemy, 'take_damage'):
                     enemy.take_damage(self.damage)
                 self.kill()
@@ -137,13 +212,62 @@ class Projectile(GameSprite):
         if self.distance_traveled > self.range:
             self.kill()
 
+class ProjectilePool:
+    """
+    子弹对象池
+    [优化] 死亡的子弹回收到空闲列表，发射时优先复用，避免每发子弹都新建 Sprite
+    """
+    def __init__(self, groups, enemy_sprites, obstacle_sprites, spatial_grid=None,
+                 obstacle_grid=None, frame_cache=None, max_size=PROJECTILE_POOL_SIZE):
+        """
+        :param groups: 子弹加入的精灵组
+        :param max_size: 最多保留的空闲子弹数量
+        """
+        self.groups = groups
+        self.enemy_sprites = enemy_sprites
+        self.obstacle_sprites = obstacle_sprites
+        self.spatial_grid = spatial_grid
+        self.obstacle_grid = obstacle_grid
+        self.frame_cache = frame_cache if frame_cache is not None else PROJECTILE_FRAME_CACHE
+        self.max_size = max_size
+        self.free = []
+        self._free_ids = set()  # 防止同一颗子弹被重复回收 (kill 可能被调用多次)
+
+    def __len__(self):
+        return len(self.free)
+
+    def spawn(self, pos, direction, weapon_data, image_surf=None, angle_offset=0, strip=None):
+        """取出 (或新建) 一颗子弹并初始化"""
+        if self.free:
+            projectile = self.free.pop()
+            self._free_ids.discard(id(projectile))
+            projectile.reset(pos, direction, weapon_data, angle_offset, image_surf, strip)
+            projectile.add(self.groups)
+            return projectile
+        return Projectile(pos, direction, weapon_data, self.groups, self.enemy_sprites,
+                          self.obstacle_sprites, angle_offset, spatial_grid=self.spatial_grid,
+                          obstacle_grid=self.obstacle_grid, image_surf=image_surf,
+                          pool=self, frame_cache=self.frame_cache, strip=strip)
+
+    def release(self, projectile):
+        """回收子弹（由 Projectile.kill 调用）"""
+        if id(projectile) in self._free_ids or len(self.free) >= self.max_size:
+            return
+        self.free.append(projectile)
+        self._free_ids.add(id(projectile))
+
+    def clear(self):
+        self.free.clear()
+        self._free_ids.clear()
+
 class Orbital(GameSprite):
-    def __init__(self, player, groups, enemy_sprites, weapon_data, start_angle):
+    def __init__(self, player, groups, enemy_sprites, weapon_data, start_angle, spatial_grid=None):
         # 环绕物通常在 main 层或 vfx 层
         super().__init__(groups, player.rect.center, z_layer=LAYERS['vfx_top'])
         
         self.player = player
         self.enemy_sprites = enemy_sprites
+        self.spatial_grid = spatial_grid
         self.weapon_data = weapon_data
         self.data_ref = weapon_data.get('data', {}) # 引用
 
@@ -155,7 +279,7 @@ class Orbital(GameSprite):
 
         # 使用通用动画控制器
         self.anim_player = AnimationPlayer(
-            full_image=weapon_data['image_surf'],
+            full_image=weapon_data.get('frames', weapon_data['image_surf']),
             data_dict=weapon_data.get('data', {}),
             default_speed=15
         )
@@ -190,40 +314,30 @@ class Orbital(GameSprite):
         self.rect = self.image.get_rect(center=self.rect.center)
         self.hitbox = self.rect.inflate(0, 0)
 
-        # 伤害判定 (基于时间间隔) [优化] 使用距离预过滤
-        current_time = pygame.time.get_ticks()
+        # 伤害判定 (基于时间间隔) [优化] 空间网格粗筛
+        current_time = SIM_CLOCK.ticks
         if current_time - self.attack_timer >= self.dmg_interval:
-            # [优化] 先进行距离预过滤
-            orbital_pos = pygame.math.Vector2(self.rect.center)
-            max_check_distance = self.radius + 50  # 检测半径 + 缓冲
-            nearby_enemies = []
-            
-            for enemy in self.enemy_sprites:
-                enemy_pos = pygame.math.Vector2(enemy.rect.center)
-                distance_sq = (orbital_pos - enemy_pos).length_squared()
-                if distance_sq <= max_check_distance * max_check_distance:
-                    nearby_enemies.append(enemy)
+            max_check_distance = max(self.hitbox.width, self.hitbox.height) // 2
+            nearby_enemies = query_enemies(self.spatial_grid, self.enemy_sprites,
+                                           self.rect.center, max_check_distance)
+            hits = [e for e in nearby_enemies if self.hitbox.colliderect(e.hitbox)]
             
-            # 只对附近的敌人进行精确碰撞检测
-            if nearby_enemies:
-                hits = pygame.sprite.spritecollide(self, pygame.sprite.Group(nearby_enemies), 
-                                                  False, lambda s, e: s.hitbox.colliderect(e.hitbox))
+            if hits:
+                # 对碰到的所有敌人生效
+                for enemy in hits:
+                    if hasattr(enemy, 'take_damage'):
+                        enemy.take_damage(self.damage)
                 
-                if hits:
-                    # 对碰到的所有敌人生效
-                    for enemy in hits:
-                        if hasattr(enemy, 'take_damage'):
-                            enemy.take_damage(self.damage)
-                    
-                    # 重置计时器 (造成一次伤害后进入冷却)
-                    self.attack_timer = current_time
+                # 重置计时器 (造成一次伤害后进入冷却)
+                self.attack_timer = current_time
 
 class Aura(GameSprite):
-    def __init__(self, player, groups, enemy_sprites, weapon_data):
+    def __init__(self, player, groups, enemy_sprites, weapon_data, spatial_grid=None):
         super().__init__(groups, player.rect.center, z_layer=LAYERS['vfx_bottom'])
         
         self.player = player
         self.enemy_sprites = enemy_sprites
+        self.spatial_grid = spatial_grid
         
         # 保存 data 的引用，而不是只读取一次数值
         self.weapon_data = weapon_data 
@@ -247,7 +361,7 @@ class Aura(GameSprite):
         else:   # 正常素材：使用动画控制器
             anim_speed = weapon_data['speed']
             self.anim_player = AnimationPlayer(
-                full_image=full_image, 
+                full_image=weapon_data.get('frames', full_image), 
                 data_dict=self.data_ref,
                 default_speed=anim_speed if anim_speed > 0 else 10
             )
@@ -293,36 +407,29 @@ class Aura(GameSprite):
         
         self.hitbox.center = self.rect.center
         
-        # 3. 伤害逻辑 [优化] 使用距离预过滤
-        current_time = pygame.time.get_ticks()
+        # 3. 伤害逻辑 [优化] 空间网格粗筛
+        current_time = SIM_CLOCK.ticks
         if current_time - self.attack_timer >= self.dmg_interval:
-            # [优化] 先进行距离预过滤
-            aura_pos = pygame.math.Vector2(self.rect.center)
-            max_check_distance = current_radius + 50  # 检测半径 + 缓冲
-            nearby_enemies = []
-            
-            for enemy in self.enemy_sprites:
-                enemy_pos = pygame.math.Vector2(enemy.rect.center)
-                distance_sq = (aura_pos - enemy_pos).length_squared()
-                if distance_sq <= max_check_distance * max_check_distance:
-                    nearby_enemies.append(enemy)
-            
-            # 只对附近的敌人进行精确碰撞检测
+            max_check_distance = current_radius
+            nearby_enemies = query_enemies(self.spatial_grid, self.enemy_sprites,
+                                           self.rect.center, max_check_distance)
+            for enemy in nearby_enemies:
+                if self.hitbox.colliderect(enemy.hitbox) and hasattr(enemy, 'take_damage'):
+                    enemy.take_damage(self.damage)
             if nearby_enemies:
-                hits = pygame.sprite.spritecollide(self, pygame.sprite.Group(nearby_enemies), 
-                                                  False, lambda s, e: s.hitbox.colliderect(e.hitbox))
-                for enemy in hits:
-                    if hasattr(enemy, 'take_damage'): 
-                        enemy.take_damage(self.damage)
                 self.attack_timer = current_time
 
 class WeaponController:
-    def __init__(self, player, groups, enemy_sprites, obstacle_sprites, resource_manager):
+    def __init__(self, player, groups, enemy_sprites, obstacle_sprites, resource_manager, spatial_grid=None,
+                 obstacle_grid=None, scheduler=None):
         self.player = player
         self.groups = groups
         self.enemy_sprites = enemy_sprites
         self.obstacle_sprites = obstacle_sprites
+        self.obstacle_grid = obstacle_grid  # 障碍物占用网格 (可为 None，此时子弹退回精灵组碰撞)
+        self.spatial_grid = spatial_grid  # 敌人空间网格 (可为 None，此时武器退回全组扫描)
         self.res = resource_manager
+        self.scheduler = scheduler  # 延后任务调度器 (可为 None，此时环绕物/光环立即重建)
         
         # 武器列表 [3001, 3001, ...]
         self.equipped_weapons = [3001] 
@@ -333,14 +440,18 @@ class WeaponController:
         # 或者更简单：每帧检查数量是否变化，变了就全删重生成（Roguelite中升级不频繁，这很安全且能保证排列整齐）
         self.orbital_sprites = pygame.sprite.Group()
         self.aura_sprites = pygame.sprite.Group()
+        # [优化] 子弹对象池
+        self.projectile_pool = ProjectilePool(groups, enemy_sprites, obstacle_sprites,
+                                              spatial_grid=spatial_grid, obstacle_grid=obstacle_grid)
         # 标记武器列表是否变化，避免每帧检查
         self._weapons_changed = False
 
     def update(self):
         if DEBUG_WEAPON and pygame.time.get_ticks() % 1000 < 20:
-             print(f"[WEAPON DEBUG] Holding {len(self.equipped_weapons)} weapons. Cooldowns len: {len(self.cooldowns)}")
+             log.debug('weapon', "Holding %s weapons. Cooldowns len: %s", len(self.equipped_weapons), len(self.cooldowns))
 
-        current_time = pygame.time.get_ticks()
+        # 冷却按模拟时钟计时 (掉帧、暂停都不影响)
+        current_time = SIM_CLOCK.ticks
         
         # 1. 自动扩容冷却列表 (防止数组越界)
         while len(self.cooldowns) < len(self.equipped_weapons):
@@ -364,11 +475,11 @@ class WeaponController:
                 if w_type == 'orbital': target_orbitals.append(w_id)
                 elif w_type == 'aura': target_auras.append(w_id)
                     
-            # 如果数量不对，重置所有环绕物和光环
+            # 如果数量不对，重置所有环绕物和光环 ([优化] 放到延后任务中，不占用升级当帧的时间)
             if len(self.aura_sprites) != len(target_auras): 
-                self._respawn_auras(target_auras)
+                self._defer(self._respawn_auras, target_auras)
             if len(self.orbital_sprites) != len(target_orbitals): 
-                self._respawn_orbitals(target_orbitals)
+                self._defer(self._respawn_orbitals, target_orbitals)
             
             self._weapons_changed = False
 
@@ -376,7 +487,7 @@ class WeaponController:
 
         # 4. 按【索引】遍历，实现独立冷却
         # 4. 处理发射型 (Projectile)
-        mouse_pos = pygame.math.Vector2(pygame.mouse.get_pos())
+        mouse_pos = pygame.math.Vector2(self.player.input_source.get_mouse_pos())
         screen_center = pygame.math.Vector2(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
         direction = mouse_pos - screen_center
 
@@ -400,6 +511,13 @@ class WeaponController:
                 self.fire(w_data, direction, angle_offset)
                 self.cooldowns[i] = current_time
 
+    def _defer(self, fn, *args):
+        """有调度器时放入延后任务队列 (同一种重建只保留最后一次提交的)，否则立即执行"""
+        if self.scheduler is None:
+            fn(*args)
+        else:
+            self.scheduler.submit(fn, *args, priority=PRIORITY_HIGH, key=fn)
+
     def _respawn_orbitals(self, orbital_ids):
         """清空并重新生成所有环绕物，确保角度均匀"""
         # 1. 清理旧的
@@ -420,9 +538,12 @@ class WeaponController:
             # 优先使用 effect
             effect_key = w_data.get('effect', w_data['image'])
             orb_data['image_surf'] = self.res.get_image(effect_key)
+            # 共享的切帧结果 (缩放结果才能在共享变换缓存中命中)
+            orb_data['frames'] = self.res.get_frames(effect_key, w_data.get('data', {}))
             
             Orbital(self.player, [self.groups, self.orbital_sprites], 
-                    self.enemy_sprites, orb_data, start_angle=i*step)
+                    self.enemy_sprites, orb_data, start_angle=i*step,
+                    spatial_grid=self.spatial_grid)
             
     def _respawn_auras(self, aura_ids):
         """重新生成所有 Aura"""
@@ -436,9 +557,10 @@ class WeaponController:
             
             effect_key = w_data.get('effect', w_data['image'])
             aura_data['image_surf'] = self.res.get_image(effect_key)
+            aura_data['frames'] = self.res.get_frames(effect_key, w_data.get('data', {}))
             
             Aura(self.player, [self.groups, self.aura_sprites], 
-                 self.enemy_sprites, aura_data)
+                 self.enemy_sprites, aura_data, spatial_grid=self.spatial_grid)
 
     def add_weapon(self, weapon_id):
         """添加武器并标记变化"""
@@ -446,10 +568,7 @@ class WeaponController:
         self._weapons_changed = True
 
     def fire(self, w_data, direction, angle_offset):
-        player_pos = pygame.math.Vector2(self.player.rect.center)
-        projectile_data = w_data.copy()
-        
-        # [Bug修复] 显式打印调试信息
+        # [优化] 不再复制 w_data，图像单独传入；子弹从对象池取出
         # 1. 尝试获取 effect 字段
         effect_key = w_data.get('effect')
         
@@ -459,15 +578,11 @@ class WeaponController:
             effect_key = w_data.get('image')
         
         # 3. 传入 Projectile 的是最终确定的 Surface
-        projectile_data['image_surf'] = self.res.get_image(effect_key)
-        
-        Projectile(
-            pos=player_pos, 
-            direction=direction, 
-            weapon_data=projectile_data, 
-            groups=self.groups, 
-            enemy_sprites=self.enemy_sprites,
-            obstacle_sprites=self.obstacle_sprites,
-            angle_offset=angle_offset
+        self.projectile_pool.spawn(
+            pos=self.player.rect.center,
+            direction=direction,
+            weapon_data=w_data,
+            image_surf=self.res.get_image(effect_key),
+            angle_offset=angle_offset,
+            strip=self.res.get_frames(effect_key, w_data.get('data', {}))
         )
-